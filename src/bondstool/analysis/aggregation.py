@@ -0,0 +1,187 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from bondstool.memo import MemoCache, content_hash
+
+HORIZONS = {
+    "W": "Тиждень",
+    "M": "Місяць",
+    "Q": "Квартал",
+    "Y": "Рік",
+}
+
+_ACCUMULATORS = MemoCache()
+
+
+@dataclass
+class CashFlowAccumulator:
+    start: pd.Timestamp
+    names: pd.Index
+    cumulative: np.ndarray
+
+    @property
+    def n_days(self):
+        return self.cumulative.shape[1] - 1
+
+    @property
+    def end(self):
+        return self.start + pd.Timedelta(days=self.n_days - 1)
+
+    def day_positions(self, dates):
+        days = (pd.DatetimeIndex(dates).normalize() - self.start).days.values
+
+        return np.clip(days, 0, self.n_days)
+
+    def range_totals(self, starts, ends):
+        lower = self.day_positions(starts)
+        upper = self.day_positions(pd.DatetimeIndex(ends) + pd.Timedelta(days=1))
+
+        return self.cumulative[:, upper] - self.cumulative[:, lower]
+
+    def total(self, start, end):
+        return pd.Series(self.range_totals([start], [end])[:, 0], index=self.names)
+
+    def resample(self, freq="M", start=None, end=None):
+        periods = pd.period_range(start or self.start, end or self.end, freq=freq)
+
+        totals = self.range_totals(periods.start_time, periods.end_time.normalize())
+
+        return pd.DataFrame(
+            totals.T,
+            index=pd.DatetimeIndex(periods.end_time.normalize(), name="period_end"),
+            columns=self.names,
+        )
+
+
+def build_accumulator(
+    df: pd.DataFrame,
+    value_col="total_pay_val",
+    date_col="pay_date",
+    by=None,
+    start=None,
+    end=None,
+):
+
+    df = df.dropna(subset=[date_col])
+    dates = pd.DatetimeIndex(df[date_col]).normalize()
+
+    today = pd.Timestamp.today()
+
+    start = pd.Timestamp(start or (dates.min() if len(dates) else today)).normalize()
+    end = pd.Timestamp(end or (dates.max() if len(dates) else start)).normalize()
+    n_days = (end - start).days + 1
+
+    days = (dates - start).days.values
+    inside = (days >= 0) & (days < n_days)
+
+    if by is None:
+        codes = np.zeros(len(df), dtype=int)
+        names = pd.Index([value_col])
+    else:
+        codes, names = pd.factorize(df[by], sort=True)
+        names = pd.Index(names, name=by)
+
+    flat = codes[inside] * n_days + days[inside]
+    daily = np.bincount(
+        flat,
+        weights=df[value_col].to_numpy(dtype=float)[inside],
+        minlength=len(names) * n_days,
+    ).reshape(len(names), n_days)
+
+    cumulative = np.zeros((len(names), n_days + 1))
+    np.cumsum(daily, axis=1, out=cumulative[:, 1:])
+
+    return CashFlowAccumulator(start=start, names=names, cumulative=cumulative)
+
+
+def period_totals(frame: pd.DataFrame, freq="M"):
+
+    periods = pd.DatetimeIndex(frame.index).to_period(freq)
+    totals = frame.groupby(periods).sum()
+
+    totals.index = pd.DatetimeIndex(
+        totals.index.end_time.normalize(), name="period_end"
+    )
+
+    return totals
+
+
+def build_accumulators(bag: pd.DataFrame, trading_bonds: pd.DataFrame):
+
+    bag_accumulator = build_accumulator(bag)
+
+    unit_payments = trading_bonds.assign(
+        unit_pay_val=trading_bonds["pay_val"] * trading_bonds["exchange_rate"]
+    )
+    bonds_accumulator = build_accumulator(
+        unit_payments,
+        value_col="unit_pay_val",
+        by="ISIN",
+        start=bag_accumulator.start,
+    )
+
+    return bag_accumulator, bonds_accumulator
+
+
+def get_accumulators(bag: pd.DataFrame, trading_bonds: pd.DataFrame, version=None):
+
+    if version is None:
+        return build_accumulators(bag, trading_bonds)
+
+    # trading bonds are fixed by the universe version, only the bag is hashed
+    key = (content_hash(bag), version)
+    found, accumulators = _ACCUMULATORS.get(key)
+
+    if not found:
+        accumulators = build_accumulators(bag, trading_bonds)
+        _ACCUMULATORS.put(key, accumulators)
+
+    return accumulators
+
+
+def aggregate_contributions(
+    bag: pd.DataFrame,
+    trading_bonds: pd.DataFrame,
+    amounts,
+    isins,
+    freq="M",
+    version=None,
+):
+
+    bag_accumulator, bonds_accumulator = get_accumulators(bag, trading_bonds, version)
+
+    start = min(bag_accumulator.start, bonds_accumulator.start)
+    end = max(bag_accumulator.end, bonds_accumulator.end)
+
+    bag_payments = bag_accumulator.resample(freq, start, end)
+    bag_payments.columns = ["total_pay_val"]
+
+    bond_payments = bonds_accumulator.resample(freq, start, end)
+    quantities = pd.Series(amounts, index=list(isins), dtype=float)
+    quantities = quantities.groupby(level=0).last()
+    quantities = quantities.reindex(bond_payments.columns, fill_value=0.0)
+
+    contributions = bond_payments * quantities
+    contributions = contributions.loc[:, quantities.to_numpy() != 0]
+
+    return bag_payments, contributions
+
+
+def aggregate_payments(
+    bag: pd.DataFrame,
+    trading_bonds: pd.DataFrame,
+    amounts,
+    isins,
+    freq="M",
+    version=None,
+):
+
+    bag_payments, contributions = aggregate_contributions(
+        bag, trading_bonds, amounts, isins, freq, version
+    )
+
+    potential_payments = bag_payments.copy()
+    potential_payments["total_pay_val"] += contributions.sum(axis=1).to_numpy()
+
+    return bag_payments, potential_payments
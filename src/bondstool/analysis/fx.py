@@ -0,0 +1,129 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from bondstool.analysis.aggregation import period_totals
+
+FX_PATHS = 5000
+FX_SEED = 0
+FX_PERCENTILES = [5, 25, 50, 75, 95]
+
+FX_VOLATILITY = {"USD": 0.10, "EUR": 0.12}
+FX_DRIFT = {"USD": 0.0, "EUR": 0.0}
+FX_CORRELATION = 0.6
+
+
+def exchange_rate_spot(attributes: pd.DataFrame):
+    return (
+        attributes.groupby("currency", observed=True)["exchange_rate"]
+        .first()
+        .astype(float)
+    )
+
+
+def foreign_cash_flows(bag: pd.DataFrame, spot=None):
+
+    bag = bag.dropna(subset=["month_end"])
+    bag = bag.assign(amount=bag["pay_val"] * bag["quantity"])
+
+    flows = bag.pivot_table(
+        index="currency",
+        columns="month_end",
+        values="amount",
+        aggfunc="sum",
+        fill_value=0.0,
+    )
+    rates = bag.groupby("currency")["exchange_rate"].first()
+    if spot is not None:
+        rates = spot.reindex(flows.index).fillna(rates)
+
+    return flows.astype(float), rates.astype(float)
+
+
+def months_ahead(months: pd.DatetimeIndex, date=None):
+
+    if not date:
+        date = datetime.today()
+
+    current = pd.Period(date, freq="M")
+    steps = months.to_period("M").asi8 - current.ordinal
+
+    return np.clip(steps, 1, None)
+
+
+def simulate_fx_paths(
+    spot: pd.Series,
+    n_steps,
+    n_paths=FX_PATHS,
+    volatility=FX_VOLATILITY,
+    drift=FX_DRIFT,
+    correlation=FX_CORRELATION,
+    seed=FX_SEED,
+):
+
+    currencies = list(spot.index)
+    n_currencies = len(currencies)
+
+    sigma = np.array([volatility.get(currency, 0.0) for currency in currencies])
+    mu = np.array([drift.get(currency, 0.0) for currency in currencies])
+
+    corr = np.full((n_currencies, n_currencies), correlation)
+    np.fill_diagonal(corr, 1.0)
+    chol = np.linalg.cholesky(corr)
+
+    dt = 1 / 12
+    rng = np.random.default_rng(seed)
+
+    shocks = rng.standard_normal((n_paths, n_steps, n_currencies)) @ chol.T
+    log_returns = (mu - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * shocks
+
+    paths = spot.values * np.exp(np.cumsum(log_returns, axis=1))
+
+    return np.moveaxis(paths, -1, 0)
+
+
+def simulate_uah_inflows(
+    bag: pd.DataFrame, n_paths=FX_PATHS, date=None, spot=None, **kwargs
+):
+
+    flows, spot = foreign_cash_flows(bag, spot)
+    months = pd.DatetimeIndex(flows.columns, name="month_end")
+
+    is_foreign = spot.index != "UAH"
+    uah = flows.loc[~is_foreign].sum(axis=0).values
+    foreign = flows.loc[is_foreign].values
+
+    if not is_foreign.any():
+        return months, np.broadcast_to(uah, (n_paths, len(months)))
+
+    steps = months_ahead(months, date)
+    paths = simulate_fx_paths(spot[is_foreign], steps.max(), n_paths, **kwargs)
+
+    rates = paths[:, :, steps - 1]
+    inflows = uah + np.einsum("cpm,cm->pm", rates, foreign)
+
+    return months, inflows
+
+
+def fx_percentile_bands(inflows: np.ndarray, months, percentiles=FX_PERCENTILES):
+
+    bands = np.percentile(inflows, percentiles, axis=0)
+
+    return pd.DataFrame(
+        bands.T,
+        index=pd.DatetimeIndex(months, name="month_end"),
+        columns=[f"p{percentile}" for percentile in percentiles],
+    )
+
+
+def get_fx_bands(
+    bag: pd.DataFrame, n_paths=FX_PATHS, date=None, spot=None, freq="M", **kwargs
+):
+
+    months, inflows = simulate_uah_inflows(bag, n_paths, date, spot, **kwargs)
+
+    if freq != "M":
+        totals = period_totals(pd.DataFrame(inflows.T, index=months), freq)
+        months, inflows = totals.index, totals.to_numpy().T
+
+    return fx_percentile_bands(inflows, months)
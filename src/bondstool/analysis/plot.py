@@ -1,9 +1,18 @@
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
+from bondstool.analysis.aggregation import HORIZONS
+
+CHART_MODES = {
+    "svg": "Стандартний",
+    "webgl": "WebGL",
+    "stacked": "Внесок за ISIN",
+}
 
 
 def make_base_monthly_payments_fig(monthly_bag: pd.DataFrame):
+    import plotly.express as px
+
     fig = px.line(monthly_bag)
 
     fig.data[0]["name"] = "Виплати за портфелем"
@@ -11,9 +20,25 @@ def make_base_monthly_payments_fig(monthly_bag: pd.DataFrame):
     return fig
 
 
+def update_monthly_payments_fig(
+    fig: go.Figure, monthly_bag: pd.DataFrame, months: pd.Index
+):
+
+    positions = monthly_bag.index.get_indexer(months)
+    positions = positions[positions >= 0]
+
+    y = np.array(fig.data[0].y, dtype=float)
+    y[positions] = monthly_bag["total_pay_val"].to_numpy()[positions]
+    fig.data[0].y = y
+
+    return fig
+
+
 def plot_potential_payments(
     base_fig: go.Figure, potential_payments: pd.DataFrame, monthly_bag: pd.DataFrame
 ):
+    import plotly.express as px
+
     fig = go.Figure()
 
     trace = px.line(potential_payments).data[0]
@@ -47,7 +72,234 @@ def plot_potential_payments(
     )
     fig.add_trace(avg_bag_trace)
 
-    fig.update_layout(legend_title_text="Облігації", title_font=dict(size=25))
+    return style_payments_fig(fig)
+
+
+def style_payments_fig(fig: go.Figure):
+
+    fig.update_layout(
+        legend_title_text="Облігації", title_font=dict(size=25), uirevision="payments"
+    )
+    fig.update_xaxes(title_text="Дата", title_font=dict(size=25))
+    fig.update_yaxes(title_text="Сума", title_font=dict(size=25))
+
+    return fig
+
+
+def visible_range(relayout_data):
+
+    if not relayout_data:
+        return None
+
+    if "xaxis.range[0]" in relayout_data:
+        bounds = relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    elif "xaxis.range" in relayout_data:
+        bounds = relayout_data["xaxis.range"]
+    else:
+        return None
+
+    return tuple(pd.Timestamp(bound) for bound in bounds)
+
+
+def clip_to_range(frame: pd.DataFrame, x_range=None):
+
+    if x_range is None:
+        return frame
+
+    lower = frame.index.searchsorted(x_range[0])
+    upper = frame.index.searchsorted(x_range[1], side="right")
+
+    return frame.iloc[max(lower - 1, 0) : upper + 1]
+
+
+def minmax_positions(values: np.ndarray, max_points):
+
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, max((max_points - 2) // 2, 1) + 1).astype(int)
+    buckets = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+
+    order = np.lexsort((values, buckets))
+    firsts, lasts = order[edges[:-1]], order[edges[1:] - 1]
+
+    return np.unique(np.concatenate([firsts, lasts, [0, n - 1]]))
+
+
+def coarsen_periods(frame: pd.DataFrame, max_points, freq="M"):
+
+    horizons = list(HORIZONS)
+
+    for coarser in horizons[horizons.index(freq) + 1 :]:
+        if len(frame) <= max_points:
+            break
+
+        periods = frame.index.to_period(coarser)
+        frame = frame.groupby(periods).sum()
+        frame.index = frame.index.end_time.normalize()
+        freq = coarser
+
+    return frame, freq
+
+
+def plot_payments_gl(
+    bag_payments: pd.DataFrame,
+    potential_payments: pd.DataFrame,
+    max_points,
+    x_range=None,
+):
+
+    frame = pd.DataFrame(
+        {
+            "bag": bag_payments["total_pay_val"].reindex(
+                potential_payments.index, fill_value=0.0
+            ),
+            "total": potential_payments["total_pay_val"],
+        }
+    )
+
+    visible = clip_to_range(frame, x_range)
+    visible = visible.iloc[minmax_positions(visible["total"].to_numpy(), max_points)]
+
+    fig = go.Figure()
+
+    fig.add_trace(
+        go.Scattergl(
+            x=visible.index,
+            y=visible["bag"],
+            mode="lines",
+            name="Виплати за портфелем",
+        )
+    )
+    fig.add_trace(
+        go.Scattergl(
+            x=visible.index,
+            y=visible["total"],
+            mode="lines",
+            fill="tonexty",
+            fillcolor="rgba(11, 156, 49, 0.4)",
+            line=dict(color="rgb(34, 130, 47)"),
+            name="Спрогнозовані виплати",
+        )
+    )
+    fig.add_hline(
+        y=bag_payments["total_pay_val"].mean(),
+        line=dict(color="gray", dash="dash"),
+        annotation_text="Середня щомісячна виплата",
+    )
+
+    return style_payments_fig(fig)
+
+
+def plot_isin_contributions(
+    bag_payments: pd.DataFrame,
+    contributions: pd.DataFrame,
+    max_points,
+    x_range=None,
+    freq="M",
+):
+
+    frame = contributions.copy()
+    frame.insert(0, "Виплати за портфелем", bag_payments["total_pay_val"])
+
+    frame, freq = coarsen_periods(clip_to_range(frame, x_range), max_points, freq)
+
+    fig = go.Figure()
+
+    for name in frame.columns:
+        values = frame[name]
+        paying = values.to_numpy() != 0
+
+        fig.add_trace(go.Bar(x=frame.index[paying], y=values[paying], name=name))
+
+    fig.update_layout(barmode="stack", bargap=0.1)
+    fig = style_payments_fig(fig)
+    fig.update_yaxes(title_text=f"Сума за {HORIZONS[freq].lower()}")
+
+    return fig, freq
+
+
+def add_fx_bands(fig: go.Figure, bands: pd.DataFrame):
+
+    x = bands.index
+    band_pairs = [
+        (bands.columns[0], bands.columns[-1], "rgba(30, 90, 200, 0.15)"),
+        (bands.columns[1], bands.columns[-2], "rgba(30, 90, 200, 0.3)"),
+    ]
+
+    for lower, upper, color in band_pairs:
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=bands[upper],
+                mode="lines",
+                line=dict(width=0),
+                showlegend=False,
+                hoverinfo="skip",
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=x,
+                y=bands[lower],
+                mode="lines",
+                line=dict(width=0),
+                fill="tonexty",
+                fillcolor=color,
+                name=f"Валютні сценарії {lower}-{upper}",
+            )
+        )
+
+    median = bands.columns[len(bands.columns) // 2]
+    fig.add_trace(
+        go.Scatter(
+            x=x,
+            y=bands[median],
+            mode="lines",
+            line=dict(color="rgb(30, 90, 200)", dash="dot"),
+            name=f"Валютні сценарії, медіана ({median})",
+        )
+    )
+
+    return fig
+
+
+def add_reinvestment_projection(fig: go.Figure, projection: pd.DataFrame):
+
+    fig.add_trace(
+        go.Scatter(
+            x=projection.index,
+            y=projection["total_inflow"],
+            mode="lines",
+            line=dict(color="rgb(200, 120, 20)", dash="dash"),
+            name="Виплати з реінвестуванням",
+        )
+    )
+
+    return fig
+
+
+def make_consolidation_fig(monthly: pd.DataFrame, total_column: str):
+
+    fig = go.Figure()
+
+    for name in monthly.columns.drop(total_column):
+        fig.add_trace(go.Bar(x=monthly.index, y=monthly[name], name=name))
+
+    fig.add_trace(
+        go.Scatter(
+            x=monthly.index,
+            y=monthly[total_column],
+            mode="lines",
+            line=dict(color="gray"),
+            name="Консолідовані виплати",
+        )
+    )
+
+    fig.update_layout(
+        barmode="stack", legend_title_text="Портфелі", title_font=dict(size=25)
+    )
     fig.update_xaxes(title_text="Дата", title_font=dict(size=25))
     fig.update_yaxes(title_text="Сума", title_font=dict(size=25))
 
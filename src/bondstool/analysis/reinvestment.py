@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from bondstool.analysis.scenarios import build_payment_matrix
+from bondstool.utils import round_to_month_end
+
+REINVEST_HORIZON_MONTHS = 120
+REINVEST_ALLOCATIONS = ("best", "equal")
+
+
+@dataclass
+class ReinvestmentRule:
+    allocation: object = "best"
+    share: float = 1.0
+    min_cash: float = 0.0
+    max_months: int = None
+
+
+@dataclass
+class UnitProfiles:
+    isins: pd.Index
+    profiles: np.ndarray
+    costs: np.ndarray
+
+    @property
+    def last_offsets(self):
+        paying = self.profiles > 0
+        last = self.profiles.shape[1] - 1 - np.argmax(paying[:, ::-1], axis=1)
+
+        return np.where(paying.any(axis=1), last, 0)
+
+
+def month_offsets(months, start):
+    months = pd.DatetimeIndex(months).to_period("M")
+
+    return months.asi8 - pd.Period(start, freq="M").ordinal
+
+
+def build_unit_profiles(trading_bonds: pd.DataFrame, date=None):
+
+    if not date:
+        date = datetime.today()
+
+    bonds = trading_bonds.dropna(subset=["ISIN", "month_end"])
+    bonds = bonds.loc[bonds["pay_date"] > pd.Timestamp(date)]
+
+    matrix = build_payment_matrix(bonds)
+
+    offsets = np.maximum(month_offsets(matrix.columns, date), 1)
+    profiles = np.zeros((len(matrix), offsets.max(initial=0) + 1))
+    np.add.at(profiles.T, offsets, matrix.to_numpy().T)
+
+    attributes = bonds.drop_duplicates(subset="ISIN").set_index("ISIN")
+    costs = (attributes["nominal"] * attributes["exchange_rate"]).reindex(matrix.index)
+
+    return UnitProfiles(
+        isins=matrix.index,
+        profiles=profiles,
+        costs=costs.fillna(0.0).to_numpy(dtype=float),
+    )
+
+
+def allocation_weights(units: UnitProfiles, rule: ReinvestmentRule):
+
+    eligible = (units.costs > 0) & (units.profiles.sum(axis=1) > 0)
+
+    if rule.max_months is not None:
+        eligible &= units.last_offsets <= rule.max_months
+
+    if isinstance(rule.allocation, dict):
+        weights = pd.Series(rule.allocation, dtype=float).reindex(units.isins)
+        weights = weights.fillna(0.0).to_numpy() * eligible
+
+    elif rule.allocation == "equal":
+        weights = eligible.astype(float)
+
+    elif rule.allocation == "best":
+        years = np.maximum(units.last_offsets, 1) / 12
+        with np.errstate(divide="ignore", invalid="ignore"):
+            annual_return = (units.profiles.sum(axis=1) / units.costs - 1) / years
+
+        weights = np.zeros(len(units.isins))
+        if eligible.any():
+            weights[np.argmax(np.where(eligible, annual_return, -np.inf))] = 1.0
+
+    else:
+        raise ValueError(
+            f"Unknown allocation '{rule.allocation}', "
+            f"expected one of {REINVEST_ALLOCATIONS} or a dict of weights."
+        )
+
+    total = weights.sum()
+
+    return weights / total if total else weights
+
+
+def projection_months(horizon, date=None):
+
+    if not date:
+        date = datetime.today()
+
+    periods = pd.period_range(pd.Timestamp(date), periods=horizon, freq="M")
+
+    return pd.DatetimeIndex(
+        round_to_month_end(periods.to_timestamp()), name="month_end"
+    )
+
+
+def project_reinvestment(
+    base_inflows: pd.Series,
+    trading_bonds: pd.DataFrame,
+    rule: ReinvestmentRule = None,
+    horizon=REINVEST_HORIZON_MONTHS,
+    date=None,
+):
+
+    rule = rule or ReinvestmentRule()
+
+    months = projection_months(horizon, date)
+    units = build_unit_profiles(trading_bonds, date)
+    weights = allocation_weights(units, rule)
+
+    base = base_inflows.reindex(months, fill_value=0.0).to_numpy(dtype=float)
+
+    buyable = (weights > 0) & (units.costs > 0)
+    costs = units.costs[buyable]
+    weights = weights[buyable]
+    profiles = units.profiles[buyable]
+    width = profiles.shape[1]
+
+    reinvested = np.zeros(horizon + width)
+    invested = np.zeros(horizon)
+    cash = np.zeros(horizon)
+    bought = np.zeros((horizon, len(costs)))
+
+    carry = 0.0
+    for month in range(horizon):
+        available = carry + (base[month] + reinvested[month]) * rule.share
+
+        if len(costs) and available >= rule.min_cash:
+            bought[month] = np.floor(available * weights / costs)
+            invested[month] = bought[month] @ costs
+            reinvested[month : month + width] += bought[month] @ profiles
+            available -= invested[month]
+
+        carry = cash[month] = available
+
+    projection = pd.DataFrame(
+        {
+            "base_inflow": base,
+            "reinvested_inflow": reinvested[:horizon],
+            "total_inflow": base + reinvested[:horizon],
+            "invested": invested,
+            "cash_balance": cash,
+        },
+        index=months,
+    )
+
+    purchases = pd.DataFrame(bought, index=months, columns=units.isins[buyable])
+    purchases = purchases.loc[:, purchases.any(axis=0)]
+
+    return projection, purchases
@@ -0,0 +1,161 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DAYS_IN_YEAR = 365.0
+SHOCK_PIVOT_YEARS = 2.0
+
+PARALLEL_SHOCKS_BP = np.arange(-300, 301, 50)
+
+
+def make_shock_grid(parallel=PARALLEL_SHOCKS_BP, twists=()):
+
+    shocks = [
+        {"shock": f"{level:+d}bp", "level": level, "slope": 0.0}
+        for level in np.asarray(parallel, dtype=int)
+    ]
+    shocks += [
+        {"shock": f"twist {slope:+g}bp/y", "level": 0.0, "slope": slope}
+        for slope in twists
+    ]
+
+    return pd.DataFrame(shocks).set_index("shock").astype(float)
+
+
+def prepare_cash_flows(bonds: pd.DataFrame, date=None, yields=None):
+
+    if not date:
+        date = datetime.today()
+
+    cash_flows = bonds.loc[bonds["pay_date"] > pd.Timestamp(date)]
+    cash_flows = cash_flows.sort_values(by=["ISIN", "pay_date"], kind="stable")
+
+    times = (cash_flows["pay_date"] - pd.Timestamp(date)).dt.days / DAYS_IN_YEAR
+
+    rates = cash_flows["auk_proc"] / 100
+    if yields is not None:
+        rates = cash_flows["ISIN"].map(yields).astype(float).fillna(rates)
+
+    codes, isins = pd.factorize(cash_flows["ISIN"], sort=True)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+    return {
+        "isins": pd.Index(isins, name="ISIN"),
+        "starts": starts,
+        "times": times.to_numpy(dtype=float),
+        "amounts": cash_flows["pay_val"].to_numpy(dtype=float),
+        "rates": rates.to_numpy(dtype=float),
+        "exchange_rates": cash_flows["exchange_rate"].to_numpy(dtype=float)[starts],
+        "isin_rates": rates.to_numpy(dtype=float)[starts],
+    }
+
+
+def bag_cash_flows(bag: pd.DataFrame, attributes: pd.DataFrame):
+
+    rates = attributes.set_index(attributes["ISIN"].astype(str))["auk_proc"]
+
+    cash_flows = bag.dropna(subset=["pay_date"])
+    cash_flows = cash_flows.drop_duplicates(subset=["ISIN", "pay_date"])
+
+    return cash_flows.assign(auk_proc=cash_flows["ISIN"].map(rates).astype(float))[
+        ["ISIN", "pay_date", "pay_val", "exchange_rate", "auk_proc"]
+    ]
+
+
+def universe_cash_flows(attributes: pd.DataFrame, payments: pd.DataFrame, isins=None):
+
+    attributes = attributes.set_index(attributes["ISIN"].astype(str))
+
+    cash_flows = payments.dropna(subset=["pay_date"])
+    cash_flows = cash_flows.assign(ISIN=cash_flows["ISIN"].astype(str))
+    if isins is not None:
+        cash_flows = cash_flows.loc[cash_flows["ISIN"].isin(list(isins))]
+
+    return cash_flows.assign(
+        exchange_rate=cash_flows["ISIN"].map(attributes["exchange_rate"]).astype(float),
+        auk_proc=cash_flows["ISIN"].map(attributes["auk_proc"]).astype(float),
+    )[["ISIN", "pay_date", "pay_val", "exchange_rate", "auk_proc"]]
+
+
+def segment_sum(values: np.ndarray, starts: np.ndarray):
+    return np.add.reduceat(values, starts, axis=-1)
+
+
+def calc_risk_metrics(bonds: pd.DataFrame, shocks=None, date=None, yields=None):
+
+    if shocks is None:
+        shocks = make_shock_grid()
+
+    flows = prepare_cash_flows(bonds, date, yields)
+    times, amounts, rates = flows["times"], flows["amounts"], flows["rates"]
+    starts = flows["starts"]
+
+    if not len(times):
+        empty = pd.DataFrame(index=flows["isins"])
+        return empty, pd.DataFrame(index=flows["isins"], columns=shocks.index)
+
+    discount = (1 + rates) ** -times
+    present_values = amounts * discount
+
+    pv = segment_sum(present_values, starts)
+    macaulay = segment_sum(times * present_values, starts) / pv
+    convexity = (
+        segment_sum(amounts * times * (times + 1) * discount / (1 + rates) ** 2, starts)
+        / pv
+    )
+
+    metrics = pd.DataFrame(
+        {
+            "yield": flows["isin_rates"],
+            "pv": pv,
+            "pv_uah": pv * flows["exchange_rates"],
+            "macaulay_duration": macaulay,
+            "modified_duration": macaulay / (1 + flows["isin_rates"]),
+            "convexity": convexity,
+            "exchange_rate": flows["exchange_rates"],
+        },
+        index=flows["isins"],
+    )
+
+    level = shocks["level"].to_numpy()[:, None] / 1e4
+    slope = shocks["slope"].to_numpy()[:, None] / 1e4
+    shifted_rates = rates + level + slope * (times - SHOCK_PIVOT_YEARS)
+
+    shocked_pv = segment_sum(amounts * (1 + shifted_rates) ** -times, starts)
+
+    repricing = pd.DataFrame(shocked_pv.T, index=flows["isins"], columns=shocks.index)
+
+    return metrics, repricing
+
+
+def aggregate_bag_risk(bag: pd.DataFrame, metrics: pd.DataFrame, repricing):
+
+    quantities = bag.drop_duplicates(subset="ISIN").set_index("ISIN")["quantity"]
+    quantities = quantities.reindex(metrics.index).fillna(0.0)
+
+    values = quantities * metrics["pv_uah"]
+    total_value = values.sum()
+    weights = values / total_value if total_value else values * 0.0
+
+    summary = pd.Series(
+        {
+            "pv_uah": total_value,
+            "macaulay_duration": (weights * metrics["macaulay_duration"]).sum(),
+            "modified_duration": (weights * metrics["modified_duration"]).sum(),
+            "convexity": (weights * metrics["convexity"]).sum(),
+        }
+    )
+
+    position_values = repricing.mul(quantities * metrics["exchange_rate"], axis=0)
+    shocked_values = position_values.sum(axis=0)
+
+    scenarios = pd.DataFrame(
+        {
+            "pv_uah": shocked_values,
+            "pnl_uah": shocked_values - total_value,
+            "pnl_pct": (shocked_values / total_value - 1) * 100 if total_value else 0.0,
+        }
+    )
+
+    return summary, scenarios
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+from bondstool.utils import round_to_month_end
+
+SCENARIO_CHUNK_SIZE = 4096
+SCENARIO_STEPS = [0, 100, 200]
+SCENARIO_LIMIT = 20
+
+SUMMARY_COLUMNS = ["mean", "min", "min_month", "variance", "gap_count"]
+
+
+def build_payment_matrix(trading_bonds: pd.DataFrame, isins=None, months=None):
+
+    payments = trading_bonds.dropna(subset=["month_end"]).assign(
+        unit_pay_val=lambda df: df["pay_val"] * df["exchange_rate"]
+    )
+
+    matrix = payments.pivot_table(
+        index="ISIN",
+        columns="month_end",
+        values="unit_pay_val",
+        aggfunc="sum",
+        fill_value=0.0,
+    )
+
+    if isins is not None:
+        matrix = matrix.reindex(list(isins), fill_value=0.0)
+
+    if months is not None:
+        matrix = matrix.reindex(columns=months, fill_value=0.0)
+
+    matrix.index.name = "ISIN"
+    matrix.columns.name = "month_end"
+
+    return matrix.astype(float)
+
+
+def scenario_months(*indexes):
+
+    months = pd.DatetimeIndex([])
+    for index in indexes:
+        months = months.union(pd.DatetimeIndex(index))
+
+    period_index = pd.period_range(months.min(), months.max(), freq="M")
+
+    return pd.DatetimeIndex(
+        round_to_month_end(period_index.to_timestamp()), name="month_end"
+    )
+
+
+def allocation_grid(isins, steps, columns=None):
+
+    steps = np.asarray(steps)
+    isins = list(isins)
+
+    mesh = np.meshgrid(*[steps] * len(isins), indexing="ij")
+    grid = pd.DataFrame(np.stack(mesh, axis=-1).reshape(-1, len(isins)), columns=isins)
+
+    if columns is not None:
+        grid = grid.reindex(columns=list(columns), fill_value=0)
+
+    return grid
+
+
+def iter_scenario_cash_flows(
+    quantities, payment_matrix: pd.DataFrame, base=None, chunk_size=SCENARIO_CHUNK_SIZE
+):
+
+    quantities = np.asarray(quantities, dtype=float)
+    matrix = payment_matrix.to_numpy()
+
+    if base is None:
+        base = np.zeros(matrix.shape[1])
+    else:
+        base = np.asarray(base, dtype=float)
+
+    for start in range(0, quantities.shape[0], chunk_size):
+        chunk = quantities[start : start + chunk_size] @ matrix
+        chunk += base
+
+        yield start, chunk
+
+
+def summarize_cash_flows(cash_flows: np.ndarray, gap_threshold=0.0):
+
+    min_index = cash_flows.argmin(axis=1)
+
+    return {
+        "mean": cash_flows.mean(axis=1),
+        "min": cash_flows[np.arange(cash_flows.shape[0]), min_index],
+        "min_month": min_index,
+        "variance": cash_flows.var(axis=1),
+        "gap_count": (cash_flows <= gap_threshold).sum(axis=1),
+    }
+
+
+def evaluate_scenarios(
+    quantities,
+    payment_matrix: pd.DataFrame,
+    base=None,
+    chunk_size=SCENARIO_CHUNK_SIZE,
+    gap_threshold=0.0,
+    keep_cash_flows=True,
+):
+
+    if isinstance(quantities, pd.DataFrame):
+        quantities = quantities.reindex(columns=payment_matrix.index, fill_value=0)
+
+    if isinstance(base, pd.DataFrame):
+        base = base.squeeze(axis=1)
+
+    if isinstance(base, pd.Series):
+        base = base.reindex(payment_matrix.columns, fill_value=0.0)
+
+    n_scenarios = len(quantities)
+    months = payment_matrix.columns
+
+    cash_flows = np.empty((n_scenarios, len(months))) if keep_cash_flows else None
+    summary = {column: np.empty(n_scenarios) for column in SUMMARY_COLUMNS}
+
+    for start, chunk in iter_scenario_cash_flows(
+        quantities, payment_matrix, base, chunk_size
+    ):
+        stop = start + chunk.shape[0]
+
+        if keep_cash_flows:
+            cash_flows[start:stop] = chunk
+
+        for column, values in summarize_cash_flows(chunk, gap_threshold).items():
+            summary[column][start:stop] = values
+
+    summary = pd.DataFrame(summary, columns=SUMMARY_COLUMNS)
+    summary["min_month"] = months[summary["min_month"].astype(int)]
+    summary["gap_count"] = summary["gap_count"].astype(int)
+
+    if keep_cash_flows:
+        cash_flows = pd.DataFrame(cash_flows, columns=months)
+
+    return cash_flows, summary
+
+
+def sweep_allocations(
+    trading_bonds: pd.DataFrame, bag_payments: pd.DataFrame, isins, steps, **kwargs
+):
+
+    payment_matrix = build_payment_matrix(trading_bonds)
+    months = scenario_months(payment_matrix.columns, bag_payments.index)
+    payment_matrix = payment_matrix.reindex(columns=months, fill_value=0.0)
+
+    grid = allocation_grid(isins, steps, columns=payment_matrix.index)
+
+    cash_flows, summary = evaluate_scenarios(
+        grid, payment_matrix, base=bag_payments, **kwargs
+    )
+
+    return grid, cash_flows, summary
+
+
+def rank_allocations(
+    grid: pd.DataFrame,
+    summary: pd.DataFrame,
+    sort_by="min",
+    descending=True,
+    limit=None,
+):
+
+    ranked = pd.concat([grid, summary], axis=1).sort_values(
+        by=sort_by, ascending=not descending, kind="stable"
+    )
+
+    return ranked.head(limit) if limit else ranked
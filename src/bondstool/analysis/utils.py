@@ -1,19 +1,23 @@
+import numpy as np
 import pandas as pd
+from bondstool.analysis.scenarios import build_payment_matrix
+from bondstool.memo import memoize
 from bondstool.utils import round_to_month_end
 
 
+@memoize
 def payments_by_month(df: pd.DataFrame, pay_col="total_pay_val"):
     return df.groupby(["month_end"])[[pay_col]].sum()
 
 
+@memoize
 def fill_missing_months(df: pd.DataFrame):
     period_index = pd.period_range(
         df.index.min(), df.index.max() + pd.DateOffset(months=1), freq="M"
     )
     period_index = round_to_month_end(period_index.to_timestamp())
 
-    filled_df = pd.DataFrame(index=pd.Index(period_index, name=df.index.name)).join(df)
-    filled_df = filled_df.fillna(0.0)
+    filled_df = df.reindex(pd.Index(period_index, name=df.index.name), fill_value=0.0)
     return filled_df
 
 
@@ -23,15 +27,12 @@ def calc_potential_payments(
     bag_payments: pd.DataFrame,
     isin_df: pd.DataFrame,
 ):
-    for isin, amount in zip(isin_df["ISIN"].values, amounts):
-        mask = trading_bonds["ISIN"] == isin
-        trading_bonds.loc[mask, "total_pay_val"] = (
-            trading_bonds.loc[mask, "pay_val"]
-            * amount
-            * trading_bonds.loc[mask, "exchange_rate"]
-        )
-
-    potential_payments = payments_by_month(trading_bonds, pay_col="total_pay_val")
+    payment_matrix = build_payment_matrix(trading_bonds, isins=isin_df["ISIN"])
+
+    potential_payments = pd.DataFrame(
+        {"total_pay_val": np.asarray(amounts, dtype=float) @ payment_matrix.values},
+        index=payment_matrix.columns,
+    )
 
     df = pd.concat((bag_payments, potential_payments))
     df = payments_by_month(df)
@@ -0,0 +1,157 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from bondstool.analysis.risk import DAYS_IN_YEAR, segment_sum
+from bondstool.config import VALUATION_MAX_DATES
+from bondstool.data.bag import SUMS_ROW_LABEL
+
+VALUATION_MEASURES = {
+    "accrued": "Накопичений купонний дохід, UAH",
+    "clean": "Чиста вартість, UAH",
+    "dirty": "Модельна вартість, UAH",
+}
+
+VALUATION_EXPORT_FREQ = "ME"
+
+MEASURE_COLUMN = "Показник"
+
+DAY = np.timedelta64(1, "D")
+
+
+def valuation_dates(bag: pd.DataFrame, start=None, end=None, freq="D"):
+
+    start = pd.Timestamp(start or datetime.today()).normalize()
+    end = pd.Timestamp(end) if end else bag["pay_date"].max()
+
+    if pd.isna(end) or end < start:
+        end = start
+
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick) and offset < pd.offsets.Day():
+        raise ValueError(f"Valuation frequency '{freq}' is shorter than a day.")
+
+    dates = pd.date_range(start, end, freq=offset)
+    dates = dates.union(pd.DatetimeIndex([start])).rename("date")
+
+    if len(dates) > VALUATION_MAX_DATES:
+        raise ValueError(
+            f"Too many valuation dates ({len(dates)}), "
+            f"use a shorter range or a coarser frequency."
+        )
+
+    return dates
+
+
+def prepare_coupon_schedule(bag: pd.DataFrame, attributes: pd.DataFrame, yields=None):
+
+    attributes = attributes.set_index(attributes["ISIN"].astype(str))
+
+    flows = bag.loc[bag["pay_date"].notna(), ["ISIN", "pay_date", "pay_val"]]
+    flows = flows.drop_duplicates(subset=["ISIN", "pay_date"])
+    flows = flows.loc[flows["ISIN"].isin(attributes.index)]
+    flows = flows.sort_values(by=["ISIN", "pay_date"], kind="stable")
+
+    codes, isins = pd.factorize(flows["ISIN"], sort=True)
+    starts = np.flatnonzero(np.diff(codes, prepend=-1))
+    is_first = np.zeros(len(codes), dtype=bool)
+    is_first[starts] = True
+    is_last = np.r_[is_first[1:], True]
+
+    bonds = attributes.reindex(isins)
+    nominal = bonds["nominal"].to_numpy(dtype=float)[codes]
+    pay_period = bonds["pay_period"].to_numpy(dtype="timedelta64[D]")[codes]
+    issue_date = pd.to_datetime(bonds["issue_date"].astype(str), errors="coerce")
+
+    pay_dates = flows["pay_date"].to_numpy(dtype="datetime64[ns]")
+    amounts = flows["pay_val"].to_numpy(dtype=float)
+
+    # the coupon of the first remaining payment started one period earlier,
+    # but never before the bond was issued
+    period_starts = np.r_[pay_dates[:1], pay_dates[:-1]]
+    period_starts[is_first] = np.fmax(
+        pay_dates[is_first] - pay_period[is_first],
+        issue_date.to_numpy(dtype="datetime64[ns]")[codes[is_first]],
+    )
+
+    rates = bonds["auk_proc"] / 100
+    if yields is not None:
+        rates = pd.Series(isins, index=isins).map(yields).astype(float).fillna(rates)
+
+    return {
+        "isins": pd.Index(isins, name="ISIN"),
+        "starts": starts,
+        "pay_dates": pay_dates,
+        "period_starts": period_starts,
+        "amounts": amounts,
+        "coupons": np.clip(amounts - np.where(is_last, nominal, 0.0), 0.0, None),
+        "rates": rates.to_numpy(dtype=float)[codes],
+        "exchange_rates": bonds["exchange_rate"].to_numpy(dtype=float),
+    }
+
+
+def value_bag(
+    bag: pd.DataFrame,
+    attributes: pd.DataFrame,
+    start=None,
+    end=None,
+    freq="D",
+    yields=None,
+):
+
+    dates = valuation_dates(bag, start, end, freq)
+    quantities = bag.drop_duplicates(subset="ISIN").set_index("ISIN")["quantity"]
+
+    flows = prepare_coupon_schedule(bag, attributes, yields)
+    starts = flows["starts"]
+
+    if not len(starts):
+        empty = pd.DataFrame(0.0, index=quantities.index, columns=dates)
+        return {measure: empty.copy() for measure in VALUATION_MEASURES}
+
+    moments = dates.to_numpy(dtype="datetime64[ns]")[:, None]
+    pay_dates = flows["pay_dates"][None, :]
+    period_starts = flows["period_starts"][None, :]
+
+    pending = pay_dates > moments
+    times = (pay_dates - moments) / DAY / DAYS_IN_YEAR
+    discount = np.where(pending, (1 + flows["rates"]) ** -times, 0.0)
+
+    elapsed = (moments - period_starts) / DAY
+    length = np.maximum((pay_dates - period_starts) / DAY, 1.0)
+    accruing = pending & (elapsed >= 0)
+    accrued = np.where(accruing, flows["coupons"] * elapsed / length, 0.0)
+
+    scale = (
+        quantities.reindex(flows["isins"]).to_numpy(dtype=float)
+        * flows["exchange_rates"]
+    )
+
+    values = {
+        "accrued": segment_sum(accrued, starts) * scale,
+        "dirty": segment_sum(flows["amounts"] * discount, starts) * scale,
+    }
+    values["clean"] = values["dirty"] - values["accrued"]
+
+    return {
+        measure: pd.DataFrame(
+            values[measure].T, index=flows["isins"], columns=dates
+        ).reindex(quantities.index, fill_value=0.0)
+        for measure in VALUATION_MEASURES
+    }
+
+
+def format_valuation(valuation: dict):
+
+    frames = []
+    for measure, heading in VALUATION_MEASURES.items():
+        values = valuation[measure]
+        totals = values.sum(axis=0).to_frame(SUMS_ROW_LABEL).T
+
+        frame = pd.concat([values, totals])
+        frame.columns = frame.columns.strftime("%d-%m-%Y")
+        frame.insert(0, MEASURE_COLUMN, heading)
+
+        frames.append(frame.rename_axis(index="ISIN", columns=None).reset_index())
+
+    return pd.concat(frames, ignore_index=True)
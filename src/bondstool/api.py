@@ -0,0 +1,596 @@
+import hashlib
+import json
+
+import pandas as pd
+from bondstool.analysis.risk import (
+    aggregate_bag_risk,
+    bag_cash_flows,
+    calc_risk_metrics,
+    universe_cash_flows,
+)
+from bondstool.analysis.scenarios import (
+    SCENARIO_LIMIT,
+    SCENARIO_STEPS,
+    SUMMARY_COLUMNS,
+    rank_allocations,
+    sweep_allocations,
+)
+from bondstool.analysis.valuation import (
+    VALUATION_MEASURES,
+    valuation_dates,
+    value_bag,
+)
+from bondstool.config import SCENARIO_MAX_GRID
+from bondstool.data.bag import (
+    NoLivePositions,
+    get_bag_views,
+    get_monthly_payments,
+    live_bag,
+    merge_bonds_info,
+    read_bag_records,
+    verify_excel_file,
+)
+from bondstool.data.screener import SCREENER_LIMIT, screen_bonds
+from bondstool.data.universe import universe_as_of
+from flask import Blueprint, Response, jsonify, request
+
+BAG_VIEWS = ["formatted", "schedule", "monthly", "recommendations"]
+
+SCREENER_ORDERS = {"asc": False, "desc": True}
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+
+def frame_to_records(df: pd.DataFrame):
+    if df.index.name is not None:
+        df = df.reset_index()
+
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def body_hash():
+
+    digest = hashlib.sha256()
+
+    if request.files:
+        for name, file in request.files.items(multi=True):
+            digest.update(name.encode())
+            digest.update(file.read())
+            file.seek(0)
+    else:
+        digest.update(request.get_data())
+
+    return digest.hexdigest()
+
+
+def make_etag(*parts):
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+def request_etag(universe):
+    return make_etag(
+        request.path,
+        universe.version,
+        request.query_string.decode("utf-8"),
+        body_hash(),
+    )
+
+
+def read_request_bags():
+
+    if request.files:
+        return {name: file.read() for name, file in request.files.items(multi=True)}
+
+    if request.mimetype == XLSX_MIMETYPE:
+        return {"bag": request.get_data()}
+
+    payload = request.get_json(silent=True)
+
+    if isinstance(payload, list):
+        return {"bag": payload}
+
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON body or an xlsx file.")
+
+    if "bags" in payload:
+        bags = payload["bags"]
+        if isinstance(bags, list):
+            bags = {str(index): records for index, records in enumerate(bags)}
+        elif not isinstance(bags, dict):
+            raise ValueError("Expected 'bags' to be a list or an object of bags.")
+    else:
+        bags = {"bag": payload.get("bag", payload)}
+
+    return bags
+
+
+def prepare_bag(bag):
+
+    if isinstance(bag, bytes):
+        bag = verify_excel_file(bag).to_dict(orient="records")
+
+    if not isinstance(bag, list) or not all(isinstance(row, dict) for row in bag):
+        raise ValueError("Expected a bag as a list of position records.")
+
+    try:
+        return read_bag_records(bag)
+    except (TypeError, KeyError) as error:
+        raise ValueError(f"Malformed position records: {error}.")
+
+
+def request_universe():
+    return universe_as_of(request.args.get("as_of"))
+
+
+def optional_arg(name, type=str):
+
+    value = request.args.get(name)
+
+    if value in (None, ""):
+        return None
+
+    try:
+        return type(value)
+    except ValueError:
+        raise ValueError(f"Invalid value '{value}' for '{name}'.")
+
+
+def read_screener_args():
+
+    order = request.args.get("order", "desc")
+    if order not in SCREENER_ORDERS:
+        raise ValueError(f"Unknown order '{order}', expected 'asc' or 'desc'.")
+
+    auction = optional_arg("auction")
+    if auction is not None and auction not in ("true", "false"):
+        raise ValueError(f"Invalid value '{auction}' for 'auction'.")
+
+    try:
+        pay_periods = [int(value) for value in request.args.getlist("pay_period")]
+    except ValueError:
+        raise ValueError("Expected integer values for 'pay_period'.")
+
+    limit = optional_arg("limit", int) or SCREENER_LIMIT
+    if limit < 1:
+        raise ValueError("Expected a positive 'limit'.")
+
+    return {
+        "currencies": request.args.getlist("currency"),
+        "types": request.args.getlist("type"),
+        "pay_periods": pay_periods,
+        "maturity_from": optional_arg("maturity_from", pd.Timestamp),
+        "maturity_to": optional_arg("maturity_to", pd.Timestamp),
+        "min_profitability": optional_arg("min_profitability", float),
+        "max_profitability": optional_arg("max_profitability", float),
+        "on_auction": None if auction is None else auction == "true",
+        "sort_by": request.args.get("sort", "profitability"),
+        "descending": SCREENER_ORDERS[order],
+        "limit": limit,
+    }
+
+
+def read_yields():
+
+    yields = {}
+    for value in request.args.getlist("yield"):
+        isin, _, rate = value.partition(":")
+        try:
+            yields[isin] = float(rate)
+        except ValueError:
+            raise ValueError(f"Invalid yield '{value}', expected ISIN:rate.")
+
+    return yields or None
+
+
+def read_scenario_args():
+
+    isins = request.args.getlist("isin")
+    if not isins:
+        raise ValueError("Expected at least one 'isin'.")
+
+    steps = request.args.get("steps")
+    try:
+        steps = [int(step) for step in steps.split(",")] if steps else SCENARIO_STEPS
+    except ValueError:
+        raise ValueError("Expected comma separated integers for 'steps'.")
+
+    if min(steps) < 0:
+        raise ValueError("Expected non-negative 'steps'.")
+
+    n_scenarios = len(steps) ** len(isins)
+    if n_scenarios > SCENARIO_MAX_GRID:
+        raise ValueError(
+            f"Too many scenarios ({n_scenarios}), "
+            f"use fewer ISINs or steps (at most {SCENARIO_MAX_GRID})."
+        )
+
+    order = request.args.get("order", "desc")
+    if order not in SCREENER_ORDERS:
+        raise ValueError(f"Unknown order '{order}', expected 'asc' or 'desc'.")
+
+    sort_by = request.args.get("sort", "min")
+    if sort_by not in SUMMARY_COLUMNS:
+        raise ValueError(
+            f"Unknown sort '{sort_by}', expected one of {SUMMARY_COLUMNS}."
+        )
+
+    limit = optional_arg("limit", int) or SCENARIO_LIMIT
+    if limit < 1:
+        raise ValueError("Expected a positive 'limit'.")
+
+    return {
+        "isins": isins,
+        "steps": steps,
+        "sort_by": sort_by,
+        "descending": SCREENER_ORDERS[order],
+        "limit": limit,
+    }
+
+
+def get_views(merged: pd.DataFrame, universe, views):
+
+    frames = get_bag_views(merged, None, universe.calendar, universe.as_of)
+
+    return {view: frame_to_records(frames[view]) for view in views}
+
+
+def tagged_response(response, etag):
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+
+    return response
+
+
+def not_modified(etag):
+
+    if request.if_none_match.contains(etag):
+        return tagged_response(Response(status=304), etag)
+
+    return None
+
+
+def conditional_response(etag, build_body):
+
+    return not_modified(etag) or tagged_response(
+        Response(
+            json.dumps(build_body(), ensure_ascii=False), mimetype="application/json"
+        ),
+        etag,
+    )
+
+
+def error_response(error, status=400):
+    return jsonify(error=str(error)), status
+
+
+@api.get("/universe")
+def universe_info():
+
+    try:
+        universe = request_universe()
+    except LookupError as error:
+        return error_response(error, 404)
+    except ValueError as error:
+        return error_response(error)
+
+    etag = make_etag("universe", universe.version)
+
+    return conditional_response(
+        etag,
+        lambda: {
+            "version": universe.version,
+            "as_of": universe.as_of,
+            "auction_date": universe.auc_date,
+            "auction_isins": universe.isin_df["ISIN"].tolist(),
+        },
+    )
+
+
+@api.post("/bag")
+@api.post("/bag/<view>")
+def bag_analytics(view=None):
+
+    if view is not None and view not in BAG_VIEWS:
+        return error_response(f"Unknown view '{view}'.", 404)
+
+    views = BAG_VIEWS if view is None else [view]
+
+    try:
+        universe = request_universe()
+    except LookupError as error:
+        return error_response(error, 404)
+    except ValueError as error:
+        return error_response(error)
+
+    etag = request_etag(universe)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        bags = read_request_bags()
+        if len(bags) != 1:
+            raise ValueError("Expected exactly one bag, use /api/bags for batches.")
+        bag = prepare_bag(next(iter(bags.values())))
+    except ValueError as error:
+        return error_response(error)
+
+    try:
+        merged = live_bag(bag, universe)
+    except NoLivePositions as error:
+        return error_response(error, 422)
+
+    return conditional_response(
+        etag,
+        lambda: {"version": universe.version, **get_views(merged, universe, views)},
+    )
+
+
+@api.post("/bags")
+def batch_bag_analytics():
+
+    views = request.args.getlist("view") or BAG_VIEWS
+
+    unknown_views = set(views) - set(BAG_VIEWS)
+    if unknown_views:
+        return error_response(f"Unknown views: {', '.join(sorted(unknown_views))}.")
+
+    try:
+        universe = request_universe()
+    except LookupError as error:
+        return error_response(error, 404)
+    except ValueError as error:
+        return error_response(error)
+
+    etag = request_etag(universe)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        raw_bags = read_request_bags()
+    except ValueError as error:
+        return error_response(error)
+
+    merged, errors = {}, {}
+    for name, raw_bag in raw_bags.items():
+        try:
+            merged[name] = live_bag(prepare_bag(raw_bag), universe)
+        except ValueError as error:
+            errors[name] = {"error": str(error)}
+
+    def build_body():
+        results = {
+            name: get_views(bag, universe, views) for name, bag in merged.items()
+        }
+        return {"version": universe.version, "bags": {**results, **errors}}
+
+    return conditional_response(etag, build_body)
+
+
+@api.post("/risk")
+def bag_risk():
+
+    try:
+        universe = request_universe()
+    except LookupError as error:
+        return error_response(error, 404)
+    except ValueError as error:
+        return error_response(error)
+
+    etag = request_etag(universe)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        bags = read_request_bags()
+        if len(bags) != 1:
+            raise ValueError("Expected exactly one bag.")
+        bag = prepare_bag(next(iter(bags.values())))
+        yields = read_yields()
+    except ValueError as error:
+        return error_response(error)
+
+    try:
+        merged = live_bag(bag, universe)
+    except NoLivePositions as error:
+        return error_response(error, 422)
+
+    def build_body():
+        metrics, repricing = calc_risk_metrics(
+            bag_cash_flows(merged, universe.attributes),
+            date=universe.as_of,
+            yields=yields,
+        )
+        summary, scenarios = aggregate_bag_risk(merged, metrics, repricing)
+
+        return {
+            "version": universe.version,
+            "summary": summary.to_dict(),
+            "bonds": frame_to_records(metrics),
+            "scenarios": frame_to_records(scenarios),
+        }
+
+    return conditional_response(etag, build_body)
+
+
+@api.get("/risk/universe")
+def universe_risk():
+
+    try:
+        universe = request_universe()
+    except LookupError as error:
+        return error_response(error, 404)
+    except ValueError as error:
+        return error_response(error)
+
+    try:
+        auction = optional_arg("auction")
+        if auction not in (None, "true", "false"):
+            raise ValueError(f"Invalid value '{auction}' for 'auction'.")
+        yields = read_yields()
+    except ValueError as error:
+        return error_response(error)
+
+    isins = request.args.getlist("isin") or None
+    if auction == "true":
+        auction_isins = universe.isin_df["ISIN"]
+        isins = auction_isins if isins is None else set(isins) & set(auction_isins)
+
+    etag = make_etag(
+        request.path, universe.version, request.query_string.decode("utf-8")
+    )
+
+    def build_body():
+        metrics, repricing = calc_risk_metrics(
+            universe_cash_flows(universe.attributes, universe.payments, isins),
+            date=universe.as_of,
+            yields=yields,
+        )
+
+        return {
+            "version": universe.version,
+            "bonds": frame_to_records(metrics),
+            "repricing": frame_to_records(repricing),
+        }
+
+    return conditional_response(etag, build_body)
+
+
+@api.post("/scenarios")
+def allocation_scenarios():
+
+    try:
+        universe = request_universe()
+    except LookupError as error:
+        return error_response(error, 404)
+    except ValueError as error:
+        return error_response(error)
+
+    etag = request_etag(universe)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        bags = read_request_bags()
+        if len(bags) != 1:
+            raise ValueError("Expected exactly one bag.")
+        bag = prepare_bag(next(iter(bags.values())))
+        args = read_scenario_args()
+    except ValueError as error:
+        return error_response(error)
+
+    unknown = set(args["isins"]) - set(universe.trading_bonds["ISIN"].astype(str))
+    if unknown:
+        return error_response(
+            ValueError(f"Not auction bonds: {', '.join(sorted(unknown))}.")
+        )
+
+    try:
+        merged = live_bag(bag, universe)
+    except NoLivePositions as error:
+        return error_response(error, 422)
+
+    def build_body():
+        monthly = get_monthly_payments(merged, universe.as_of)
+        grid, _, summary = sweep_allocations(
+            universe.trading_bonds,
+            monthly,
+            args["isins"],
+            args["steps"],
+            keep_cash_flows=False,
+        )
+        ranked = rank_allocations(
+            grid[args["isins"]],
+            summary,
+            args["sort_by"],
+            args["descending"],
+            args["limit"],
+        )
+        ranked["min_month"] = ranked["min_month"].dt.strftime("%Y-%m-%d")
+
+        return {
+            "version": universe.version,
+            "count": len(grid),
+            "scenarios": frame_to_records(ranked),
+        }
+
+    return conditional_response(etag, build_body)
+
+
+@api.post("/valuation")
+def bag_valuation():
+
+    try:
+        universe = request_universe()
+    except LookupError as error:
+        return error_response(error, 404)
+    except ValueError as error:
+        return error_response(error)
+
+    etag = request_etag(universe)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    try:
+        bags = read_request_bags()
+        if len(bags) != 1:
+            raise ValueError("Expected exactly one bag.")
+        bag = prepare_bag(next(iter(bags.values())))
+        start = optional_arg("start", pd.Timestamp)
+        end = optional_arg("end", pd.Timestamp)
+        freq = request.args.get("freq", "D")
+    except ValueError as error:
+        return error_response(error)
+
+    merged = merge_bonds_info(bag, index=universe.payment_index)
+    start = start or universe.as_of
+
+    try:
+        valuation_dates(merged, start, end, freq)
+    except ValueError as error:
+        return error_response(error)
+
+    def build_body():
+        valuation = value_bag(merged, universe.attributes, start, end, freq)
+        dates = valuation["dirty"].columns
+        return {
+            "version": universe.version,
+            "dates": list(dates.strftime("%Y-%m-%d")),
+            "isins": valuation["dirty"].index.tolist(),
+            **{
+                measure: valuation[measure].round(2).to_numpy().tolist()
+                for measure in VALUATION_MEASURES
+            },
+        }
+
+    return conditional_response(etag, build_body)
+
+
+@api.get("/screener")
+def bond_screener():
+
+    try:
+        universe = request_universe()
+    except LookupError as error:
+        return error_response(error, 404)
+    except ValueError as error:
+        return error_response(error)
+
+    try:
+        bonds = screen_bonds(universe.screener, **read_screener_args())
+    except ValueError as error:
+        return error_response(error)
+
+    etag = make_etag("screener", universe.version, request.query_string.decode("utf-8"))
+
+    return conditional_response(
+        etag,
+        lambda: {"version": universe.version, "bonds": frame_to_records(bonds)},
+    )
@@ -1,69 +1,145 @@
 import base64
+import os
 
+import diskcache
 import pandas as pd
-import plotly.io as pio
+from bondstool.analysis.aggregation import (
+    aggregate_contributions,
+    aggregate_payments,
+    period_totals,
+)
+from bondstool.analysis.fx import exchange_rate_spot, get_fx_bands
 from bondstool.analysis.plot import (
+    add_fx_bands,
+    add_reinvestment_projection,
     make_base_monthly_payments_fig,
+    make_consolidation_fig,
+    plot_isin_contributions,
+    plot_payments_gl,
     plot_potential_payments,
+    update_monthly_payments_fig,
+    visible_range,
 )
+from bondstool.analysis.reinvestment import project_reinvestment
 from bondstool.analysis.utils import (
     calc_potential_payments,
-    calculate_profitability,
-    fill_missing_months,
-    payments_by_month,
 )
-from bondstool.data.auction import (
-    filter_trading_bonds,
-    get_auction_xml,
-    get_doc_url_date,
-    parse_xml_isins,
+from bondstool.analysis.valuation import (
+    VALUATION_EXPORT_FREQ,
+    format_valuation,
+    value_bag,
+)
+from bondstool.api import api
+from bondstool.budgets import register_memory_accounting
+from bondstool.config import (
+    ASSETS_FOLDER,
+    CACHE_DIR,
+    CHART_MAX_POINTS,
+    PRELOAD_UNIVERSE,
 )
 from bondstool.data.bag import (
-    format_bag,
-    get_payment_schedule,
+    BAG_HEADINGS,
+    SUMS_ROW_LABEL,
+    bag_positions,
+    fixed_rows_edited,
+    get_bag_views,
     merge_bonds_info,
+    position_edits,
     read_example_bag,
+    update_bag_views,
     verify_excel_file,
 )
-from bondstool.data.bonds import (
-    add_exchange_rates,
-    get_bonds_info,
-    get_exchange_rates,
-    get_recommended_bonds,
-    normalize_payments,
+from bondstool.data.consolidation import (
+    consolidate,
+    get_portfolio_views,
+)
+from bondstool.data.portfolios import (
+    list_portfolios,
+    load_portfolio_payloads,
+    save_portfolio,
+)
+from bondstool.data.screener import CATEGORY_COLUMNS, SCREENER_HEADINGS, screen_bonds
+from bondstool.data.snapshots import list_snapshots
+from bondstool.data.universe import (
+    current_universe,
+    preload_universe,
+    universe_as_of,
 )
 from bondstool.layout import (
+    AS_OF_DATE_LAYOUT,
     AUCTION_DATE_LABEL_LAYOUT,
     BAG_TABLE_LAYOUT,
+    BUDGET_WARNING_LAYOUT,
+    CONSOLIDATION_LAYOUT,
     DDC_STORE,
     DOWNLOAD_BUTTON_LAYOUT,
     DROPDOWN_LIST_LAYOUT,
+    FORECAST_HORIZONS,
+    FORECAST_OPTIONS,
+    FORECAST_OPTIONS_LAYOUT,
+    PORTFOLIO_STORE_LAYOUT,
     RECOMMENDED_LABEL_LAYOUT,
+    SAVED_PORTFOLIO_STORES,
     SCHEDULE_TABLE_LAYOUT,
-    TITLE_LAYOUT,
+    SCREENER_LAYOUT,
     UPLOAD_BUTTON_LAYOUT,
+    UPLOAD_PROGRESS_STYLE,
+    UPLOAD_STEPS,
     create_slider,
+    get_title_layout,
 )
+from bondstool.profiling import profile_callback, register_profiler
 from bondstool.utils import (
-    JSON_STORE_KWARGS,
+    LOGO_FILE,
     MAP_HEADINGS,
+    get_image_element,
     get_style_by_condition,
     get_xlsx,
     read_json,
+    to_store,
+)
+from dash import (
+    ALL,
+    Dash,
+    DiskcacheManager,
+    Input,
+    Output,
+    State,
+    callback,
+    ctx,
+    dash_table,
+    dcc,
+    html,
+    no_update,
 )
-from dash import ALL, Dash, Input, Output, State, callback, dash_table, dcc, html
 from dash.exceptions import PreventUpdate
 
-app = Dash(__name__)
+app = Dash(
+    __name__,
+    assets_folder=ASSETS_FOLDER,
+    background_callback_manager=DiskcacheManager(
+        diskcache.Cache(os.path.join(CACHE_DIR, "jobs"))
+    ),
+)
 server = app.server
+server.register_blueprint(api)
+register_profiler(server)
+register_memory_accounting(app)
+
+if PRELOAD_UNIVERSE:
+    preload_universe()
 
 
 app.layout = html.Div(
     [
         html.Div(id="dummy-trigger", style={"display": "none"}),
-        TITLE_LAYOUT,
+        get_title_layout(get_image_element(app, LOGO_FILE)),
+        BUDGET_WARNING_LAYOUT,
         UPLOAD_BUTTON_LAYOUT,
+        PORTFOLIO_STORE_LAYOUT,
+        AS_OF_DATE_LAYOUT,
         dcc.Graph(id="graph-with-slider"),
+        FORECAST_OPTIONS_LAYOUT,
         AUCTION_DATE_LABEL_LAYOUT,
         RECOMMENDED_LABEL_LAYOUT,
         html.Div(id="sliders"),
@@ -74,162 +150,507 @@ app.layout = html.Div(
         BAG_TABLE_LAYOUT,
         SCHEDULE_TABLE_LAYOUT,
         DOWNLOAD_BUTTON_LAYOUT,
+        CONSOLIDATION_LAYOUT,
+        SCREENER_LAYOUT,
         DDC_STORE,
     ]
 )
 
 
+def get_bag_payloads(bag: pd.DataFrame, bonds: pd.DataFrame, calendar=None, date=None):
+
+    views = get_bag_views(bag, bonds, calendar, date)
+
+    base_fig = make_base_monthly_payments_fig(views["monthly"])
+
+    return (
+        to_store(bag),
+        to_store(views["schedule"]),
+        to_store(views["formatted"]),
+        to_store(views["monthly"].reset_index()),
+        to_store(views["recommendations"]),
+        base_fig.to_json(),
+    )
+
+
 @callback(
     [
         Output("intermediate-bag", "data"),
+        Output("intermediate-payment-schedule", "data"),
+        Output("intermediate-formatted-bag", "data"),
+        Output("intermediate-monthly-bag", "data"),
+        Output("intermediate-recommended-bonds", "data"),
+        Output("intermediate-base-fig", "data"),
         Output("intermediate-raw-bonds", "data"),
         Output("intermediate-bonds", "data"),
         Output("intermediate-auc-date", "data"),
         Output("intermediate-isin-df", "data"),
         Output("intermediate-trading-bonds", "data"),
+        Output("intermediate-universe-version", "data"),
     ],
-    Input("dummy-trigger", "n_clicks"),
+    [Input("dummy-trigger", "n_clicks"), Input("as-of-date", "date")],
+    State("intermediate-bag", "data"),
+)
+def get_bag(n_clicks, as_of, bag_data):
+
+    try:
+        universe = universe_as_of(as_of)
+    except LookupError:
+        raise PreventUpdate
+
+    payloads = universe.store_payloads()
+
+    if bag_data is None:
+        bag = read_example_bag()
+    else:
+        bag = bag_positions(read_json(bag_data))
+
+    bag = merge_bonds_info(bag, index=universe.payment_index)
+
+    return (
+        *get_bag_payloads(bag, None, universe.calendar, as_of),
+        payloads["raw_bonds"],
+        payloads["bonds"],
+        universe.auc_date,
+        payloads["isin_df"],
+        payloads["trading_bonds"],
+        universe.version,
+    )
+
+
+@callback(
+    [
+        Output("intermediate-bag", "data", allow_duplicate=True),
+        Output("intermediate-payment-schedule", "data", allow_duplicate=True),
+        Output("intermediate-formatted-bag", "data", allow_duplicate=True),
+        Output("intermediate-monthly-bag", "data", allow_duplicate=True),
+        Output("intermediate-recommended-bonds", "data", allow_duplicate=True),
+        Output("intermediate-base-fig", "data", allow_duplicate=True),
+        Output("warning-label1", "style"),
+        Output("warning-label2", "style"),
+        Output("bag-header", "children"),
+        Output("schedule-header", "children"),
+    ],
+    Input("upload-data", "contents"),
+    [
+        State("upload-data", "filename"),
+        State("intermediate-bonds", "data"),
+        State("intermediate-universe-version", "data"),
+        State("as-of-date", "date"),
+    ],
+    background=True,
+    progress=[
+        Output("upload-progress", "value"),
+        Output("upload-progress", "max"),
+        Output("upload-status", "children"),
+    ],
+    running=[
+        (Output("upload-data", "disabled"), True, False),
+        (
+            Output("upload-progress", "style"),
+            UPLOAD_PROGRESS_STYLE,
+            {"display": "none"},
+        ),
+    ],
+    prevent_initial_call=True,
 )
-def get_bag(n_clicks):
+@profile_callback
+def update_data_and_objects(
+    set_progress, contents, filename, bonds_data, version, as_of
+):
+
+    if contents is None:
+        raise PreventUpdate
+
+    steps = len(UPLOAD_STEPS)
+
+    set_progress((0, steps, UPLOAD_STEPS[0]))
+
+    _, data = contents.split(",")
+
+    padding = "=" * (4 - (len(data) % 4))
+    decoded_data = base64.b64decode(data + padding)
 
-    exchange_rates = get_exchange_rates()
+    set_progress((1, steps, UPLOAD_STEPS[1]))
 
-    raw_bonds = get_bonds_info()
-    raw_bonds = add_exchange_rates(raw_bonds, exchange_rates)
+    bag = verify_excel_file(decoded_data)
+    bag = pd.DataFrame(bag)
+    bag = bag.rename(columns=BAG_HEADINGS)
 
-    bonds = normalize_payments(raw_bonds)
-    bonds = calculate_profitability(bonds)
+    set_progress((2, steps, UPLOAD_STEPS[2]))
+
+    universe = current_universe(version)
+
+    if universe is not None:
+        bonds, calendar = None, universe.calendar
+        bag = merge_bonds_info(bag, index=universe.payment_index)
+    else:
+        dates_columns = [
+            "month_end",
+            "maturity_date",
+            "pay_date",
+        ]
+        bonds, calendar = read_json(bonds_data, dates_columns), None
+        bag = merge_bonds_info(bag, bonds)
 
-    doc_url, auc_date = get_doc_url_date()
-    auc_date = str(auc_date)
+    set_progress((3, steps, UPLOAD_STEPS[3]))
 
-    isin_df = parse_xml_isins(get_auction_xml(doc_url))
+    payloads = get_bag_payloads(bag, bonds, calendar, as_of)
 
-    trading_bonds = filter_trading_bonds(isin_df, bonds)
+    set_progress((steps, steps, f"Файл {filename} оброблено"))
 
-    bag = read_example_bag()
-    bag = merge_bonds_info(bag, bonds)
+    bag_header = "Портфель облігацій"
+    schedule_header = "Графік платежів"
 
     return (
-        bag.to_json(**JSON_STORE_KWARGS),
-        raw_bonds.to_json(**JSON_STORE_KWARGS),
-        bonds.to_json(**JSON_STORE_KWARGS),
-        auc_date,
-        isin_df.to_json(**JSON_STORE_KWARGS),
-        trading_bonds.to_json(**JSON_STORE_KWARGS),
+        *payloads,
+        {"display": "none"},
+        {"display": "none"},
+        bag_header,
+        schedule_header,
     )
 
 
 @callback(
     [
-        Output("intermediate-payment-schedule", "data"),
-        Output("intermediate-formatted-bag", "data"),
-        Output("intermediate-monthly-bag", "data"),
+        *(
+            Output(store, "data", allow_duplicate=True)
+            for store in SAVED_PORTFOLIO_STORES
+        ),
+        Output("bag-table", "data", allow_duplicate=True),
+        Output("bag-edit-warning", "children"),
     ],
-    Input("intermediate-bag", "data"),
+    Input("bag-table", "data_timestamp"),
+    [
+        State("bag-table", "data"),
+        State("bag-table", "data_previous"),
+        *(State(store, "data") for store in SAVED_PORTFOLIO_STORES),
+        State("intermediate-bonds", "data"),
+        State("intermediate-universe-version", "data"),
+        State("as-of-date", "date"),
+    ],
+    prevent_initial_call=True,
 )
-def get_bag_derivatives(data):
+def edit_bag_positions(
+    timestamp,
+    rows,
+    previous_rows,
+    bag_data,
+    schedule_data,
+    formatted_data,
+    monthly_data,
+    recommended_data,
+    base_fig_data,
+    bonds_data,
+    version,
+    as_of,
+):
+
+    if not rows or not previous_rows or bag_data is None:
+        raise PreventUpdate
+
+    if fixed_rows_edited(rows, previous_rows):
+        return (
+            *(no_update for _ in SAVED_PORTFOLIO_STORES),
+            previous_rows,
+            "Рядок підсумків і порожній рядок не редагуються.",
+        )
 
-    dates_columns = ["pay_date", "month_end"]
-    bag = read_json(data, dates_columns)
+    edits = position_edits(rows, previous_rows)
 
-    if bag.empty:
+    if edits.empty:
         raise PreventUpdate
 
-    payment_schedule = get_payment_schedule(bag)
+    import plotly.io as pio
+
+    dates_columns = ["month_end", "maturity_date", "pay_date"]
 
-    formatted_bag = format_bag(bag)
+    views = {
+        "schedule": read_json(schedule_data),
+        "formatted": read_json(formatted_data),
+        "monthly": read_json(monthly_data, dates_columns, ["month_end"]),
+        "recommendations": read_json(recommended_data, dates_columns),
+    }
+    bag = read_json(bag_data, dates_columns)
 
-    monthly_bag = payments_by_month(bag)
-    monthly_bag = fill_missing_months(monthly_bag)
+    universe = current_universe(version)
 
-    monthly_bag.reset_index(inplace=True)
+    if universe is not None:
+        bonds, calendar = None, universe.calendar
+    else:
+        bonds, calendar = read_json(bonds_data, dates_columns), None
+
+    updated, months = update_bag_views(views, bag, edits, bonds, calendar, as_of)
+
+    base_fig = no_update
+    if "monthly" in updated:
+        base_fig = update_monthly_payments_fig(
+            pio.from_json(base_fig_data), updated["monthly"], months
+        ).to_json()
+        updated["monthly"] = updated["monthly"].reset_index()
 
     return (
-        payment_schedule.to_json(**JSON_STORE_KWARGS),
-        formatted_bag.to_json(**JSON_STORE_KWARGS),
-        monthly_bag.to_json(**JSON_STORE_KWARGS),
+        *(
+            to_store(updated[view]) if view in updated else no_update
+            for view in ["bag", "schedule", "formatted", "monthly", "recommendations"]
+        ),
+        base_fig,
+        no_update,
+        None,
     )
 
 
 @callback(
     [
-        Output("intermediate-recommended-bonds", "data"),
-        Output("intermediate-base-fig", "data"),
+        Output("saved-portfolios", "options"),
+        Output("consolidated-portfolios", "options"),
     ],
-    [Input("intermediate-monthly-bag", "data"), Input("intermediate-bonds", "data")],
+    [Input("dummy-trigger", "n_clicks"), Input("portfolio-status", "children")],
+)
+def get_saved_portfolios(n_clicks, status):
+
+    portfolios = list_portfolios()
+
+    options = [{"label": name, "value": name} for name in portfolios["name"]]
+
+    return options, options
+
+
+@callback(
+    [
+        Output("consolidation-graph", "figure"),
+        Output("consolidation-table", "columns"),
+        Output("consolidation-table", "data"),
+        Output("consolidation-schedule", "columns"),
+        Output("consolidation-schedule", "data"),
+        Output("consolidation-output", "style"),
+        Output("consolidation-status", "children"),
+    ],
+    Input("consolidated-portfolios", "value"),
+    State("as-of-date", "date"),
     prevent_initial_call=True,
 )
-def get_monthly_bag_derivatives(monthly_bag_data, bonds_data):
+def update_consolidation(names, as_of):
 
-    dates_columns = ["month_end", "maturity_date", "pay_date"]
-    index_column = ["month_end"]
+    if not names:
+        return {}, [], [], [], [], {"display": "none"}, ""
 
-    monthly_bag = read_json(monthly_bag_data, dates_columns, index_column)
-    bonds = read_json(bonds_data, dates_columns)
+    try:
+        universe = universe_as_of(as_of)
+        portfolios, dead = get_portfolio_views(names, universe)
+    except (KeyError, LookupError):
+        raise PreventUpdate
 
-    recommended_bonds = get_recommended_bonds(bonds, monthly_bag)
+    status = ""
+    if dead:
+        status = f"Портфелі без майбутніх платежів пропущено: {', '.join(dead)}"
 
-    base_fig = make_base_monthly_payments_fig(monthly_bag)
+    if not portfolios:
+        return {}, [], [], [], [], {"display": "none"}, status
 
-    return (
-        recommended_bonds.to_json(**JSON_STORE_KWARGS),
-        base_fig.to_json(),
+    consolidated = consolidate(portfolios)
+
+    fig = make_consolidation_fig(consolidated["monthly"], SUMS_ROW_LABEL)
+
+    summary = consolidated["summary"].reset_index().rename(columns=MAP_HEADINGS)
+    schedule = consolidated["schedule"]
+
+    tables = []
+    for df in (summary, schedule):
+        columns = [{"name": col, "id": col} for col in df.columns]
+        for cfg in columns[1:]:
+            if pd.api.types.is_float_dtype(df[cfg["id"]]):
+                cfg["type"] = "numeric"
+                cfg["format"] = {"specifier": ".2f"}
+
+        tables.extend([columns, df.to_dict("records")])
+
+    return (fig, *tables, {"display": "block"}, status)
+
+
+def stored_universe(version, as_of):
+    return current_universe(version) or universe_as_of(as_of)
+
+
+@callback(
+    [
+        Output("screener-currency", "options"),
+        Output("screener-type", "options"),
+        Output("screener-pay-period", "options"),
+    ],
+    Input("intermediate-universe-version", "data"),
+    State("as-of-date", "date"),
+    prevent_initial_call=True,
+)
+def get_screener_options(version, as_of):
+
+    try:
+        summary = stored_universe(version, as_of).screener.summary
+    except LookupError:
+        raise PreventUpdate
+
+    return tuple(
+        [
+            {"label": str(value), "value": value}
+            for value in sorted(summary[column].dropna().unique().tolist())
+        ]
+        for column in CATEGORY_COLUMNS
     )
 
 
-@app.callback(
+@callback(
     [
-        Output("intermediate-bag", "data", allow_duplicate=True),
-        Output("warning-label1", "style"),
-        Output("warning-label2", "style"),
-        Output("bag-header", "children"),
-        Output("schedule-header", "children"),
+        Output("screener-table", "columns"),
+        Output("screener-table", "data"),
+    ],
+    [
+        Input("intermediate-universe-version", "data"),
+        Input("screener-currency", "value"),
+        Input("screener-type", "value"),
+        Input("screener-pay-period", "value"),
+        Input("screener-maturity", "start_date"),
+        Input("screener-maturity", "end_date"),
+        Input("screener-min-profitability", "value"),
+        Input("screener-max-profitability", "value"),
+        Input("screener-auction", "value"),
+        Input("screener-sort", "value"),
+        Input("screener-order", "value"),
     ],
-    [Input("upload-data", "contents"), Input("intermediate-bonds", "data")],
-    [State("upload-data", "filename")],
+    State("as-of-date", "date"),
     prevent_initial_call=True,
 )
-def update_data_and_objects(contents, bonds_data, filename):
+def update_screener(
+    version,
+    currencies,
+    types,
+    pay_periods,
+    maturity_from,
+    maturity_to,
+    min_profitability,
+    max_profitability,
+    auction,
+    sort_by,
+    order,
+    as_of,
+):
 
-    if contents is None:
+    try:
+        bonds = screen_bonds(
+            stored_universe(version, as_of).screener,
+            currencies=currencies,
+            types=types,
+            pay_periods=pay_periods,
+            maturity_from=maturity_from,
+            maturity_to=maturity_to,
+            min_profitability=min_profitability,
+            max_profitability=max_profitability,
+            on_auction=True if auction else None,
+            sort_by=sort_by,
+            descending=order == "desc",
+        )
+    except LookupError:
         raise PreventUpdate
 
-    dates_columns = [
-        "month_end",
-        "maturity_date",
-        "pay_date",
-    ]
-    bonds = read_json(bonds_data, dates_columns)
+    for column in ["maturity_date", "next_pay_date"]:
+        bonds[column] = bonds[column].dt.strftime("%d-%m-%Y")
 
-    _, data = contents.split(",")
+    bonds["on_auction"] = bonds["on_auction"].map({True: "Так", False: "Ні"})
+    bonds = bonds.rename(columns={**MAP_HEADINGS, **SCREENER_HEADINGS})
 
-    padding = "=" * (4 - (len(data) % 4))
-    decoded_data = base64.b64decode(data + padding)
+    columns = [{"name": col, "id": col} for col in bonds.columns]
+    for cfg in columns:
+        if pd.api.types.is_float_dtype(bonds[cfg["id"]]):
+            cfg["type"] = "numeric"
+            cfg["format"] = {"specifier": ".2f"}
 
-    bag = verify_excel_file(decoded_data)
-    bag = pd.DataFrame(bag)
-    map_headings = {
-        "Кілть в портфелі": "quantity",
-        "Загальна сума придбання": "expenditure",
-        "Податок на прибуток ЮО (ПнПр)": "tax",
-    }
+    return columns, bonds.to_dict("records")
 
-    bag = bag.rename(columns=map_headings)
-    bag = merge_bonds_info(bag, bonds)
 
-    bag_header = "Портфель облігацій"
-    schedule_header = "Графік платежів"
+@callback(
+    Output("portfolio-status", "children"),
+    Input("save-portfolio", "n_clicks"),
+    [
+        State("portfolio-name", "value"),
+        State("intermediate-bag", "data"),
+        State("intermediate-payment-schedule", "data"),
+        State("intermediate-formatted-bag", "data"),
+        State("intermediate-monthly-bag", "data"),
+        State("intermediate-recommended-bonds", "data"),
+        State("intermediate-base-fig", "data"),
+        State("intermediate-universe-version", "data"),
+    ],
+    prevent_initial_call=True,
+)
+def save_current_portfolio(n_clicks, name, bag_data, *payloads_and_version):
+
+    if not name:
+        return "Введіть назву портфеля"
+
+    *payloads, version = payloads_and_version
+
+    if bag_data is None or any(payload is None for payload in payloads):
+        raise PreventUpdate
+
+    bag = read_json(bag_data, ["pay_date", "month_end"])
+
+    save_portfolio(
+        name, bag, dict(zip(SAVED_PORTFOLIO_STORES, [bag_data, *payloads])), version
+    )
+
+    return f"Портфель {name} збережено"
+
+
+@callback(
+    [
+        Output("intermediate-bag", "data", allow_duplicate=True),
+        Output("intermediate-payment-schedule", "data", allow_duplicate=True),
+        Output("intermediate-formatted-bag", "data", allow_duplicate=True),
+        Output("intermediate-monthly-bag", "data", allow_duplicate=True),
+        Output("intermediate-recommended-bonds", "data", allow_duplicate=True),
+        Output("intermediate-base-fig", "data", allow_duplicate=True),
+        Output("warning-label1", "style", allow_duplicate=True),
+        Output("warning-label2", "style", allow_duplicate=True),
+        Output("bag-header", "children", allow_duplicate=True),
+        Output("schedule-header", "children", allow_duplicate=True),
+    ],
+    Input("open-portfolio", "n_clicks"),
+    State("saved-portfolios", "value"),
+    prevent_initial_call=True,
+)
+def open_saved_portfolio(n_clicks, name):
+
+    if not name:
+        raise PreventUpdate
+
+    payloads = load_portfolio_payloads(name)
 
     return (
-        bag.to_json(**JSON_STORE_KWARGS),
+        *(payloads[store] for store in SAVED_PORTFOLIO_STORES),
         {"display": "none"},
         {"display": "none"},
-        bag_header,
-        schedule_header,
+        f"Портфель облігацій: {name}",
+        "Графік платежів",
     )
 
 
+@callback(
+    [
+        Output("as-of-date", "min_date_allowed"),
+        Output("as-of-date", "max_date_allowed"),
+    ],
+    Input("dummy-trigger", "n_clicks"),
+)
+def get_as_of_range(n_clicks):
+
+    snapshots = list_snapshots()
+    today = pd.Timestamp.today().date()
+
+    if snapshots.empty:
+        return today, today
+
+    return snapshots["date"].min().date(), today
+
+
 @callback(Output("auction-label", "children"), Input("intermediate-auc-date", "data"))
 def get_auction_header(auc_date):
 
@@ -284,35 +705,153 @@ def get_sliders(recommended_data, isin_df_data):
         Input("intermediate-trading-bonds", "data"),
         Input("intermediate-isin-df", "data"),
         Input({"type": "isin_slider", "index": ALL}, "value"),
+        Input("forecast-options", "value"),
+        Input("intermediate-bag", "data"),
+        Input("horizon", "value"),
+        Input("chart-mode", "value"),
+        Input("graph-with-slider", "relayoutData"),
+    ],
+    [
+        State("intermediate-universe-version", "data"),
+        State("as-of-date", "date"),
     ],
     prevent_initial_call=True,
 )
 def update_figure(
-    base_fig_data, monthly_bag_data, trading_bonds_data, isin_df_data, amounts
+    base_fig_data,
+    monthly_bag_data,
+    trading_bonds_data,
+    isin_df_data,
+    amounts,
+    forecast_options,
+    bag_data,
+    horizon,
+    chart_mode,
+    relayout_data,
+    version,
+    as_of,
 ):
 
     if not amounts:
         raise PreventUpdate
 
+    horizon = horizon or "M"
+    x_range = visible_range(relayout_data)
+
+    if ctx.triggered_id == "graph-with-slider":
+        zoomed = x_range is not None or "xaxis.autorange" in (relayout_data or {})
+        if chart_mode not in ("webgl", "stacked") or not zoomed:
+            raise PreventUpdate
+
+    import plotly.io as pio
+
     dates_columns = ["month_end", "maturity_date", "pay_date"]
     index_column = ["month_end"]
 
-    base_fig = pio.from_json(base_fig_data)
-    monthly_bag = read_json(monthly_bag_data, dates_columns, index_column)
     trading_bonds = read_json(trading_bonds_data, dates_columns)
     isin_df = read_json(isin_df_data)
 
-    potential_payments = calc_potential_payments(
-        trading_bonds, amounts, monthly_bag, isin_df
-    )
+    forecast_options = forecast_options or []
+    if horizon not in FORECAST_HORIZONS:
+        forecast_options = []
+
+    # the stacked chart may coarsen the horizon to fit the points budget
+    freq = horizon
+
+    if chart_mode == "stacked":
+        bag = read_json(bag_data, dates_columns)
+        bag_payments, contributions = aggregate_contributions(
+            bag,
+            trading_bonds,
+            amounts,
+            isin_df["ISIN"],
+            freq=horizon,
+            version=version,
+        )
 
-    fig = plot_potential_payments(base_fig, potential_payments, monthly_bag)
+        fig, freq = plot_isin_contributions(
+            bag_payments, contributions, CHART_MAX_POINTS, x_range, horizon
+        )
+        potential_payments = bag_payments.assign(
+            total_pay_val=bag_payments["total_pay_val"] + contributions.sum(axis=1)
+        )
+        if freq != horizon:
+            potential_payments = period_totals(potential_payments, freq)
+
+    elif horizon != "M" or chart_mode == "webgl":
+        bag = read_json(bag_data, dates_columns)
+        bag_payments, potential_payments = aggregate_payments(
+            bag,
+            trading_bonds,
+            amounts,
+            isin_df["ISIN"],
+            freq=horizon,
+            version=version,
+        )
+
+        if chart_mode == "webgl":
+            fig = plot_payments_gl(
+                bag_payments, potential_payments, CHART_MAX_POINTS, x_range
+            )
+        else:
+            base_fig = make_base_monthly_payments_fig(bag_payments)
+            fig = plot_potential_payments(base_fig, potential_payments, bag_payments)
+            fig.update_layout(transition_duration=500)
+
+    else:
+        base_fig = pio.from_json(base_fig_data)
+        monthly_bag = read_json(monthly_bag_data, dates_columns, index_column)
+
+        potential_payments = calc_potential_payments(
+            trading_bonds, amounts, monthly_bag, isin_df
+        )
+
+        fig = plot_potential_payments(base_fig, potential_payments, monthly_bag)
+        fig.update_layout(transition_duration=500)
+
+    if "fx" in forecast_options:
+        try:
+            universe = stored_universe(version, as_of)
+        except LookupError:
+            raise PreventUpdate
+
+        bag = read_json(bag_data, dates_columns)
+        bands = get_fx_bands(
+            bag,
+            date=universe.as_of,
+            spot=exchange_rate_spot(universe.attributes),
+            freq=freq,
+        )
+        fig = add_fx_bands(fig, bands.reindex(potential_payments.index, fill_value=0.0))
+
+    if "reinvest" in forecast_options:
+        monthly_payments = potential_payments["total_pay_val"]
+        if freq != "M" or chart_mode == "stacked":
+            _, monthly_payments = aggregate_payments(
+                bag, trading_bonds, amounts, isin_df["ISIN"], version=version
+            )
+            monthly_payments = monthly_payments["total_pay_val"]
+
+        projection, _ = project_reinvestment(monthly_payments, trading_bonds)
+        if freq != "M":
+            projection = period_totals(projection, freq)
 
-    fig.update_layout(transition_duration=500)
+        fig = add_reinvestment_projection(fig, projection)
 
     return fig
 
 
+@callback(
+    Output("forecast-options", "options"),
+    Input("horizon", "value"),
+)
+def update_forecast_options(horizon):
+    return [
+        {**option, "disabled": horizon not in FORECAST_HORIZONS}
+        for option in FORECAST_OPTIONS
+    ]
+
+
 @callback(
     Output("search-output", "children"),
     [
@@ -410,17 +949,31 @@ def get_bag_table(data):
         "Прибутковість, %",
     ]
 
+    editable_columns = [MAP_HEADINGS[column] for column in BAG_HEADINGS.values()]
+
     columns = []
     for col in formatted_bag.columns:
         cfg = {"name": col, "id": col}
         if col in cols_to_round:
             cfg["type"] = "numeric"
             cfg["format"] = {"specifier": ".2f"}
+        if col in editable_columns:
+            cfg["type"] = "numeric"
+            cfg["editable"] = True
+            cfg["on_change"] = {"action": "coerce", "failure": "reject"}
 
         columns.append(cfg)
 
     table_data = formatted_bag.to_dict("records")
-    style_data_conditional = get_style_by_condition(formatted_bag)
+    style_data_conditional = get_style_by_condition(formatted_bag) + [
+        {
+            "if": {
+                "filter_query": f'{{ISIN}} = "{SUMS_ROW_LABEL}" || {{ISIN}} is blank'
+            },
+            "fontWeight": "bold",
+            "cursor": "not-allowed",
+        }
+    ]
 
     return columns, table_data, style_data_conditional
 
@@ -459,9 +1012,16 @@ def get_schedule_table(data):
         Input("intermediate-formatted-bag", "data"),
         Input("intermediate-payment-schedule", "data"),
     ],
+    [
+        State("intermediate-bag", "data"),
+        State("intermediate-universe-version", "data"),
+        State("as-of-date", "date"),
+    ],
     prevent_initial_call=True,
 )
-def download_xlsx(n_clicks, formatted_bag_data, payment_schedule_data):
+def download_xlsx(
+    n_clicks, formatted_bag_data, payment_schedule_data, bag_data, version, as_of
+):
     if n_clicks is None:
         return None
 
@@ -473,7 +1033,21 @@ def download_xlsx(n_clicks, formatted_bag_data, payment_schedule_data):
     formatted_bag = read_json(formatted_bag_data, dates_columns)
     payment_schedule = read_json(payment_schedule_data, dates_columns)
 
-    xlsx_bytes = get_xlsx(formatted_bag, payment_schedule)
+    valuation = None
+    if bag_data is not None:
+        bag = read_json(bag_data, ["pay_date", "month_end"])
+        try:
+            attributes = stored_universe(version, as_of).attributes
+        except LookupError:
+            # the bonds of the shown bag are gone, export it without valuation
+            attributes = None
+
+        if attributes is not None:
+            valuation = format_valuation(
+                value_bag(bag, attributes, as_of, freq=VALUATION_EXPORT_FREQ)
+            )
+
+    xlsx_bytes = get_xlsx(formatted_bag, payment_schedule, valuation)
 
     return dcc.send_bytes(xlsx_bytes, "OVDP_analysis.xlsx")
 
@@ -0,0 +1,303 @@
+import functools
+import heapq
+import itertools
+import json
+import logging
+import threading
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+from bondstool.config import (
+    CALLBACK_MEMORY_BUDGET_MB,
+    MEMORY_REPORT_SIZE,
+    MEMORY_SAMPLE_EVERY,
+    REQUEST_BUDGET_KB,
+    STORE_BUDGET_KB,
+)
+from bondstool.layout import BUDGET_WARNING_STYLE, STORE_IDS
+from bondstool.profiling import CALLBACK_PATH
+from dash import Input, Output, State
+from flask import g, request
+
+BUDGET_CHECKS_ID = "budget-checks"
+BUDGET_WARNINGS_ID = "budget-warnings"
+BUDGET_WARNING_ID = "budget-warning"
+
+BUDGET_WARNING_PREFIX = "Перевищено ліміти пам'яті сесії: "
+
+KB = 1024
+MB = 1024 * KB
+
+BUDGETS = {
+    "store": STORE_BUDGET_KB * KB,
+    "request": REQUEST_BUDGET_KB * KB,
+    "memory": CALLBACK_MEMORY_BUDGET_MB * MB,
+}
+
+BUDGET_LABELS = {
+    "store": "сховище",
+    "request": "дані запиту",
+    "memory": "пам'ять колбека",
+}
+
+logger = logging.getLogger(__name__)
+
+_CALLBACK_COUNTER = itertools.count(1)
+_SEQUENCE = itertools.count()
+_TRACE_LOCK = threading.Lock()
+_WORST = {kind: [] for kind in BUDGETS}
+_WORST_LOCK = threading.Lock()
+_WARNED = set()
+
+
+def payload_size(value):
+
+    if isinstance(value, str):
+        return len(value.encode())
+
+    return len(json.dumps(value).encode())
+
+
+def flat_callback_args(args):
+
+    for arg in args:
+        if isinstance(arg, list):
+            yield from flat_callback_args(arg)
+        else:
+            yield arg
+
+
+def output_stores(body: dict, store_ids=STORE_IDS):
+
+    outputs = body.get("outputs", [])
+    if isinstance(outputs, dict):
+        outputs = [outputs]
+
+    return [
+        output["id"]
+        for output in flat_callback_args(outputs)
+        if output.get("id") in store_ids
+    ]
+
+
+def sent_store_sizes(payload: dict, store_ids=STORE_IDS):
+    return {
+        store: payload_size(props["data"])
+        for store, props in payload.get("response", {}).items()
+        if store in store_ids and props.get("data") is not None
+    }
+
+
+def format_size(size):
+    return f"{size / MB:.1f} MB" if size >= MB else f"{size / KB:.0f} KB"
+
+
+def record_usage(kind, name, size, callback):
+
+    entry = (size, next(_SEQUENCE), name, callback, datetime.now())
+
+    with _WORST_LOCK:
+        worst = _WORST[kind]
+        if len(worst) < MEMORY_REPORT_SIZE:
+            heapq.heappush(worst, entry)
+        else:
+            heapq.heappushpop(worst, entry)
+
+    if size <= BUDGETS[kind]:
+        return None
+
+    logger.warning(
+        "%s budget exceeded by %s in %s: %s (budget %s)",
+        kind,
+        name,
+        callback,
+        format_size(size),
+        format_size(BUDGETS[kind]),
+    )
+
+    return (
+        f"{BUDGET_LABELS[kind]} {name} - {format_size(size)} "
+        f"(ліміт {format_size(BUDGETS[kind])})"
+    )
+
+
+def check_budgets(callback, request_size, sent, peak=None):
+
+    usages = [("store", store, size) for store, size in sent.items()]
+
+    if request_size:
+        usages.append(("request", callback, request_size))
+
+    if peak is not None:
+        usages.append(("memory", callback, peak))
+
+    return {
+        f"{kind}:{name}": record_usage(kind, name, size, callback)
+        for kind, name, size in usages
+    }
+
+
+def changed_checks(checks: dict):
+
+    # only keys that have been over budget can hold a warning in a browser
+    with _WORST_LOCK:
+        _WARNED.update(key for key, message in checks.items() if message)
+
+        return {key: message for key, message in checks.items() if key in _WARNED}
+
+
+def memory_report():
+
+    with _WORST_LOCK:
+        rows = [
+            {
+                "kind": kind,
+                "name": name,
+                "callback": callback,
+                "bytes": size,
+                "budget": BUDGETS[kind],
+                "over_budget": size > BUDGETS[kind],
+                "at": at,
+            }
+            for kind, worst in _WORST.items()
+            for size, _, name, callback, at in sorted(worst, reverse=True)
+        ]
+
+    return pd.DataFrame(
+        rows,
+        columns=["kind", "name", "callback", "bytes", "budget", "over_budget", "at"],
+    )
+
+
+def clear_memory_report():
+    with _WORST_LOCK:
+        for worst in _WORST.values():
+            worst.clear()
+        _WARNED.clear()
+
+
+def start_memory_trace():
+
+    if request.path != CALLBACK_PATH or not tracemalloc.is_tracing():
+        return
+
+    if MEMORY_SAMPLE_EVERY <= 0 or next(_CALLBACK_COUNTER) % MEMORY_SAMPLE_EVERY:
+        return
+
+    # the peak is process wide, so only one callback is measured at a time
+    if not _TRACE_LOCK.acquire(blocking=False):
+        return
+
+    tracemalloc.reset_peak()
+    g.memory_baseline = tracemalloc.get_traced_memory()[0]
+
+
+def stop_memory_trace():
+
+    baseline = g.pop("memory_baseline", None)
+
+    if baseline is None:
+        return None
+
+    _, peak = tracemalloc.get_traced_memory()
+    _TRACE_LOCK.release()
+
+    return max(peak - baseline, 0)
+
+
+def callback_name(app, output):
+    callback = app.callback_map.get(output, {}).get("callback")
+    return getattr(callback, "__name__", output)
+
+
+def finish_request_accounting(app, response):
+
+    peak = stop_memory_trace()
+
+    if request.path != CALLBACK_PATH:
+        return response
+
+    body = request.get_json(silent=True) or {}
+    callback = callback_name(app, body.get("output", "callback"))
+
+    if (
+        response.status_code != 200
+        or response.mimetype != "application/json"
+        or response.content_encoding
+    ):
+        if peak is not None:
+            check_budgets(callback, 0, {}, peak)
+        return response
+
+    data = response.get_data()
+    request_size = (request.content_length or 0) + len(data)
+
+    # a store can only exceed its budget if the whole response does
+    if len(data) > BUDGETS["store"]:
+        payload = json.loads(data)
+        checks = check_budgets(callback, request_size, sent_store_sizes(payload), peak)
+    else:
+        payload = None
+        checks = {f"store:{store}": None for store in output_stores(body)}
+        checks.update(check_budgets(callback, request_size, {}, peak))
+
+    updates = changed_checks(checks)
+
+    if updates:
+        payload = payload or json.loads(data)
+        payload.setdefault("sideUpdate", {})[BUDGET_CHECKS_ID] = {"data": updates}
+        response.set_data(json.dumps(payload))
+
+    return response
+
+
+def release_memory_trace(error=None):
+    stop_memory_trace()
+
+
+# a warning stays until the same store, request or callback passes a later check
+MERGE_BUDGET_CHECKS = """
+function(checks, warnings) {
+    warnings = Object.assign({}, warnings);
+    for (const [key, message] of Object.entries(checks || {})) {
+        if (message) {
+            warnings[key] = message;
+        } else {
+            delete warnings[key];
+        }
+    }
+    const messages = Object.values(warnings);
+    if (!messages.length) {
+        return [warnings, null, {"display": "none"}];
+    }
+    return [warnings, %s + messages.join("; "), %s];
+}
+""" % (
+    json.dumps(BUDGET_WARNING_PREFIX, ensure_ascii=False),
+    json.dumps(BUDGET_WARNING_STYLE),
+)
+
+
+def register_memory_accounting(app):
+
+    # stopping tracemalloc while other threads allocate is unsafe, so tracing
+    # runs for the whole life of the process once sampling is enabled
+    if MEMORY_SAMPLE_EVERY > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    app.server.before_request(start_memory_trace)
+    app.server.after_request(functools.partial(finish_request_accounting, app))
+    app.server.teardown_request(release_memory_trace)
+
+    app.clientside_callback(
+        MERGE_BUDGET_CHECKS,
+        [
+            Output(BUDGET_WARNINGS_ID, "data"),
+            Output(BUDGET_WARNING_ID, "children"),
+            Output(BUDGET_WARNING_ID, "style"),
+        ],
+        Input(BUDGET_CHECKS_ID, "data"),
+        State(BUDGET_WARNINGS_ID, "data"),
+        prevent_initial_call=True,
+    )
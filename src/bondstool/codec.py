@@ -0,0 +1,256 @@
+import base64
+import datetime
+import json
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+STORE_PREFIX = "bt1:"
+STORE_COMPRESSION_LEVEL = 6
+
+HEADER_SIZE = struct.Struct("<I")
+
+TYPE_TAG = "__bt__"
+
+
+def is_binary_store(data):
+    return isinstance(data, str) and data.startswith(STORE_PREFIX)
+
+
+def encode_value(value):
+
+    if isinstance(value, pd.Timestamp):
+        return {TYPE_TAG: "timestamp", "value": value.isoformat()}
+
+    if isinstance(value, datetime.datetime):
+        return {TYPE_TAG: "datetime", "value": value.isoformat()}
+
+    if isinstance(value, datetime.date):
+        return {TYPE_TAG: "date", "value": value.isoformat()}
+
+    if isinstance(value, pd.Timedelta):
+        return {TYPE_TAG: "timedelta", "value": value.value}
+
+    if isinstance(value, np.generic) and value.dtype.kind in "biufcmM":
+        if value.dtype.kind in "mM":
+            item = value.astype(np.int64).item()
+        else:
+            item = value.item()
+        return {TYPE_TAG: "numpy", "dtype": value.dtype.str, "value": item}
+
+    raise TypeError(f"Cannot encode {type(value).__name__} values in a store.")
+
+
+def decode_value(spec: dict):
+
+    kind = spec.get(TYPE_TAG)
+
+    if kind == "timestamp":
+        return pd.Timestamp(spec["value"])
+
+    if kind == "datetime":
+        return datetime.datetime.fromisoformat(spec["value"])
+
+    if kind == "date":
+        return datetime.date.fromisoformat(spec["value"])
+
+    if kind == "timedelta":
+        return pd.Timedelta(spec["value"])
+
+    if kind == "numpy":
+        dtype = np.dtype(spec["dtype"])
+        if dtype.kind in "mM":
+            return np.int64(spec["value"]).view(dtype)
+        return dtype.type(spec["value"])
+
+    return spec
+
+
+def object_values(series: pd.Series):
+    values = series.to_numpy(dtype=object, copy=True)
+    values[pd.isna(values)] = None
+
+    return values.tolist()
+
+
+def encode_array(series: pd.Series, buffers: list):
+
+    dtype = series.dtype
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        categories = pd.Series(dtype.categories)
+        spec = {
+            "kind": "category",
+            "ordered": bool(dtype.ordered),
+            "codes": encode_array(pd.Series(codes), buffers),
+            "categories": encode_array(categories, buffers),
+        }
+        return spec
+
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        naive = series.dt.tz_convert("UTC").dt.tz_localize(None)
+        spec = encode_array(naive, buffers)
+        spec["tz"] = str(dtype.tz)
+        return spec
+
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        values = np.ascontiguousarray(series.to_numpy())
+        buffers.append(values.tobytes())
+        return {"kind": "numpy", "dtype": values.dtype.str, "size": values.nbytes}
+
+    if pd.api.types.infer_dtype(series, skipna=True) == "datetime":
+        try:
+            converted = pd.to_datetime(series)
+        except (TypeError, ValueError):
+            converted = series
+
+        if converted.dtype.kind == "M":
+            spec = encode_array(converted, buffers)
+            spec["object"] = True
+            return spec
+
+    return {"kind": "object", "dtype": str(dtype), "values": object_values(series)}
+
+
+def decode_array(spec: dict, payload: memoryview, offset: int):
+
+    kind = spec["kind"]
+
+    if kind == "category":
+        codes, offset = decode_array(spec["codes"], payload, offset)
+        categories, offset = decode_array(spec["categories"], payload, offset)
+        values = pd.Categorical.from_codes(
+            codes, categories=categories, ordered=spec["ordered"]
+        )
+        return values, offset
+
+    if kind == "numpy":
+        size = spec["size"]
+        values = np.frombuffer(payload[offset : offset + size], dtype=spec["dtype"])
+        offset += size
+
+        if "tz" in spec:
+            values = pd.DatetimeIndex(values).tz_localize("UTC").tz_convert(spec["tz"])
+
+        return values, offset
+
+    values = pd.array(spec["values"], dtype=object)
+
+    if spec["dtype"] != "object":
+        values = pd.Series(values).astype(spec["dtype"]).array
+
+    return values, offset
+
+
+def index_values(index: pd.Index):
+    return pd.Series(index, dtype=index.dtype)
+
+
+def encode_index(index: pd.Index, buffers: list):
+
+    if isinstance(index, pd.RangeIndex):
+        return {
+            "kind": "range",
+            "start": index.start,
+            "stop": index.stop,
+            "step": index.step,
+        }
+
+    if isinstance(index, pd.MultiIndex):
+        return {
+            "kind": "multi",
+            "levels": [
+                encode_array(index_values(index.get_level_values(level)), buffers)
+                for level in range(index.nlevels)
+            ],
+            "names": list(index.names),
+        }
+
+    return encode_array(index_values(index), buffers)
+
+
+def decode_index(spec: dict, name, payload: memoryview, offset: int):
+
+    if spec["kind"] == "range":
+        index = pd.RangeIndex(spec["start"], spec["stop"], spec["step"])
+
+    elif spec["kind"] == "multi":
+        levels = []
+        for level in spec["levels"]:
+            values, offset = decode_array(level, payload, offset)
+            levels.append(values)
+        return pd.MultiIndex.from_arrays(levels, names=spec["names"]), offset
+
+    else:
+        index, offset = decode_array(spec, payload, offset)
+        index = pd.Index(index, dtype=object if spec.get("object") else None)
+
+    index.name = name
+
+    return index, offset
+
+
+def encode_frame(df: pd.DataFrame, level=STORE_COMPRESSION_LEVEL):
+
+    buffers = []
+
+    if isinstance(df.columns, pd.MultiIndex):
+        columns = {
+            "labels": [list(labels) for labels in df.columns],
+            "names": list(df.columns.names),
+        }
+    else:
+        columns = list(df.columns)
+
+    header = {
+        "columns": columns,
+        "columns_name": df.columns.name,
+        "index": encode_index(df.index, buffers),
+        "index_name": df.index.name,
+        "arrays": [encode_array(df.iloc[:, i], buffers) for i in range(df.shape[1])],
+    }
+    header = json.dumps(header, ensure_ascii=False, default=encode_value).encode()
+
+    payload = HEADER_SIZE.pack(len(header)) + header + b"".join(buffers)
+    payload = zlib.compress(payload, level)
+
+    return STORE_PREFIX + base64.b64encode(payload).decode("ascii")
+
+
+def decode_frame(data: str):
+
+    payload = bytearray(zlib.decompress(base64.b64decode(data[len(STORE_PREFIX) :])))
+    payload = memoryview(payload)
+
+    (header_size,) = HEADER_SIZE.unpack_from(payload)
+    offset = HEADER_SIZE.size + header_size
+    header = json.loads(
+        bytes(payload[HEADER_SIZE.size : offset]), object_hook=decode_value
+    )
+
+    index, offset = decode_index(header["index"], header["index_name"], payload, offset)
+
+    columns = {}
+    for position, spec in enumerate(header["arrays"]):
+        columns[position], offset = decode_array(spec, payload, offset)
+
+    df = pd.DataFrame(columns, index=index, copy=False)
+
+    # datetimes of object columns are stored as datetime64 to keep them compact
+    for position, spec in enumerate(header["arrays"]):
+        if spec.get("object"):
+            df.isetitem(position, df.iloc[:, position].astype(object))
+
+    if isinstance(header["columns"], dict):
+        df.columns = pd.MultiIndex.from_tuples(
+            [tuple(labels) for labels in header["columns"]["labels"]],
+            names=header["columns"]["names"],
+        )
+    else:
+        df.columns = header["columns"]
+        df.columns.name = header.get("columns_name")
+
+    return df
@@ -0,0 +1,56 @@
+import os
+
+
+def env_flag(name, default=False):
+    value = os.environ.get(name)
+
+    if value is None:
+        return default
+
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name, default):
+    value = os.environ.get(name)
+
+    return int(value) if value else default
+
+
+ASSETS_FOLDER = os.path.abspath(os.environ.get("BONDSTOOL_ASSETS", "assets"))
+CACHE_DIR = os.path.abspath(os.environ.get("BONDSTOOL_CACHE_DIR", ".cache"))
+DATA_DIR = os.path.abspath(os.environ.get("BONDSTOOL_DATA_DIR", ".bondstool"))
+
+PORTFOLIO_DB_PATH = os.environ.get(
+    "BONDSTOOL_PORTFOLIO_DB", os.path.join(DATA_DIR, "portfolios.sqlite")
+)
+PORTFOLIO_CACHE_SIZE = env_int("BONDSTOOL_PORTFOLIO_CACHE_SIZE", 32)
+
+SNAPSHOT_DB_PATH = os.environ.get(
+    "BONDSTOOL_SNAPSHOT_DB", os.path.join(DATA_DIR, "snapshots.sqlite")
+)
+SAVE_SNAPSHOTS = env_flag("BONDSTOOL_SNAPSHOTS", True)
+SNAPSHOT_CACHE_SIZE = env_int("BONDSTOOL_SNAPSHOT_CACHE_SIZE", 4)
+
+PROFILE_CALLBACKS = env_flag("BONDSTOOL_PROFILE")
+PROFILE_TOKEN = os.environ.get("BONDSTOOL_PROFILE_TOKEN")
+PROFILE_DIR = os.path.abspath(
+    os.environ.get("BONDSTOOL_PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+)
+PROFILE_INTERVAL_MS = env_int("BONDSTOOL_PROFILE_INTERVAL_MS", 5)
+
+STORE_BUDGET_KB = env_int("BONDSTOOL_STORE_BUDGET_KB", 2048)
+REQUEST_BUDGET_KB = env_int("BONDSTOOL_REQUEST_BUDGET_KB", 8192)
+CALLBACK_MEMORY_BUDGET_MB = env_int("BONDSTOOL_CALLBACK_MEMORY_BUDGET_MB", 256)
+MEMORY_SAMPLE_EVERY = env_int("BONDSTOOL_MEMORY_SAMPLE_EVERY", 0)
+MEMORY_REPORT_SIZE = env_int("BONDSTOOL_MEMORY_REPORT_SIZE", 10)
+
+MEMO_SIZE = env_int("BONDSTOOL_MEMO_SIZE", 128)
+MEMO_MAX_MB = env_int("BONDSTOOL_MEMO_MAX_MB", 64)
+CHART_MAX_POINTS = env_int("BONDSTOOL_CHART_MAX_POINTS", 500)
+VALUATION_MAX_DATES = env_int("BONDSTOOL_VALUATION_MAX_DATES", 5000)
+SCENARIO_MAX_GRID = env_int("BONDSTOOL_SCENARIO_MAX_GRID", 100000)
+
+STORE_CODEC = os.environ.get("BONDSTOOL_STORE_CODEC", "binary").strip().lower()
+
+PRELOAD_UNIVERSE = env_flag("BONDSTOOL_PRELOAD")
+UNIVERSE_TTL = env_int("BONDSTOOL_UNIVERSE_TTL", 900)
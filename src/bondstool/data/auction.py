@@ -4,20 +4,22 @@ from xml.etree.cElementTree import XML, Element
 
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
+from bondstool.data.singleflight import single_flight
 
 AUC_DOMAIN = "https://mof.gov.ua"
 AUC_URL = AUC_DOMAIN + "/uk/ogoloshennja-ta-rezultati-aukcioniv"
 ISIN_PREFIX = "UA4000"
 
 
+@single_flight
 def get_doc_url_date():
+    from bs4 import BeautifulSoup
 
     resp = requests.get(AUC_URL)
 
     soup = BeautifulSoup(resp.text, features="html.parser")
 
-    auc_date = soup.table.select("td")[0].contents[0]
+    auc_date = str(soup.table.select("td")[0].contents[0])
 
     doc_path = soup.table.select('a[href*=".docx"]')[0]["href"]
 
@@ -26,6 +28,7 @@ def get_doc_url_date():
     return doc_url, auc_date
 
 
+@single_flight
 def get_auction_xml(url):
 
     resp = requests.get(url)
@@ -1,32 +1,59 @@
+import functools
 import io
+import os
 
 import numpy as np
 import pandas as pd
-from bondstool.utils import MAP_HEADINGS, split_dataframe
+from bondstool.analysis.utils import fill_missing_months, payments_by_month
+from bondstool.data.bonds import get_recommended_bonds
+from bondstool.memo import memoize
+from bondstool.utils import MAP_HEADINGS, split_dataframe, truncate_past_dates
 
 EXAMPLE_BAG_PATH = "assets/example_bag.xlsx"
 
+BAG_HEADINGS = {
+    "Кілть в портфелі": "quantity",
+    "Загальна сума придбання": "expenditure",
+    "Податок на прибуток ЮО (ПнПр)": "tax",
+}
+
+SCHEDULE_HEADINGS = {
+    "type": "Вид",
+    "currency": "Валюта",
+    "pay_date": "Дата",
+    "total_pay_val": "Сума, UAH",
+}
+
+SUMS_ROW_LABEL = "Разом"
+
+PROFIT_COLUMNS = [
+    "profit before tax",
+    "profit after tax",
+    "profit per bond",
+    "profitability",
+]
+
 
 def verify_excel_file(decoded_data):
     df = pd.read_excel(io.BytesIO(decoded_data))
 
-    expected_columns = [
-        "ISIN",
-        "Кілть в портфелі",
-        "Загальна сума придбання",
-        "Податок на прибуток ЮО (ПнПр)",
-    ]
+    return verify_bag(df)
+
+
+def verify_bag(df: pd.DataFrame, source="The Excel file"):
+
+    expected_columns = ["ISIN"] + list(BAG_HEADINGS)
     missing_columns = set(expected_columns) - set(df.columns)
 
     if missing_columns:
         error_message = (
-            f"The Excel file is missing the following columns: "
+            f"{source} is missing the following columns: "
             f"{', '.join(missing_columns)}"
         )
         raise ValueError(error_message)
 
     if df.isna().any().any():
-        raise ValueError("Warning: The Excel file contains empty cells.")
+        raise ValueError(f"Warning: {source} contains empty cells.")
 
     expected_types = [object, np.int64, (np.int64, float), (np.int64, float)]
 
@@ -44,22 +71,56 @@ def verify_excel_file(decoded_data):
     return df
 
 
-def read_example_bag():
+@functools.lru_cache(maxsize=1)
+def read_excel_cached(path, modified_at):
+    return pd.read_excel(path)
 
-    bag = pd.read_excel(EXAMPLE_BAG_PATH)
 
-    map_headings = {
-        "Кілть в портфелі": "quantity",
-        "Загальна сума придбання": "expenditure",
-        "Податок на прибуток ЮО (ПнПр)": "tax",
-    }
+def read_example_bag():
+
+    bag = read_excel_cached(EXAMPLE_BAG_PATH, os.path.getmtime(EXAMPLE_BAG_PATH))
 
-    bag = bag.rename(columns=map_headings)
+    bag = bag.rename(columns=BAG_HEADINGS)
 
     return bag
 
 
-def merge_bonds_info(bag: pd.DataFrame, bonds: pd.DataFrame):
+def read_bag_records(records: list):
+
+    map_headings = {value: key for key, value in BAG_HEADINGS.items()}
+
+    df = pd.DataFrame.from_records(records)
+
+    missing_fields = [
+        field
+        for field in ["ISIN", *BAG_HEADINGS.values()]
+        if field not in df and map_headings.get(field) not in df
+    ]
+    if missing_fields:
+        raise ValueError(
+            f"The position records are missing the following fields: "
+            f"{', '.join(missing_fields)}"
+        )
+
+    df = df.rename(columns=map_headings)
+
+    quantity = "Кілть в портфелі"
+    if quantity in df and pd.api.types.is_float_dtype(df[quantity]):
+        if (df[quantity] % 1 == 0).all():
+            df[quantity] = df[quantity].astype(np.int64)
+
+    bag = verify_bag(df, source="The position records")
+
+    return bag.rename(columns=BAG_HEADINGS)[["ISIN"] + list(BAG_HEADINGS.values())]
+
+
+def merge_bonds_info(bag: pd.DataFrame, bonds: pd.DataFrame = None, index=None):
+
+    if index is not None:
+        bag = index.gather(bag)
+        bag["total_pay_val"] = bag["pay_val"] * bag["quantity"] * bag["exchange_rate"]
+
+        return bag
 
     bag = bag.merge(
         bonds[
@@ -81,7 +142,22 @@ def merge_bonds_info(bag: pd.DataFrame, bonds: pd.DataFrame):
     return bag
 
 
-def get_payment_schedule(bag: pd.DataFrame):
+class NoLivePositions(ValueError):
+    pass
+
+
+def live_bag(bag: pd.DataFrame, universe):
+
+    merged = merge_bonds_info(bag, index=universe.payment_index)
+
+    if merged["pay_date"].isna().all():
+        raise NoLivePositions("The bag has no positions with remaining payments.")
+
+    return merged
+
+
+@memoize
+def get_payment_schedule(bag: pd.DataFrame, date=None):
 
     bag = bag.sort_values(by="pay_date", ascending=True)
 
@@ -98,18 +174,11 @@ def get_payment_schedule(bag: pd.DataFrame):
         ]
     )
 
-    bag["pay_date"] = pd.to_datetime(bag["pay_date"]).dt.strftime("%d-%m-%Y")
+    actual, historic = split_dataframe(bag, date=date)
 
-    actual, historic = split_dataframe(bag)
+    actual["pay_date"] = pd.to_datetime(actual["pay_date"]).dt.strftime("%d-%m-%Y")
 
-    map_headings = {
-        "type": "Вид",
-        "currency": "Валюта",
-        "pay_date": "Дата",
-        "total_pay_val": "Сума, UAH",
-    }
-
-    actual = actual.rename(columns=map_headings)
+    actual = actual.rename(columns=SCHEDULE_HEADINGS)
 
     return actual
 
@@ -138,7 +207,7 @@ def get_sums_row(bag: pd.DataFrame):
     column_sums = bag[assigned_columns].sum()
 
     sum_row = pd.DataFrame([column_sums], columns=assigned_columns)
-    sum_row["ISIN"] = "Разом"
+    sum_row["ISIN"] = SUMS_ROW_LABEL
     sum_row.at[0, "profitability"] = (
         sum_row.at[0, "profit after tax"] / sum_row.at[0, "expenditure"] * 100
     )
@@ -146,9 +215,34 @@ def get_sums_row(bag: pd.DataFrame):
     return sum_row
 
 
-def format_bag(bag: pd.DataFrame):
+def last_payment_rows(bag: pd.DataFrame):
+
+    codes, _ = pd.factorize(bag["ISIN"])
+    dates = bag["pay_date"].to_numpy(dtype="datetime64[ns]").view("i8")
+
+    order = np.lexsort((dates, codes))
+    sorted_codes = codes[order]
+
+    return order[np.r_[sorted_codes[1:] != sorted_codes[:-1], True]]
+
+
+def future_payments(bag: pd.DataFrame, date=None):
+
+    payments = bag["total_pay_val"].fillna(0.0)
 
-    bag["expected return"] = bag.groupby("ISIN")["total_pay_val"].transform("sum")
+    if date:
+        payments = payments.where(bag["pay_date"] >= pd.Timestamp(date), 0.0)
+
+    return payments
+
+
+@memoize
+def format_bag(bag: pd.DataFrame, date=None):
+
+    codes, _ = pd.factorize(bag["ISIN"])
+    totals = np.bincount(codes, weights=future_payments(bag, date).to_numpy())
+
+    bag["expected return"] = totals[codes]
     bag = bag.drop(
         columns=[
             "pay_val",
@@ -156,11 +250,9 @@ def format_bag(bag: pd.DataFrame):
             "total_pay_val",
         ]
     )
-    bag = bag.sort_values(by="pay_date", ascending=True).drop_duplicates(
-        subset="ISIN", keep="last"
-    )
+    bag = bag.iloc[last_payment_rows(bag)].sort_values(by="pay_date", kind="stable")
 
-    actual, historic = split_dataframe(bag)
+    actual, historic = split_dataframe(bag, date=date)
 
     actual = analyse_bag(actual)
 
@@ -188,3 +280,215 @@ def format_bag(bag: pd.DataFrame):
     combined_bag = combined_bag.rename(columns=MAP_HEADINGS)
 
     return combined_bag
+
+
+def bag_positions(bag: pd.DataFrame):
+    return bag.drop_duplicates(subset="ISIN")[["ISIN"] + list(BAG_HEADINGS.values())]
+
+
+def get_monthly_payments(bag: pd.DataFrame, date=None):
+
+    monthly_bag = payments_by_month(truncate_past_dates(bag, date) if date else bag)
+
+    return fill_missing_months(monthly_bag)
+
+
+def get_bag_views(bag: pd.DataFrame, bonds: pd.DataFrame, calendar=None, date=None):
+
+    payment_schedule = get_payment_schedule(bag, date)
+
+    formatted_bag = format_bag(bag.copy(), date)
+
+    monthly_bag = get_monthly_payments(bag, date)
+
+    recommended_bonds = get_recommended_bonds(bonds, monthly_bag, calendar)
+
+    return {
+        "formatted": formatted_bag,
+        "schedule": payment_schedule,
+        "monthly": monthly_bag,
+        "recommendations": recommended_bonds,
+    }
+
+
+def is_position_row(row: dict):
+    return row.get("ISIN") not in (None, "", SUMS_ROW_LABEL)
+
+
+def fixed_rows_edited(rows: list, previous: list):
+
+    if len(rows) != len(previous):
+        return False
+
+    return any(
+        row != before
+        for row, before in zip(rows, previous)
+        if not is_position_row(before)
+    )
+
+
+def position_edits(rows: list, previous: list):
+
+    headings = {MAP_HEADINGS[column]: column for column in BAG_HEADINGS.values()}
+    columns = ["ISIN"] + list(headings)
+
+    current = pd.DataFrame.from_records(rows, columns=columns).rename(columns=headings)
+    before = pd.DataFrame.from_records(previous, columns=columns).rename(
+        columns=headings
+    )
+
+    if len(current) != len(before):
+        return current.iloc[:0]
+
+    values = current.drop(columns="ISIN")
+    previous_values = before.drop(columns="ISIN")
+
+    unchanged = (values == previous_values) | (values.isna() & previous_values.isna())
+    is_position = ~current["ISIN"].isin(["", SUMS_ROW_LABEL]) & current["ISIN"].notna()
+
+    edits = current.loc[~unchanged.all(axis=1) & is_position].copy()
+
+    for column in BAG_HEADINGS.values():
+        edits[column] = pd.to_numeric(edits[column], errors="coerce")
+
+    edits = edits.dropna(subset=["quantity", "expenditure"])
+    edits = edits.loc[(edits["quantity"] >= 0) & (edits["quantity"] % 1 == 0)]
+    edits["quantity"] = edits["quantity"].astype(np.int64)
+
+    return edits.drop_duplicates(subset="ISIN", keep="last").reset_index(drop=True)
+
+
+def apply_position_edits(bag: pd.DataFrame, edits: pd.DataFrame):
+
+    bag = bag.copy()
+    edits = edits.set_index("ISIN")
+
+    rows = bag["ISIN"].isin(edits.index)
+    isins = bag.loc[rows, "ISIN"]
+
+    for column in BAG_HEADINGS.values():
+        values = isins.map(edits[column]).fillna(bag.loc[rows, column])
+        bag.loc[rows, column] = values.astype(bag[column].dtype)
+
+    bag.loc[rows, "total_pay_val"] = (
+        bag.loc[rows, "pay_val"]
+        * bag.loc[rows, "quantity"]
+        * bag.loc[rows, "exchange_rate"]
+    )
+
+    return bag
+
+
+def update_payment_schedule(
+    schedule: pd.DataFrame, bag: pd.DataFrame, isins, date=None
+):
+
+    keys = ["ISIN", SCHEDULE_HEADINGS["pay_date"]]
+    amount = SCHEDULE_HEADINGS["total_pay_val"]
+
+    updated = get_payment_schedule(bag.loc[bag["ISIN"].isin(isins)], date)
+    amounts = updated.set_index(keys)[amount]
+
+    positions = amounts.index.get_indexer(pd.MultiIndex.from_frame(schedule[keys]))
+    found = positions >= 0
+
+    schedule = schedule.copy()
+    schedule.loc[found, amount] = amounts.to_numpy()[positions[found]]
+
+    return schedule
+
+
+def update_formatted_bag(formatted: pd.DataFrame, bag: pd.DataFrame, isins, date=None):
+
+    headings = {value: key for key, value in MAP_HEADINGS.items()}
+    formatted = formatted.rename(columns=headings)
+
+    positions = bag_positions(bag).set_index("ISIN")
+    returns = future_payments(bag, date).groupby(bag["ISIN"]).sum()
+
+    n_actual = int((formatted["ISIN"] == "").argmax())
+    is_actual = np.arange(len(formatted)) < n_actual
+    changed = formatted["ISIN"].isin(isins)
+
+    rows = changed & is_actual
+    for column in BAG_HEADINGS.values():
+        formatted.loc[rows, column] = formatted.loc[rows, "ISIN"].map(positions[column])
+    formatted.loc[rows, "expected return"] = formatted.loc[rows, "ISIN"].map(returns)
+
+    analysed = analyse_bag(
+        formatted.loc[rows].astype(
+            {column: float for column in ["expected return", *BAG_HEADINGS.values()]}
+        )
+    )
+    formatted.loc[rows, PROFIT_COLUMNS] = analysed[PROFIT_COLUMNS]
+
+    historic = changed & ~is_actual
+    for column in ["quantity", "expenditure"]:
+        formatted.loc[historic, column] = formatted.loc[historic, "ISIN"].map(
+            positions[column]
+        )
+
+    actual = formatted.iloc[:n_actual]
+    sum_row = get_sums_row(
+        actual.apply(pd.to_numeric, errors="coerce").assign(ISIN=actual["ISIN"])
+    )
+    sums = formatted["ISIN"] == SUMS_ROW_LABEL
+    formatted.loc[sums, sum_row.columns] = sum_row.to_numpy()
+
+    return formatted.rename(columns=MAP_HEADINGS)
+
+
+def update_monthly_bag(
+    monthly_bag: pd.DataFrame,
+    bag: pd.DataFrame,
+    updated_bag: pd.DataFrame,
+    isins,
+    date=None,
+):
+
+    rows = bag["ISIN"].isin(isins)
+
+    delta = future_payments(updated_bag.loc[rows], date) - future_payments(
+        bag.loc[rows], date
+    )
+    delta = delta.groupby(bag.loc[rows, "month_end"]).sum()
+    delta = delta.loc[delta.index.isin(monthly_bag.index) & (delta != 0)]
+
+    monthly_bag = monthly_bag.copy()
+    monthly_bag.loc[delta.index, "total_pay_val"] += delta.to_numpy()
+
+    return monthly_bag, delta.index
+
+
+def update_bag_views(
+    views: dict,
+    bag: pd.DataFrame,
+    edits: pd.DataFrame,
+    bonds: pd.DataFrame = None,
+    calendar=None,
+    date=None,
+):
+
+    isins = edits["ISIN"]
+
+    updated_bag = apply_position_edits(bag, edits)
+    monthly_bag, months = update_monthly_bag(
+        views["monthly"], bag, updated_bag, isins, date
+    )
+
+    updated = {
+        "bag": updated_bag,
+        "schedule": update_payment_schedule(
+            views["schedule"], updated_bag, isins, date
+        ),
+        "formatted": update_formatted_bag(views["formatted"], updated_bag, isins, date),
+    }
+
+    if len(months):
+        updated["monthly"] = monthly_bag
+
+        recommended_bonds = get_recommended_bonds(bonds, monthly_bag, calendar)
+        if set(recommended_bonds["ISIN"]) != set(views["recommendations"]["ISIN"]):
+            updated["recommendations"] = recommended_bonds
+
+    return updated, months
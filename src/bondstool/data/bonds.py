@@ -1,37 +1,127 @@
+import codecs
 import io
-from io import StringIO
+import json
 
 import pandas as pd
 import requests
+from bondstool.data.singleflight import single_flight
+from bondstool.memo import memoize
 from bondstool.utils import round_to_month_end, truncate_past_dates
 
 BONDS_URL = "https://bank.gov.ua/depo_securities?json"
 CURRENCY_URL = "https://bank.gov.ua/NBUStatService/v1/statdirectory/exchange?json"
 
+STREAM_CHUNK_SIZE = 64 * 1024
 
-def get_bonds_info():
-    json_data = requests.get(url=BONDS_URL).text
+EXCLUDED_CPTYPES = {"OZDP"}
+
+MAP_BONDS_HEADINGS = {
+    "cpcode": "ISIN",
+    "pgs_date": "maturity_date",
+    "razm_date": "issue_date",
+    "cpdescr": "type",
+    "val_code": "currency",
+}
+
+
+def iter_json_array(chunks, encoding="utf-8"):
+
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+
+    buffer = ""
+    started = False
+
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = text_decoder.decode(chunk)
+
+        buffer += chunk
+        position = 0
+
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+
+            if position == len(buffer):
+                break
+
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError("Expected a JSON array of bonds.")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == "]":
+                return
+
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+
+            yield item
+
+        buffer = buffer[position:]
+
+    if buffer.strip():
+        raise ValueError("Unexpected end of the bonds JSON stream.")
+
+
+def iter_bonds(chunks):
 
-    json_io = StringIO(json_data)
+    for bond in iter_json_array(chunks):
+        if bond.get("cptype") in EXCLUDED_CPTYPES:
+            continue
 
-    bonds = pd.read_json(json_io, orient="records")
+        payments = {}
+        for payment in bond.pop("payments", None) or ():
+            pay_date = payment["pay_date"]
+            payments[pay_date] = payments.get(pay_date, 0) + payment["pay_val"]
 
-    bonds = bonds[bonds["cptype"] != "OZDP"]
+        yield bond, sorted(payments.items())
 
-    map_headings = {
-        "cpcode": "ISIN",
-        "pgs_date": "maturity_date",
-        "razm_date": "issue_date",
-        "cpdescr": "type",
-        "val_code": "currency",
-    }
 
-    bonds = bonds.rename(columns=map_headings)
+def stream_bonds_info(chunks):
+
+    attributes, bond_positions, isins, pay_dates, pay_values = [], [], [], [], []
+
+    for position, (bond, payments) in enumerate(iter_bonds(chunks)):
+        attributes.append(bond)
+
+        for pay_date, pay_val in payments or [(None, float("nan"))]:
+            bond_positions.append(position)
+            isins.append(bond.get("cpcode"))
+            pay_dates.append(pay_date)
+            pay_values.append(pay_val)
+
+    bonds = pd.DataFrame.from_records(attributes)
+    bonds = bonds.rename(columns=MAP_BONDS_HEADINGS)
     bonds["maturity_date"] = pd.to_datetime(bonds["maturity_date"])
 
-    return bonds
+    payments = pd.DataFrame(
+        {
+            "bond": bond_positions,
+            "ISIN": isins,
+            "pay_date": pd.to_datetime(pay_dates),
+            "pay_val": pay_values,
+        }
+    )
+
+    return bonds, payments
+
+
+@single_flight
+def get_bonds_info():
+
+    with requests.get(url=BONDS_URL, stream=True) as response:
+        response.raise_for_status()
+
+        return stream_bonds_info(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
 
 
+@single_flight
 def get_exchange_rates():
     json_data = requests.get(url=CURRENCY_URL).text
 
@@ -69,7 +159,7 @@ def unpack_payments(payments_col):
     return df.to_dict(orient="records")
 
 
-def normalize_payments(df: pd.DataFrame):
+def normalize_payments(df: pd.DataFrame, date=None):
 
     df["payments"] = df["payments"].apply(unpack_payments)
     df = df.explode("payments")
@@ -83,10 +173,26 @@ def normalize_payments(df: pd.DataFrame):
 
     df["pay_date"] = pd.to_datetime(df["pay_date"])
     df["month_end"] = round_to_month_end(df["pay_date"])
-    return truncate_past_dates(df)
+    return truncate_past_dates(df, date)
+
+
+def normalize_flat_payments(bonds: pd.DataFrame, payments: pd.DataFrame, date=None):
+
+    df = bonds.take(payments["bond"].to_numpy()).reset_index(drop=True)
+    df["pay_date"] = payments["pay_date"].to_numpy()
+    df["pay_val"] = payments["pay_val"].to_numpy()
+
+    df["month_end"] = round_to_month_end(df["pay_date"])
+    return truncate_past_dates(df, date)
+
 
+@memoize
+def get_recommended_bonds(
+    bonds: pd.DataFrame, monthly_bag: pd.DataFrame, calendar=None
+):
 
-def get_recommended_bonds(bonds: pd.DataFrame, monthly_bag: pd.DataFrame):
+    if calendar is not None:
+        return calendar.recommend(monthly_bag)
 
     bonds_last_payment = bonds.sort_values(
         by="pay_val", ascending=False
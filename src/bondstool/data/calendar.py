@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from bondstool.memo import versioned
+
+
+@versioned
+@dataclass
+class PaymentCalendar:
+    version: str
+    months: np.ndarray
+    month_isins: np.ndarray
+    month_amounts: np.ndarray
+    isin_index: pd.Index
+    isin_offsets: np.ndarray
+    isin_months: np.ndarray
+    redemptions: pd.DataFrame
+    redemption_months: np.ndarray
+
+    def payments_in(self, month):
+        month = np.datetime64(pd.Timestamp(month), "ns")
+        start = np.searchsorted(self.months, month, side="left")
+        stop = np.searchsorted(self.months, month, side="right")
+
+        return pd.Series(
+            self.month_amounts[start:stop],
+            index=pd.Index(self.month_isins[start:stop], name="ISIN"),
+            name="pay_val",
+        )
+
+    def months_of(self, isin):
+        position = self.isin_index.get_indexer([isin])[0]
+
+        if position < 0:
+            return pd.DatetimeIndex([], name="month_end")
+
+        start, stop = self.isin_offsets[position], self.isin_offsets[position + 1]
+
+        return pd.DatetimeIndex(self.isin_months[start:stop], name="month_end")
+
+    def isins_paying_in(self, months):
+        months = pd.DatetimeIndex(months).values.astype("datetime64[ns]")
+        mask = np.isin(self.months, months)
+
+        return pd.Index(np.unique(self.month_isins[mask]), name="ISIN")
+
+    def redeeming_in(self, months):
+        months = pd.DatetimeIndex(months).values.astype("datetime64[ns]")
+
+        return np.flatnonzero(np.isin(self.redemption_months, months))
+
+    def redeeming_after(self, month):
+        month = np.datetime64(pd.Timestamp(month), "ns")
+
+        return np.flatnonzero(self.redemption_months > month)
+
+    def recommend(self, monthly_bag: pd.DataFrame, threshold=None):
+
+        pay_col = monthly_bag.columns[0]
+
+        if threshold is None:
+            threshold = monthly_bag.mean().values[0]
+
+        low_months = monthly_bag.index[monthly_bag[pay_col] <= threshold]
+
+        positions = np.union1d(
+            self.redeeming_in(low_months),
+            self.redeeming_after(monthly_bag.index.max()),
+        )
+
+        recommended = self.redemptions.iloc[positions]
+
+        return recommended.sort_values(by="pay_date", ascending=True)
+
+
+def build_payment_calendar(bonds: pd.DataFrame, version=None):
+
+    payments = bonds.dropna(subset=["month_end"])
+
+    by_month = payments.sort_values(by=["month_end", "ISIN"], kind="stable")
+
+    by_isin = payments.sort_values(by=["ISIN", "month_end"], kind="stable")
+    by_isin = by_isin.drop_duplicates(subset=["ISIN", "month_end"])
+    codes, isins = pd.factorize(by_isin["ISIN"], sort=True)
+    isin_offsets = np.searchsorted(codes, np.arange(len(isins) + 1))
+
+    redemptions = bonds.sort_values(by="pay_val", ascending=False).drop_duplicates(
+        subset="ISIN", keep="first"
+    )
+    redemptions = redemptions.assign(
+        month_end=redemptions["pay_date"] + pd.offsets.MonthEnd(0)
+    )
+
+    return PaymentCalendar(
+        version=version,
+        months=by_month["month_end"].values.astype("datetime64[ns]"),
+        month_isins=by_month["ISIN"].to_numpy(dtype=object),
+        month_amounts=by_month["pay_val"].to_numpy(dtype=float),
+        isin_index=pd.Index(isins, name="ISIN"),
+        isin_offsets=isin_offsets,
+        isin_months=by_isin["month_end"].values.astype("datetime64[ns]"),
+        redemptions=redemptions,
+        redemption_months=redemptions["month_end"].values.astype("datetime64[ns]"),
+    )
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+PAYMENT_COLUMNS = ["ISIN", "pay_date", "pay_val", "month_end"]
+
+CATEGORY_MAX_RATIO = 0.5
+
+
+def memory_usage(df: pd.DataFrame):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def frame_memory_report(frames: dict):
+    rows = [
+        {
+            "frame": name,
+            "rows": df.shape[0],
+            "columns": df.shape[1],
+            "bytes": memory_usage(df),
+        }
+        for name, df in frames.items()
+    ]
+
+    report = pd.DataFrame(rows, columns=["frame", "rows", "columns", "bytes"])
+    report["MB"] = report["bytes"] / 2**20
+    report = report.set_index("frame")
+
+    return report
+
+
+def compaction_ratio(before: dict, after: dict):
+    before_bytes = frame_memory_report(before)["bytes"].sum()
+    after_bytes = frame_memory_report(after)["bytes"].sum()
+
+    return before_bytes / after_bytes if after_bytes else np.inf
+
+
+def to_categories(df: pd.DataFrame, max_ratio=CATEGORY_MAX_RATIO):
+    df = df.copy()
+
+    for col in df.select_dtypes(include="object").columns:
+        try:
+            n_unique = df[col].nunique(dropna=False)
+        except TypeError:
+            continue
+
+        if n_unique <= max(1, len(df) * max_ratio):
+            df[col] = df[col].astype("category")
+
+    return df
+
+
+def downcast_numeric(df: pd.DataFrame):
+    df = df.copy()
+
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+
+    for col in df.select_dtypes(include="floating").columns:
+        downcast = df[col].astype(np.float32)
+
+        if downcast.astype(df[col].dtype).equals(df[col]):
+            df[col] = downcast
+
+    return df
+
+
+def compact_frame(df: pd.DataFrame, max_ratio=CATEGORY_MAX_RATIO):
+    return downcast_numeric(to_categories(df, max_ratio))
+
+
+def split_bonds(bonds: pd.DataFrame):
+
+    static_columns = [col for col in bonds.columns if col not in PAYMENT_COLUMNS]
+    payment_columns = [col for col in PAYMENT_COLUMNS if col in bonds.columns]
+
+    attributes = bonds[["ISIN"] + static_columns].drop_duplicates(subset="ISIN")
+    attributes = attributes.reset_index(drop=True)
+
+    payments = bonds[payment_columns].reset_index(drop=True)
+
+    return attributes, payments
+
+
+def compact_bonds(bonds: pd.DataFrame):
+
+    attributes, payments = split_bonds(bonds)
+
+    isin_dtype = pd.CategoricalDtype(attributes["ISIN"])
+    isins = attributes["ISIN"].astype(isin_dtype)
+
+    attributes = compact_frame(attributes.drop(columns="ISIN"))
+    attributes.insert(0, "ISIN", isins)
+
+    payments = downcast_numeric(payments)
+    payments["ISIN"] = payments["ISIN"].astype(isin_dtype)
+
+    return attributes, payments
+
+
+def join_bonds(attributes: pd.DataFrame, payments: pd.DataFrame, columns=None):
+
+    bonds = attributes.merge(payments, on="ISIN", how="inner", sort=False)
+    bonds["ISIN"] = bonds["ISIN"].astype(str)
+
+    if columns is not None:
+        bonds = bonds[columns]
+
+    return bonds
@@ -0,0 +1,175 @@
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from bondstool.config import PORTFOLIO_CACHE_SIZE
+from bondstool.data.bag import (
+    SCHEDULE_HEADINGS,
+    SUMS_ROW_LABEL,
+    NoLivePositions,
+    get_bag_views,
+    live_bag,
+)
+from bondstool.data.portfolios import (
+    list_portfolios,
+    load_portfolio_payloads,
+    load_positions,
+)
+from bondstool.memo import MemoCache
+from bondstool.utils import MAP_HEADINGS, read_json
+
+TOTAL_COLUMNS = [
+    "quantity",
+    "expenditure",
+    "expected return",
+    "profit before tax",
+    "profit after tax",
+]
+
+PORTFOLIO_COLUMN = "Портфель"
+
+# stores materialized by the dashboard when a portfolio is saved
+SAVED_VIEWS = {
+    "formatted": "intermediate-formatted-bag",
+    "schedule": "intermediate-payment-schedule",
+    "monthly": "intermediate-monthly-bag",
+}
+
+_PORTFOLIO_VIEWS = MemoCache(PORTFOLIO_CACHE_SIZE)
+
+
+@dataclass
+class PortfolioViews:
+    name: str
+    monthly: pd.Series
+    schedule: pd.DataFrame
+    totals: pd.Series
+
+
+def portfolio_views(name, views: dict):
+
+    formatted = views["formatted"]
+    sums_row = formatted.loc[formatted["ISIN"] == SUMS_ROW_LABEL]
+    totals = sums_row[[MAP_HEADINGS[column] for column in TOTAL_COLUMNS]]
+
+    schedule = views["schedule"].copy()
+    schedule.insert(0, PORTFOLIO_COLUMN, name)
+
+    return PortfolioViews(
+        name=name,
+        monthly=views["monthly"]["total_pay_val"],
+        schedule=schedule,
+        totals=pd.Series(
+            totals.to_numpy(dtype=float).ravel(), index=TOTAL_COLUMNS, name=name
+        ),
+    )
+
+
+def build_portfolio_views(name, positions: pd.DataFrame, universe):
+
+    bag = live_bag(positions, universe)
+    views = get_bag_views(bag, None, universe.calendar, universe.as_of)
+
+    return portfolio_views(name, views)
+
+
+def read_saved_views(name, path=None):
+
+    try:
+        payloads = load_portfolio_payloads(name, list(SAVED_VIEWS.values()), path)
+    except KeyError:
+        return None
+
+    if len(payloads) < len(SAVED_VIEWS):
+        return None
+
+    return portfolio_views(
+        name,
+        {
+            "formatted": read_json(payloads[SAVED_VIEWS["formatted"]], []),
+            "schedule": read_json(payloads[SAVED_VIEWS["schedule"]], []),
+            "monthly": read_json(
+                payloads[SAVED_VIEWS["monthly"]], ["month_end"], ["month_end"]
+            ),
+        },
+    )
+
+
+def positions_hash(positions: pd.DataFrame):
+    hashes = pd.util.hash_pandas_object(positions, index=False)
+    return hashlib.sha1(hashes.to_numpy().tobytes()).hexdigest()
+
+
+def get_portfolio_views(names, universe, path=None):
+
+    saved = list_portfolios(path).set_index("name")["universe_version"]
+
+    missing = [name for name in names if name not in saved.index]
+    if missing:
+        raise KeyError(f"Portfolios not found: {', '.join(missing)}.")
+
+    portfolios, dead = [], []
+    for name in names:
+        # saved_at has a one second resolution, so the positions are the key
+        positions = load_positions(name, path)
+        key = (name, positions_hash(positions), universe.version, path)
+        found, views = _PORTFOLIO_VIEWS.get(key)
+
+        if not found:
+            views = None
+            if saved[name] == universe.version:
+                views = read_saved_views(name, path)
+
+            if views is None:
+                try:
+                    views = build_portfolio_views(name, positions, universe)
+                except NoLivePositions:
+                    views = None
+
+            _PORTFOLIO_VIEWS.put(key, views)
+
+        if views is None:
+            dead.append(name)
+        else:
+            portfolios.append(views)
+
+    return portfolios, dead
+
+
+def consolidate(portfolios: list):
+
+    names = [portfolio.name for portfolio in portfolios]
+
+    months = pd.DatetimeIndex([], name="month_end")
+    for portfolio in portfolios:
+        months = months.union(portfolio.monthly.index)
+
+    payments = np.zeros((len(months), len(portfolios)))
+    for column, portfolio in enumerate(portfolios):
+        rows = months.get_indexer(portfolio.monthly.index)
+        payments[rows, column] = portfolio.monthly.to_numpy()
+
+    monthly = pd.DataFrame(payments, index=months, columns=names)
+    monthly[SUMS_ROW_LABEL] = payments.sum(axis=1)
+
+    totals = np.array([portfolio.totals.to_numpy() for portfolio in portfolios])
+    totals = totals.reshape(-1, len(TOTAL_COLUMNS))
+
+    summary = pd.DataFrame(
+        np.vstack([totals, totals.sum(axis=0)]),
+        index=pd.Index([*names, SUMS_ROW_LABEL], name=PORTFOLIO_COLUMN),
+        columns=TOTAL_COLUMNS,
+    )
+    summary["profitability"] = (
+        summary["profit after tax"] / summary["expenditure"] * 100
+    )
+
+    schedule = pd.concat(
+        [portfolio.schedule for portfolio in portfolios], ignore_index=True
+    )
+    dates = pd.to_datetime(schedule[SCHEDULE_HEADINGS["pay_date"]], format="%d-%m-%Y")
+    schedule = schedule.iloc[np.argsort(dates.to_numpy(), kind="stable")]
+    schedule = schedule.reset_index(drop=True)
+
+    return {"monthly": monthly, "summary": summary, "schedule": schedule}
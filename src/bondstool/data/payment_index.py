@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+PAYMENT_FIELDS = ["pay_date", "pay_val", "month_end"]
+ATTRIBUTE_FIELDS = ["type", "currency", "exchange_rate"]
+
+
+@dataclass
+class PaymentIndex:
+    isins: pd.Index
+    offsets: np.ndarray
+    payments: dict
+    attributes: dict
+
+    def positions(self, isins):
+        return self.isins.get_indexer(pd.Index(isins))
+
+    def segments(self, isins):
+        positions = self.positions(isins)
+        found = positions >= 0
+
+        starts = np.where(found, self.offsets[positions], 0)
+        counts = np.where(found, self.offsets[positions + 1] - starts, 0)
+
+        return positions, starts, counts
+
+    def gather(self, bag: pd.DataFrame):
+
+        positions, starts, counts = self.segments(bag["ISIN"])
+
+        rows = np.maximum(counts, 1)
+        total = rows.sum()
+
+        bag_rows = np.repeat(np.arange(len(bag)), rows)
+        within = np.arange(total) - np.repeat(np.cumsum(rows) - rows, rows)
+        payment_rows = np.repeat(starts, rows) + within
+
+        has_payment = np.repeat(counts > 0, rows)
+        has_isin = np.repeat(positions >= 0, rows)
+        isin_rows = np.repeat(positions, rows)
+
+        merged = bag.iloc[bag_rows].reset_index(drop=True)
+
+        for field, values in self.payments.items():
+            merged[field] = take_masked(values, payment_rows, has_payment)
+
+        for field, values in self.attributes.items():
+            merged[field] = take_masked(values, isin_rows, has_isin)
+
+        return merged
+
+
+def take_masked(values: np.ndarray, rows: np.ndarray, mask: np.ndarray):
+
+    if mask.all():
+        return values[rows]
+
+    if values.dtype.kind in "iub":
+        values = values.astype(float)
+
+    fill = np.datetime64("NaT") if values.dtype.kind in "mM" else np.nan
+
+    taken = np.full(len(rows), fill, dtype=values.dtype)
+    taken[mask] = values[rows[mask]]
+
+    return taken
+
+
+def build_payment_index(bonds: pd.DataFrame):
+
+    codes, isins = pd.factorize(bonds["ISIN"], sort=True)
+    order = np.argsort(codes, kind="stable")
+
+    offsets = np.searchsorted(codes[order], np.arange(len(isins) + 1))
+    firsts = order[offsets[:-1]]
+
+    return PaymentIndex(
+        isins=pd.Index(isins, name="ISIN"),
+        offsets=offsets,
+        payments={field: bonds[field].to_numpy()[order] for field in PAYMENT_FIELDS},
+        attributes={
+            field: bonds[field].to_numpy()[firsts] for field in ATTRIBUTE_FIELDS
+        },
+    )
@@ -0,0 +1,203 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+from bondstool.config import PORTFOLIO_DB_PATH
+
+POSITION_COLUMNS = ["ISIN", "quantity", "expenditure", "tax"]
+
+CASH_FLOW_COLUMNS = [
+    "ISIN",
+    "pay_date",
+    "month_end",
+    "pay_val",
+    "total_pay_val",
+    "type",
+    "currency",
+    "exchange_rate",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS portfolios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    saved_at TEXT NOT NULL,
+    universe_version TEXT
+);
+CREATE TABLE IF NOT EXISTS positions (
+    portfolio_id INTEGER NOT NULL REFERENCES portfolios(id) ON DELETE CASCADE,
+    ISIN TEXT NOT NULL,
+    quantity INTEGER,
+    expenditure REAL,
+    tax REAL
+);
+CREATE INDEX IF NOT EXISTS positions_isin ON positions(ISIN);
+CREATE INDEX IF NOT EXISTS positions_portfolio ON positions(portfolio_id);
+CREATE TABLE IF NOT EXISTS cash_flows (
+    portfolio_id INTEGER NOT NULL REFERENCES portfolios(id) ON DELETE CASCADE,
+    ISIN TEXT NOT NULL,
+    pay_date TEXT,
+    month_end TEXT,
+    pay_val REAL,
+    total_pay_val REAL,
+    type TEXT,
+    currency TEXT,
+    exchange_rate REAL
+);
+CREATE INDEX IF NOT EXISTS cash_flows_isin ON cash_flows(ISIN);
+CREATE INDEX IF NOT EXISTS cash_flows_pay_date ON cash_flows(pay_date);
+CREATE INDEX IF NOT EXISTS cash_flows_portfolio ON cash_flows(portfolio_id, pay_date);
+CREATE TABLE IF NOT EXISTS views (
+    portfolio_id INTEGER NOT NULL REFERENCES portfolios(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (portfolio_id, name)
+);
+"""
+
+
+def connect(path=None):
+
+    path = path or PORTFOLIO_DB_PATH
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+
+    return conn
+
+
+def format_dates(series: pd.Series):
+    return pd.to_datetime(series).dt.strftime("%Y-%m-%d")
+
+
+def save_portfolio(
+    name, bag: pd.DataFrame, payloads: dict, universe_version=None, path=None
+):
+
+    positions = bag.drop_duplicates(subset="ISIN")[POSITION_COLUMNS]
+
+    cash_flows = bag.dropna(subset=["pay_date"])[CASH_FLOW_COLUMNS].copy()
+    cash_flows["pay_date"] = format_dates(cash_flows["pay_date"])
+    cash_flows["month_end"] = format_dates(cash_flows["month_end"])
+
+    with closing(connect(path)) as conn, conn:
+        conn.execute("DELETE FROM portfolios WHERE name = ?", (name,))
+        portfolio_id = conn.execute(
+            "INSERT INTO portfolios (name, saved_at, universe_version) "
+            "VALUES (?, ?, ?)",
+            (name, datetime.now().isoformat(timespec="seconds"), universe_version),
+        ).lastrowid
+
+        conn.executemany(
+            "INSERT INTO positions VALUES (?, ?, ?, ?, ?)",
+            [(portfolio_id, *row) for row in positions.itertuples(index=False)],
+        )
+        conn.executemany(
+            "INSERT INTO cash_flows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(portfolio_id, *row) for row in cash_flows.itertuples(index=False)],
+        )
+        conn.executemany(
+            "INSERT INTO views VALUES (?, ?, ?)",
+            [(portfolio_id, view, payload) for view, payload in payloads.items()],
+        )
+
+    return portfolio_id
+
+
+def list_portfolios(path=None):
+
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(
+            "SELECT p.name, p.saved_at, p.universe_version, "
+            "COUNT(pos.ISIN) AS positions "
+            "FROM portfolios p LEFT JOIN positions pos ON pos.portfolio_id = p.id "
+            "GROUP BY p.id ORDER BY p.name",
+            conn,
+        )
+
+
+def delete_portfolio(name, path=None):
+
+    with closing(connect(path)) as conn, conn:
+        conn.execute("DELETE FROM portfolios WHERE name = ?", (name,))
+
+
+def load_portfolio_payloads(name, views=None, path=None):
+
+    query = (
+        "SELECT v.name, v.payload FROM views v "
+        "JOIN portfolios p ON p.id = v.portfolio_id WHERE p.name = ?"
+    )
+    params = [name]
+
+    if views is not None:
+        query += f" AND v.name IN ({', '.join('?' * len(views))})"
+        params.extend(views)
+
+    with closing(connect(path)) as conn:
+        rows = conn.execute(query, params).fetchall()
+
+    if not rows:
+        raise KeyError(f"Portfolio '{name}' not found.")
+
+    return dict(rows)
+
+
+def load_positions(name, path=None):
+
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(
+            "SELECT pos.ISIN, pos.quantity, pos.expenditure, pos.tax "
+            "FROM positions pos JOIN portfolios p ON p.id = pos.portfolio_id "
+            "WHERE p.name = ?",
+            conn,
+            params=(name,),
+        )
+
+
+def load_cash_flows(name=None, start=None, end=None, isin=None, path=None):
+
+    conditions, params = [], []
+
+    if name is not None:
+        conditions.append("p.name = ?")
+        params.append(name)
+    if start is not None:
+        conditions.append("cf.pay_date >= ?")
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d"))
+    if end is not None:
+        conditions.append("cf.pay_date <= ?")
+        params.append(pd.Timestamp(end).strftime("%Y-%m-%d"))
+    if isin is not None:
+        conditions.append("cf.ISIN = ?")
+        params.append(isin)
+
+    where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(
+            "SELECT p.name AS portfolio, cf.* FROM cash_flows cf "
+            "JOIN portfolios p ON p.id = cf.portfolio_id "
+            f"{where}ORDER BY cf.pay_date",
+            conn,
+            params=params,
+            parse_dates=["pay_date", "month_end"],
+        ).drop(columns="portfolio_id")
+
+
+def find_portfolios_by_isin(isin, path=None):
+
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(
+            "SELECT p.name, pos.quantity, pos.expenditure, pos.tax "
+            "FROM positions pos JOIN portfolios p ON p.id = pos.portfolio_id "
+            "WHERE pos.ISIN = ? ORDER BY p.name",
+            conn,
+            params=(isin,),
+        )
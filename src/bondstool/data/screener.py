@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+SCREENER_LIMIT = 20
+
+SUMMARY_COLUMNS = [
+    "ISIN",
+    "type",
+    "currency",
+    "pay_period",
+    "maturity_date",
+    "nominal",
+    "auk_proc",
+    "profitability",
+    "next_pay_date",
+    "payments_left",
+    "on_auction",
+]
+
+CATEGORY_COLUMNS = ["currency", "type", "pay_period"]
+
+SCREENER_HEADINGS = {
+    "next_pay_date": "Наступна виплата",
+    "payments_left": "Залишилось виплат",
+    "on_auction": "На аукціоні",
+}
+
+SCREENER_SORTS = {
+    "profitability": "Прибутковість",
+    "auk_proc": "Процентна ставка",
+    "maturity_date": "Дата погашення",
+    "next_pay_date": "Наступна виплата",
+}
+
+
+@dataclass
+class ScreenerIndex:
+    summary: pd.DataFrame
+    orders: dict
+    descending_orders: dict
+    sorted_values: dict
+    valid_counts: dict
+    postings: dict
+
+    def __len__(self):
+        return len(self.summary)
+
+    def range_mask(self, column, lower=None, upper=None):
+
+        values = self.sorted_values[column]
+
+        start = 0 if lower is None else np.searchsorted(values, lower, side="left")
+        stop = self.valid_counts[column]
+        if upper is not None:
+            stop = min(stop, np.searchsorted(values, upper, side="right"))
+
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.orders[column][start:stop]] = True
+
+        return mask
+
+    def values_mask(self, column, values):
+
+        mask = np.zeros(len(self), dtype=bool)
+
+        for value in values:
+            mask[self.postings[column].get(value, [])] = True
+
+        return mask
+
+    def sorted_positions(self, column, descending=False):
+
+        if descending:
+            return self.descending_orders[column]
+
+        return self.orders[column]
+
+
+def build_screener_index(
+    attributes: pd.DataFrame, payments: pd.DataFrame, isin_df: pd.DataFrame
+):
+
+    isins = attributes["ISIN"].astype(str)
+    pay_dates = payments.groupby(payments["ISIN"].astype(str))["pay_date"]
+
+    summary = attributes.assign(
+        ISIN=isins,
+        type=attributes["type"].astype(str),
+        currency=attributes["currency"].astype(str),
+        pay_period=attributes["pay_period"].astype("Int64"),
+        nominal=attributes["nominal"].astype("Int64"),
+        next_pay_date=isins.map(pay_dates.min()),
+        payments_left=isins.map(pay_dates.size()).fillna(0).astype(np.int64),
+        on_auction=isins.isin(isin_df["ISIN"]),
+    )[SUMMARY_COLUMNS].reset_index(drop=True)
+
+    orders, descending_orders, sorted_values, valid_counts = {}, {}, {}, {}
+    for column in SCREENER_SORTS:
+        values = summary[column].to_numpy()
+        order = np.argsort(values, kind="stable")
+        valid = int(summary[column].notna().sum())
+
+        # sorting the reversed values keeps ties in universe order once flipped back
+        reversed_order = len(values) - 1 - np.argsort(values[::-1], kind="stable")
+
+        orders[column] = order
+        descending_orders[column] = np.concatenate(
+            [reversed_order[:valid][::-1], order[valid:]]
+        )
+        sorted_values[column] = values[order]
+        valid_counts[column] = valid
+
+    postings = {
+        column: {
+            value: positions
+            for value, positions in summary.groupby(column).indices.items()
+        }
+        for column in CATEGORY_COLUMNS
+    }
+
+    return ScreenerIndex(
+        summary=summary,
+        orders=orders,
+        descending_orders=descending_orders,
+        sorted_values=sorted_values,
+        valid_counts=valid_counts,
+        postings=postings,
+    )
+
+
+def screen_bonds(
+    index: ScreenerIndex,
+    currencies=None,
+    types=None,
+    pay_periods=None,
+    maturity_from=None,
+    maturity_to=None,
+    min_profitability=None,
+    max_profitability=None,
+    on_auction=None,
+    sort_by="profitability",
+    descending=True,
+    limit=SCREENER_LIMIT,
+):
+
+    if sort_by not in SCREENER_SORTS:
+        raise ValueError(
+            f"Unknown sort column '{sort_by}', expected one of {list(SCREENER_SORTS)}."
+        )
+
+    mask = np.ones(len(index), dtype=bool)
+
+    for column, values in [
+        ("currency", currencies),
+        ("type", types),
+        ("pay_period", pay_periods),
+    ]:
+        if values:
+            mask &= index.values_mask(column, values)
+
+    if maturity_from is not None or maturity_to is not None:
+        mask &= index.range_mask(
+            "maturity_date",
+            None if maturity_from is None else pd.Timestamp(maturity_from).asm8,
+            None if maturity_to is None else pd.Timestamp(maturity_to).asm8,
+        )
+
+    if min_profitability is not None or max_profitability is not None:
+        mask &= index.range_mask("profitability", min_profitability, max_profitability)
+
+    if on_auction is not None:
+        mask &= index.summary["on_auction"].to_numpy() == bool(on_auction)
+
+    order = index.sorted_positions(sort_by, descending)
+    selected = order[mask[order]]
+
+    if limit is not None:
+        selected = selected[:limit]
+
+    return index.summary.iloc[selected].reset_index(drop=True)
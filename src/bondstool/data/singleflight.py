@@ -0,0 +1,86 @@
+import functools
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+
+from bondstool.config import CACHE_DIR
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SINGLE_FLIGHT_DIR = os.path.join(CACHE_DIR, "singleflight")
+
+_CALLS = {}
+_CALLS_LOCK = threading.Lock()
+
+
+class Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def call_key(name, args, kwargs):
+    digest = hashlib.sha1(repr((args, sorted(kwargs.items()))).encode())
+
+    return f"{name}-{digest.hexdigest()[:16]}"
+
+
+@contextmanager
+def file_lock(key):
+
+    if fcntl is None:
+        yield
+        return
+
+    os.makedirs(SINGLE_FLIGHT_DIR, exist_ok=True)
+
+    with open(os.path.join(SINGLE_FLIGHT_DIR, key + ".lock"), "a+b") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def single_flight(func):
+
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+
+        key = call_key(name, args, kwargs)
+
+        with _CALLS_LOCK:
+            call = _CALLS.get(key)
+            leader = call is None
+
+            if leader:
+                call = _CALLS[key] = Call()
+
+        if leader:
+            try:
+                # other workers wait for the download in flight and then
+                # fetch their own copy instead of hitting upstream at once
+                with file_lock(key):
+                    call.result = func(*args, **kwargs)
+            except Exception as error:
+                call.error = error
+            finally:
+                with _CALLS_LOCK:
+                    del _CALLS[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+
+        return call.result
+
+    return wrapper
@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+from bondstool.codec import decode_frame, encode_frame
+from bondstool.config import SNAPSHOT_DB_PATH
+
+SNAPSHOT_FRAMES = ["raw_bonds", "attributes", "payments", "isin_df"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    date TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    auc_date TEXT,
+    bonds_dtypes TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshot_frames (
+    date TEXT NOT NULL REFERENCES snapshots(date) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (date, name)
+);
+"""
+
+
+def connect(path=None):
+
+    path = path or SNAPSHOT_DB_PATH
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+
+    return conn
+
+
+def snapshot_key(date=None):
+    return pd.Timestamp(date or datetime.today()).strftime("%Y-%m-%d")
+
+
+def save_snapshot(universe, date=None, path=None):
+
+    key = snapshot_key(date)
+
+    with closing(connect(path)) as conn, conn:
+        row = conn.execute(
+            "SELECT version FROM snapshots WHERE date = ?", (key,)
+        ).fetchone()
+
+        if row is not None and row[0] == universe.version:
+            return False
+
+        bonds_dtypes = {
+            column: str(dtype) for column, dtype in universe.bonds_dtypes.items()
+        }
+
+        conn.execute("DELETE FROM snapshots WHERE date = ?", (key,))
+        conn.execute(
+            "INSERT INTO snapshots VALUES (?, ?, ?, ?, ?)",
+            (
+                key,
+                universe.version,
+                datetime.now().isoformat(timespec="seconds"),
+                universe.auc_date,
+                json.dumps(bonds_dtypes),
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO snapshot_frames VALUES (?, ?, ?)",
+            [
+                (key, name, encode_frame(getattr(universe, name)))
+                for name in SNAPSHOT_FRAMES
+            ],
+        )
+
+    return True
+
+
+def list_snapshots(path=None):
+
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(
+            "SELECT date, version, saved_at, auc_date FROM snapshots ORDER BY date",
+            conn,
+            parse_dates=["date"],
+        )
+
+
+def find_snapshot(date, path=None):
+
+    key = snapshot_key(date)
+
+    with closing(connect(path)) as conn:
+        row = conn.execute(
+            "SELECT date, version FROM snapshots WHERE date <= ? "
+            "ORDER BY date DESC LIMIT 1",
+            (key,),
+        ).fetchone()
+
+    if row is None:
+        raise LookupError(f"No bonds snapshot on or before {key}.")
+
+    return row
+
+
+def load_snapshot(key, path=None):
+
+    with closing(connect(path)) as conn:
+        meta = conn.execute(
+            "SELECT version, auc_date, bonds_dtypes FROM snapshots WHERE date = ?",
+            (key,),
+        ).fetchone()
+        frames = conn.execute(
+            "SELECT name, payload FROM snapshot_frames WHERE date = ?", (key,)
+        ).fetchall()
+
+    if meta is None:
+        raise LookupError(f"Bonds snapshot {key} not found.")
+
+    version, auc_date, bonds_dtypes = meta
+
+    return {
+        "date": key,
+        "version": version,
+        "auc_date": auc_date,
+        "bonds_dtypes": pd.Series(json.loads(bonds_dtypes), dtype=object),
+        **{name: decode_frame(payload) for name, payload in frames},
+    }
@@ -0,0 +1,236 @@
+import gc
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+from bondstool.analysis.utils import calculate_profitability
+from bondstool.config import SAVE_SNAPSHOTS, SNAPSHOT_CACHE_SIZE, UNIVERSE_TTL
+from bondstool.data.auction import (
+    filter_trading_bonds,
+    get_auction_xml,
+    get_doc_url_date,
+    parse_xml_isins,
+)
+from bondstool.data.bonds import (
+    add_exchange_rates,
+    get_bonds_info,
+    get_exchange_rates,
+    normalize_flat_payments,
+)
+from bondstool.data.calendar import PaymentCalendar, build_payment_calendar
+from bondstool.data.compact import compact_bonds, join_bonds
+from bondstool.data.payment_index import PaymentIndex, build_payment_index
+from bondstool.data.screener import ScreenerIndex, build_screener_index
+from bondstool.data.snapshots import (
+    find_snapshot,
+    load_snapshot,
+    save_snapshot,
+    snapshot_key,
+)
+from bondstool.memo import versioned
+from bondstool.utils import to_store, truncate_past_dates
+
+_UNIVERSE = None
+_UNIVERSE_LOCK = threading.Lock()
+_AS_OF_UNIVERSES = OrderedDict()
+
+
+@versioned
+@dataclass
+class Universe:
+    raw_bonds: pd.DataFrame
+    attributes: pd.DataFrame
+    payments: pd.DataFrame
+    bonds_dtypes: pd.Series
+    auc_date: str
+    isin_df: pd.DataFrame
+    trading_bonds: pd.DataFrame
+    version: str
+    as_of: str = None
+    loaded_at: float = field(default_factory=time.time)
+    _bonds: pd.DataFrame = field(default=None, repr=False)
+    _payloads: dict = field(default=None, repr=False)
+    _calendar: PaymentCalendar = field(default=None, repr=False)
+    _payment_index: PaymentIndex = field(default=None, repr=False)
+    _screener: ScreenerIndex = field(default=None, repr=False)
+
+    @property
+    def bonds(self):
+        if self._bonds is None:
+            bonds = join_bonds(
+                self.attributes, self.payments, columns=list(self.bonds_dtypes.index)
+            )
+            self._bonds = bonds.astype(self.bonds_dtypes.to_dict())
+
+        return self._bonds
+
+    @property
+    def calendar(self):
+        if self._calendar is None:
+            self._calendar = build_payment_calendar(self.bonds, self.version)
+
+        return self._calendar
+
+    @property
+    def payment_index(self):
+        if self._payment_index is None:
+            self._payment_index = build_payment_index(self.bonds)
+
+        return self._payment_index
+
+    @property
+    def screener(self):
+        if self._screener is None:
+            self._screener = build_screener_index(
+                self.attributes, self.payments, self.isin_df
+            )
+
+        return self._screener
+
+    def store_payloads(self):
+        if self._payloads is None:
+            self._payloads = {
+                "raw_bonds": to_store(self.raw_bonds),
+                "bonds": to_store(self.bonds),
+                "isin_df": to_store(self.isin_df),
+                "trading_bonds": to_store(self.trading_bonds),
+            }
+
+        return self._payloads
+
+
+def universe_version(bonds: pd.DataFrame, auc_date, isin_df: pd.DataFrame):
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(bonds, index=False).values.tobytes())
+    digest.update(str(auc_date).encode())
+    digest.update("".join(isin_df["ISIN"]).encode())
+
+    return digest.hexdigest()[:16]
+
+
+def load_universe():
+
+    exchange_rates = get_exchange_rates()
+
+    raw_bonds, payments = get_bonds_info()
+    raw_bonds = add_exchange_rates(raw_bonds, exchange_rates)
+
+    bonds = normalize_flat_payments(raw_bonds, payments)
+    bonds = calculate_profitability(bonds)
+
+    doc_url, auc_date = get_doc_url_date()
+    auc_date = str(auc_date)
+
+    isin_df = parse_xml_isins(get_auction_xml(doc_url))
+
+    trading_bonds = filter_trading_bonds(isin_df, bonds)
+
+    attributes, payments = compact_bonds(bonds)
+
+    universe = Universe(
+        raw_bonds=raw_bonds,
+        attributes=attributes,
+        payments=payments,
+        bonds_dtypes=bonds.dtypes,
+        auc_date=auc_date,
+        isin_df=isin_df,
+        trading_bonds=trading_bonds,
+        version=universe_version(bonds, auc_date, isin_df),
+    )
+
+    if SAVE_SNAPSHOTS:
+        save_snapshot(universe)
+
+    return universe
+
+
+def universe_from_snapshot(snapshot: dict, date):
+
+    bonds_dtypes = snapshot["bonds_dtypes"]
+
+    bonds = join_bonds(
+        snapshot["attributes"], snapshot["payments"], columns=list(bonds_dtypes.index)
+    )
+    bonds = bonds.astype(bonds_dtypes.to_dict())
+    bonds = truncate_past_dates(bonds, pd.Timestamp(date)).reset_index(drop=True)
+
+    isin_df = snapshot["isin_df"]
+    auc_date = snapshot["auc_date"]
+
+    trading_bonds = filter_trading_bonds(isin_df, bonds)
+
+    attributes, payments = compact_bonds(bonds)
+
+    return Universe(
+        raw_bonds=snapshot["raw_bonds"],
+        attributes=attributes,
+        payments=payments,
+        bonds_dtypes=bonds.dtypes,
+        auc_date=auc_date,
+        isin_df=isin_df,
+        trading_bonds=trading_bonds,
+        version=universe_version(bonds, auc_date, isin_df),
+        as_of=snapshot_key(date),
+    )
+
+
+def get_universe(max_age=UNIVERSE_TTL):
+    global _UNIVERSE
+
+    with _UNIVERSE_LOCK:
+        # a preloaded universe is shared with the forked workers copy-on-write
+        # until it expires, then every worker loads a private copy
+        if _UNIVERSE is None or time.time() - _UNIVERSE.loaded_at > max_age:
+            _UNIVERSE = load_universe()
+
+        return _UNIVERSE
+
+
+def universe_as_of(date=None, max_age=UNIVERSE_TTL):
+
+    if not date or snapshot_key(date) >= snapshot_key():
+        return get_universe(max_age)
+
+    snapshot_date, snapshot_version = find_snapshot(date)
+    key = (snapshot_date, snapshot_version, snapshot_key(date))
+
+    with _UNIVERSE_LOCK:
+        universe = _AS_OF_UNIVERSES.get(key)
+
+        if universe is None:
+            universe = universe_from_snapshot(load_snapshot(snapshot_date), date)
+            _AS_OF_UNIVERSES[key] = universe
+
+        _AS_OF_UNIVERSES.move_to_end(key)
+
+        while len(_AS_OF_UNIVERSES) > SNAPSHOT_CACHE_SIZE:
+            _AS_OF_UNIVERSES.popitem(last=False)
+
+        return universe
+
+
+def current_universe(version):
+
+    for universe in (_UNIVERSE, *_AS_OF_UNIVERSES.copy().values()):
+        if universe is not None and universe.version == version:
+            return universe
+
+    return None
+
+
+def preload_universe():
+
+    universe = get_universe()
+
+    universe.store_payloads()
+    universe.calendar
+    universe.payment_index
+    universe.screener
+
+    gc.collect()
+    gc.freeze()
+
+    return universe
@@ -1,9 +1,33 @@
 import numpy as np
-from bondstool.utils import IMAGE_PATH, get_image_element
+from bondstool.analysis.aggregation import HORIZONS
+from bondstool.analysis.plot import CHART_MODES
+from bondstool.data.screener import SCREENER_SORTS
 from dash import dash_table, dcc, html
 
 SLIDER_STEPS = np.arange(0, 5000, 200)
 
+UPLOAD_STEPS = [
+    "Читання файлу",
+    "Перевірка даних",
+    "Об'єднання з даними облігацій",
+    "Розрахунок аналітики",
+]
+
+SAVED_PORTFOLIO_STORES = [
+    "intermediate-bag",
+    "intermediate-payment-schedule",
+    "intermediate-formatted-bag",
+    "intermediate-monthly-bag",
+    "intermediate-recommended-bonds",
+    "intermediate-base-fig",
+]
+
+UPLOAD_PROGRESS_STYLE = {
+    "display": "block",
+    "width": "95%",
+    "margin": "0 auto",
+}
+
 
 def create_slider(id, index, recommended_bonds):
     if id in recommended_bonds["ISIN"].values:
@@ -26,33 +50,34 @@ def create_slider(id, index, recommended_bonds):
     )
 
 
-TITLE_LAYOUT = html.Div(
-    [
-        html.Div(
-            get_image_element(IMAGE_PATH),
-            style={
-                "flex": "0",
-                "float": "left",
-            },
-        ),
-        html.Div(
-            html.H1(
-                "Аналітика облігацій",
+def get_title_layout(logo=None):
+    return html.Div(
+        [
+            html.Div(
+                logo,
                 style={
-                    "text-align": "center",
-                    "font-size": "30px",
-                    "width": "100%",
-                    "flex": "1",
+                    "flex": "0",
+                    "float": "left",
                 },
             ),
-        ),
-    ],
-    style={
-        "display": "flex",
-        "justify-content": "center",
-        "align-items": "center",
-    },
-)
+            html.Div(
+                html.H1(
+                    "Аналітика облігацій",
+                    style={
+                        "text-align": "center",
+                        "font-size": "30px",
+                        "width": "100%",
+                        "flex": "1",
+                    },
+                ),
+            ),
+        ],
+        style={
+            "display": "flex",
+            "justify-content": "center",
+            "align-items": "center",
+        },
+    )
 
 
 UPLOAD_BUTTON_LAYOUT = html.Div(
@@ -72,6 +97,16 @@ UPLOAD_BUTTON_LAYOUT = html.Div(
                 "cursor": "pointer",
             },
         ),
+        html.Progress(
+            id="upload-progress",
+            value="0",
+            max=str(len(UPLOAD_STEPS)),
+            style={"display": "none"},
+        ),
+        html.Div(
+            id="upload-status",
+            style={"text-align": "center", "font-size": "14px"},
+        ),
         html.H3(
             "Дані відображенні нижче згенеровані автоматично для ПРИКЛАДУ",
             style={
@@ -96,6 +131,50 @@ UPLOAD_BUTTON_LAYOUT = html.Div(
 )
 
 
+PORTFOLIO_STORE_LAYOUT = html.Div(
+    [
+        dcc.Input(id="portfolio-name", type="text", placeholder="Назва портфеля"),
+        html.Button("Зберегти портфель", id="save-portfolio"),
+        dcc.Dropdown(
+            id="saved-portfolios",
+            options=[],
+            placeholder="Збережені портфелі",
+            style={"width": "300px"},
+        ),
+        html.Button("Відкрити", id="open-portfolio"),
+        html.Span(id="portfolio-status"),
+    ],
+    style={
+        "display": "flex",
+        "gap": "10px",
+        "align-items": "center",
+        "justify-content": "center",
+        "margin": "10px",
+    },
+)
+
+
+AS_OF_DATE_LAYOUT = html.Div(
+    [
+        html.Label("Станом на", htmlFor="as-of-date"),
+        dcc.DatePickerSingle(
+            id="as-of-date",
+            placeholder="Сьогодні",
+            display_format="DD-MM-YYYY",
+            first_day_of_week=1,
+            clearable=True,
+        ),
+    ],
+    style={
+        "display": "flex",
+        "gap": "10px",
+        "align-items": "center",
+        "justify-content": "center",
+        "margin": "10px",
+    },
+)
+
+
 AUCTION_DATE_LABEL_LAYOUT = html.Div(
     [
         html.H2(
@@ -127,6 +206,47 @@ RECOMMENDED_LABEL_LAYOUT = html.Div(
 )
 
 
+FORECAST_OPTIONS = [
+    {"label": "Валютні сценарії (USD/EUR)", "value": "fx"},
+    {"label": "Реінвестування виплат", "value": "reinvest"},
+]
+
+# the forecasts are monthly, so they are not shown with weekly totals
+FORECAST_HORIZONS = ["M", "Q", "Y"]
+
+
+FORECAST_OPTIONS_LAYOUT = html.Div(
+    [
+        dcc.RadioItems(
+            id="horizon",
+            options=[
+                {"label": label, "value": freq} for freq, label in HORIZONS.items()
+            ],
+            value="M",
+            inline=True,
+            inputStyle={"margin-right": "5px", "margin-left": "20px"},
+        ),
+        dcc.RadioItems(
+            id="chart-mode",
+            options=[
+                {"label": label, "value": mode} for mode, label in CHART_MODES.items()
+            ],
+            value="svg",
+            inline=True,
+            inputStyle={"margin-right": "5px", "margin-left": "20px"},
+        ),
+        dcc.Checklist(
+            id="forecast-options",
+            options=FORECAST_OPTIONS,
+            value=[],
+            inline=True,
+            inputStyle={"margin-right": "5px", "margin-left": "20px"},
+        ),
+    ],
+    style={"display": "flex", "justify-content": "flex-end"},
+)
+
+
 DROPDOWN_LIST_LAYOUT = dcc.Dropdown(
     id="dropdown",
     options=[],
@@ -147,6 +267,10 @@ BAG_TABLE_LAYOUT = html.Div(
             id="bag-header",
         ),
         dash_table.DataTable(id="bag-table"),
+        html.Div(
+            id="bag-edit-warning",
+            style={"text-align": "center", "margin": "10px", "color": "red"},
+        ),
     ]
 )
 
@@ -170,6 +294,137 @@ SCHEDULE_TABLE_LAYOUT = html.Div(
     ]
 )
 
+CONSOLIDATION_LAYOUT = html.Div(
+    [
+        html.H3(
+            children="Консолідація портфелів",
+            style={
+                "text-align": "center",
+                "margin-top": "20px",
+                "font-size": "20px",
+            },
+        ),
+        dcc.Dropdown(
+            id="consolidated-portfolios",
+            options=[],
+            multi=True,
+            placeholder="Виберіть збережені портфелі",
+        ),
+        html.Div(id="consolidation-status", style={"margin-top": "10px"}),
+        html.Div(
+            [
+                dcc.Graph(id="consolidation-graph"),
+                dash_table.DataTable(id="consolidation-table"),
+                html.Div(
+                    dash_table.DataTable(id="consolidation-schedule"),
+                    style={"margin-top": "10px", "margin-bottom": "20px"},
+                ),
+            ],
+            id="consolidation-output",
+            style={"display": "none"},
+        ),
+    ],
+    style={"margin": "10px"},
+)
+
+SCREENER_FILTER_STYLE = {"min-width": "180px", "flex": "1"}
+
+SCREENER_LAYOUT = html.Div(
+    [
+        html.H3(
+            children="Підбір облігацій",
+            style={
+                "text-align": "center",
+                "margin-top": "20px",
+                "font-size": "20px",
+            },
+        ),
+        html.Div(
+            [
+                dcc.Dropdown(
+                    id="screener-currency",
+                    options=[],
+                    multi=True,
+                    placeholder="Валюта",
+                    style=SCREENER_FILTER_STYLE,
+                ),
+                dcc.Dropdown(
+                    id="screener-type",
+                    options=[],
+                    multi=True,
+                    placeholder="Тип облігацій",
+                    style=SCREENER_FILTER_STYLE,
+                ),
+                dcc.Dropdown(
+                    id="screener-pay-period",
+                    options=[],
+                    multi=True,
+                    placeholder="Період виплат",
+                    style=SCREENER_FILTER_STYLE,
+                ),
+                dcc.DatePickerRange(
+                    id="screener-maturity",
+                    start_date_placeholder_text="Погашення від",
+                    end_date_placeholder_text="Погашення до",
+                    display_format="DD-MM-YYYY",
+                    first_day_of_week=1,
+                    clearable=True,
+                ),
+                dcc.Input(
+                    id="screener-min-profitability",
+                    type="number",
+                    placeholder="Прибутковість від, %",
+                ),
+                dcc.Input(
+                    id="screener-max-profitability",
+                    type="number",
+                    placeholder="Прибутковість до, %",
+                ),
+                dcc.Checklist(
+                    id="screener-auction",
+                    options=[{"label": "Лише на аукціоні", "value": "auction"}],
+                    value=[],
+                    inputStyle={"margin-right": "5px"},
+                ),
+            ],
+            style={
+                "display": "flex",
+                "flex-wrap": "wrap",
+                "gap": "10px",
+                "align-items": "center",
+                "margin": "10px 0",
+            },
+        ),
+        html.Div(
+            [
+                dcc.Dropdown(
+                    id="screener-sort",
+                    options=[
+                        {"label": label, "value": column}
+                        for column, label in SCREENER_SORTS.items()
+                    ],
+                    value="profitability",
+                    clearable=False,
+                    style={"min-width": "220px"},
+                ),
+                dcc.RadioItems(
+                    id="screener-order",
+                    options=[
+                        {"label": "За спаданням", "value": "desc"},
+                        {"label": "За зростанням", "value": "asc"},
+                    ],
+                    value="desc",
+                    inline=True,
+                    inputStyle={"margin-right": "5px", "margin-left": "20px"},
+                ),
+            ],
+            style={"display": "flex", "align-items": "center", "margin": "10px 0"},
+        ),
+        dash_table.DataTable(id="screener-table"),
+    ],
+    style={"margin": "10px"},
+)
+
 DOWNLOAD_BUTTON_LAYOUT = html.Div(
     html.Button(
         "Завантажити ексель",
@@ -203,5 +458,23 @@ DDC_STORE = html.Div(
         dcc.Store(id="intermediate-monthly-bag"),
         dcc.Store(id="intermediate-recommended-bonds"),
         dcc.Store(id="intermediate-base-fig"),
+        dcc.Store(id="intermediate-universe-version"),
+    ]
+)
+
+STORE_IDS = [child.id for child in DDC_STORE.children if isinstance(child, dcc.Store)]
+
+BUDGET_WARNING_STYLE = {
+    "display": "block",
+    "text-align": "center",
+    "margin": "10px",
+    "color": "red",
+}
+
+BUDGET_WARNING_LAYOUT = html.Div(
+    [
+        dcc.Store(id="budget-checks"),
+        dcc.Store(id="budget-warnings", data={}),
+        html.Div(id="budget-warning", style={"display": "none"}),
     ]
 )
@@ -0,0 +1,204 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from bondstool.config import MEMO_MAX_MB, MEMO_SIZE
+
+_CACHES = {}
+_VERSIONED_TYPES = []
+
+
+def versioned(cls):
+    _VERSIONED_TYPES.append(cls)
+    return cls
+
+
+def result_size(value):
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum()) if isinstance(value, pd.DataFrame) else int(usage)
+
+    if isinstance(value, (list, tuple)):
+        return sum(result_size(item) for item in value)
+
+    if isinstance(value, dict):
+        return sum(result_size(item) for item in value.values())
+
+    return 0
+
+
+class MemoCache:
+    def __init__(self, maxsize=MEMO_SIZE, max_bytes=None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.uncacheable = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        size = 0 if self.max_bytes is None else result_size(value)
+
+        with self._lock:
+            self.nbytes += size - self._sizes.get(key, 0)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._entries.move_to_end(key)
+
+            # the newest entry is kept even if it alone exceeds max_bytes
+            while len(self._entries) > self.maxsize or (
+                self.max_bytes is not None
+                and self.nbytes > self.max_bytes
+                and len(self._entries) > 1
+            ):
+                evicted, _ = self._entries.popitem(last=False)
+                self.nbytes -= self._sizes.pop(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+            self.hits = self.misses = self.evictions = self.uncacheable = 0
+
+    def stats(self):
+        calls = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "MB": self.nbytes / 2**20,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "uncacheable": self.uncacheable,
+            "hit_rate": self.hits / calls if calls else 0.0,
+        }
+
+
+def update_digest(digest, value):
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frame = value.to_frame() if isinstance(value, pd.Series) else value
+        digest.update(type(value).__name__.encode())
+        digest.update(repr(list(frame.columns)).encode())
+        digest.update(repr(list(map(str, frame.dtypes))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            update_digest(digest, item)
+
+    elif isinstance(value, dict):
+        digest.update(f"dict{len(value)}".encode())
+        for key in sorted(value, key=repr):
+            update_digest(digest, key)
+            update_digest(digest, value[key])
+
+    elif isinstance(value, (datetime, date)):
+        digest.update(value.isoformat().encode())
+
+    elif isinstance(value, tuple(_VERSIONED_TYPES)):
+        digest.update(f"{type(value).__name__}:{value.version}".encode())
+
+    elif value is None or isinstance(value, (str, bytes, int, float, bool)):
+        digest.update(repr(value).encode())
+
+    else:
+        raise TypeError(f"Cannot hash {type(value).__name__} for memoization.")
+
+
+def content_hash(*values):
+    digest = hashlib.blake2b(digest_size=16)
+
+    for value in values:
+        update_digest(digest, value)
+
+    return digest.hexdigest()
+
+
+def copy_result(value):
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+
+    if isinstance(value, tuple):
+        return tuple(copy_result(item) for item in value)
+
+    if isinstance(value, list):
+        return [copy_result(item) for item in value]
+
+    if isinstance(value, dict):
+        return {key: copy_result(item) for key, item in value.items()}
+
+    return value
+
+
+def memoize(func=None, *, maxsize=MEMO_SIZE):
+
+    if func is None:
+        return functools.partial(memoize, maxsize=maxsize)
+
+    name = f"{func.__module__}.{func.__qualname__}"
+    cache = _CACHES[name] = MemoCache(maxsize, MEMO_MAX_MB * 2**20)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+
+        if cache.maxsize <= 0:
+            return func(*args, **kwargs)
+
+        try:
+            key = content_hash(args, kwargs)
+        except TypeError:
+            cache.uncacheable += 1
+            return func(*args, **kwargs)
+
+        found, result = cache.get(key)
+
+        if found:
+            return copy_result(result)
+
+        result = func(*args, **kwargs)
+        cache.put(key, copy_result(result))
+
+        return result
+
+    wrapper.cache = cache
+
+    return wrapper
+
+
+def memo_stats():
+    return pd.DataFrame.from_dict(
+        {name: cache.stats() for name, cache in _CACHES.items()}, orient="index"
+    )
+
+
+def clear_memo():
+    for cache in _CACHES.values():
+        cache.clear()
@@ -0,0 +1,194 @@
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from bondstool.config import (
+    PROFILE_CALLBACKS,
+    PROFILE_DIR,
+    PROFILE_INTERVAL_MS,
+    PROFILE_TOKEN,
+)
+from flask import g, request
+
+PROFILE_HEADER = "X-BondsTool-Profile"
+PROFILE_FILE_HEADER = "X-BondsTool-Profile-File"
+
+CALLBACK_PATH = "/_dash-update-component"
+
+
+class StackSampler:
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL_MS / 1000):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self.started_at = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+
+        return self.samples
+
+
+def frame_name(frame):
+    name, filename, line = frame
+    path = "/".join(filename.replace("\\", "/").split("/")[-2:])
+
+    return f"{name} ({path}:{line})"
+
+
+def collapsed_stacks(samples: Counter):
+    return "\n".join(
+        f"{';'.join(frame_name(frame) for frame in stack)} {count}"
+        for stack, count in samples.most_common()
+    )
+
+
+def speedscope_profile(samples: Counter, name, interval, elapsed):
+
+    frames, frame_index = [], {}
+    stacks, weights = [], []
+
+    for stack, count in samples.items():
+        indexes = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            indexes.append(frame_index[frame])
+
+        stacks.append(indexes)
+        weights.append(count * interval * 1000)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "bondstool",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": max(elapsed * 1000, sum(weights)),
+                "samples": stacks,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def profile_stem(name, input_bytes, elapsed):
+    callback = re.sub(r"[^\w.-]+", "_", name).strip("._")[:80] or "callback"
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+    return f"{timestamp}-{callback}-{input_bytes}b-{elapsed * 1000:.0f}ms"
+
+
+def write_profile(sampler: StackSampler, name, input_bytes, directory=None):
+
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+
+    stem = os.path.join(directory, profile_stem(name, input_bytes, sampler.elapsed))
+
+    with open(stem + ".collapsed.txt", "w", encoding="utf-8") as collapsed_file:
+        collapsed_file.write(collapsed_stacks(sampler.samples))
+
+    with open(stem + ".speedscope.json", "w", encoding="utf-8") as speedscope_file:
+        json.dump(
+            speedscope_profile(
+                sampler.samples, name, sampler.interval, sampler.elapsed
+            ),
+            speedscope_file,
+        )
+
+    return stem
+
+
+def input_size(values):
+    return sum(len(value) for value in values if isinstance(value, (str, bytes)))
+
+
+def profile_callback(func):
+
+    if not PROFILE_CALLBACKS:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        sampler = StackSampler().start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sampler.stop()
+            write_profile(sampler, func.__name__, input_size([*args, *kwargs.values()]))
+
+    return wrapper
+
+
+def profiling_requested():
+    if request.path != CALLBACK_PATH:
+        return False
+
+    token = request.headers.get(PROFILE_HEADER)
+
+    return PROFILE_CALLBACKS or bool(PROFILE_TOKEN and token == PROFILE_TOKEN)
+
+
+def start_request_profile():
+    if profiling_requested():
+        g.profile_sampler = StackSampler().start()
+
+
+def finish_request_profile(response):
+
+    sampler = g.pop("profile_sampler", None)
+
+    if sampler is None:
+        return response
+
+    sampler.stop()
+
+    body = request.get_json(silent=True) or {}
+    name = body.get("output", "callback")
+
+    stem = write_profile(sampler, name, request.content_length or 0)
+    response.headers[PROFILE_FILE_HEADER] = os.path.basename(stem)
+
+    return response
+
+
+def register_profiler(server):
+    server.before_request(start_request_profile)
+    server.after_request(finish_request_profile)
@@ -0,0 +1,33 @@
+import argparse
+
+from bondstool.data.compact import compaction_ratio, frame_memory_report
+
+
+def universe_frames(as_of=None):
+    from bondstool.data.universe import universe_as_of
+
+    universe = universe_as_of(as_of)
+
+    return (
+        {"bonds": universe.bonds},
+        {"attributes": universe.attributes, "payments": universe.payments},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the memory of the joined and the compacted bonds frames."
+    )
+    parser.add_argument("--as-of")
+    args = parser.parse_args()
+
+    before, after = universe_frames(args.as_of)
+
+    report = frame_memory_report({**before, **after})
+
+    print(report.round(2).to_string())
+    print(f"\nCompaction ratio: {compaction_ratio(before, after):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import subprocess
+import sys
+
+import pandas as pd
+
+
+def measure_import_time(module="bondstool.app"):
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        )
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report module import times.")
+    parser.add_argument("module", nargs="?", default="bondstool.app")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    report = measure_import_time(args.module)
+    total = report.loc[report["module"] == args.module, "cumulative_ms"].max()
+
+    print(f"Total import time of {args.module}: {total:.1f} ms\n")
+    print(
+        report.sort_values(by="cumulative_ms", ascending=False)
+        .head(args.top)
+        .to_string(index=False)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import requests
+
+CALLBACK_PATH = "/_dash-update-component"
+DEFAULT_BAG_PATH = "assets/example_bag.xlsx"
+
+POLL_INTERVAL = 0.05
+POLL_TIMEOUT = 120
+MEMORY_INTERVAL = 0.2
+
+STEP_OUTPUTS = {
+    "get_bag": "intermediate-raw-bonds.data",
+    "sliders": "sliders.children",
+    "bag_table": "bag-table.data",
+    "schedule_table": "payment-schedule.data",
+    "figure": "graph-with-slider.figure",
+    "search": "search-output.children",
+    "download": "download-dataframe-xlsx.data",
+}
+
+
+class ReplayResponse:
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+        self.encoding = "utf-8"
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding)
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def recording_name(url):
+    return hashlib.sha1(url.encode()).hexdigest()[:16] + ".bin"
+
+
+def record_upstream(directory):
+    from bondstool.data.universe import load_universe
+
+    os.makedirs(directory, exist_ok=True)
+    original_get = requests.get
+    index = {}
+
+    def recording_get(url=None, *args, **kwargs):
+        kwargs.pop("stream", None)
+        response = original_get(url, *args, **kwargs)
+        response.raise_for_status()
+
+        index[url] = recording_name(url)
+        with open(os.path.join(directory, index[url]), "wb") as recording:
+            recording.write(response.content)
+
+        return ReplayResponse(response.content)
+
+    requests.get = recording_get
+    try:
+        load_universe()
+    finally:
+        requests.get = original_get
+
+    with open(os.path.join(directory, "index.json"), "w") as index_file:
+        json.dump(index, index_file, indent=2)
+
+    return index
+
+
+@contextmanager
+def replay_upstream(directory):
+
+    with open(os.path.join(directory, "index.json")) as index_file:
+        index = json.load(index_file)
+
+    def replay_get(url=None, *args, **kwargs):
+        if url not in index:
+            raise KeyError(f"No recorded upstream response for {url}.")
+
+        with open(os.path.join(directory, index[url]), "rb") as recording:
+            return ReplayResponse(recording.read())
+
+    original_get = requests.get
+    requests.get = replay_get
+    try:
+        yield
+    finally:
+        requests.get = original_get
+
+
+class CallbackClient:
+    def __init__(self, url=None):
+        self.url = url
+
+        if url is None:
+            from bondstool.app import server
+
+            self.client = server.test_client()
+        else:
+            self.client = requests.Session()
+
+    def request(self, method, path, payload=None, query=None):
+
+        if self.url is None:
+            response = self.client.open(
+                path, method=method, json=payload, query_string=query
+            )
+            return response.status_code, response.get_json(silent=True)
+
+        response = self.client.request(
+            method, self.url.rstrip("/") + path, json=payload, params=query
+        )
+        try:
+            return response.status_code, response.json()
+        except ValueError:
+            return response.status_code, None
+
+
+def split_prop_id(prop_id):
+    component, prop = prop_id.rsplit(".", 1)
+
+    if component.startswith("{"):
+        component = json.loads(component)
+
+    return component, prop.split("@")[0]
+
+
+def dependency_outputs(dep):
+    output = dep["output"]
+
+    if output.startswith(".."):
+        return [split_prop_id(part) for part in output[2:-2].split("...")]
+
+    return [split_prop_id(output)]
+
+
+def find_dependency(deps, output=None, background=False):
+
+    for dep in deps:
+        if background and dep.get("long"):
+            return dep
+
+        outputs = [f"{component}.{prop}" for component, prop in dependency_outputs(dep)]
+        if output in outputs:
+            return dep
+
+    raise KeyError(f"No callback found for {output or 'the background upload'}.")
+
+
+def value_key(component, prop):
+
+    if isinstance(component, dict):
+        return f"{component['type']}.{prop}"
+
+    return f"{component}.{prop}"
+
+
+def dependency_entries(specs, values):
+
+    entries = []
+    for spec in specs:
+        component, prop = split_prop_id(f"{spec['id']}.{spec['property']}")
+        value = values.get(value_key(component, prop))
+
+        if isinstance(component, dict):
+            entries.append(
+                [
+                    {"id": concrete, "property": prop, "value": item}
+                    for concrete, item in value or []
+                ]
+            )
+        else:
+            entries.append({"id": component, "property": prop, "value": value})
+
+    return entries
+
+
+def dependency_payload(dep, values, changed):
+
+    outputs = [
+        {"id": component, "property": prop}
+        for component, prop in dependency_outputs(dep)
+    ]
+
+    return {
+        "output": dep["output"],
+        "outputs": outputs if dep["output"].startswith("..") else outputs[0],
+        "inputs": dependency_entries(dep["inputs"], values),
+        "state": dependency_entries(dep.get("state", []), values),
+        "changedPropIds": changed,
+    }
+
+
+def layout_values(node, values=None):
+
+    values = {} if values is None else values
+
+    if isinstance(node, list):
+        for child in node:
+            layout_values(child, values)
+
+    elif isinstance(node, dict) and "props" in node:
+        props = node["props"]
+
+        if isinstance(props.get("id"), str):
+            for prop, value in props.items():
+                if prop not in ("id", "children"):
+                    values[f"{props['id']}.{prop}"] = value
+
+        layout_values(props.get("children"), values)
+
+    return values
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+class MemorySampler:
+    def __init__(self, pids, interval=MEMORY_INTERVAL):
+        self.pids = pids
+        self.interval = interval
+        self.peaks = defaultdict(float)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            for pid in self.pids:
+                rss = rss_mb(pid)
+                if rss is not None:
+                    self.peaks[pid] = max(self.peaks[pid], rss)
+
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class Session:
+    def __init__(self, client: CallbackClient, deps, layout, bag_contents, seed):
+        self.client = client
+        self.deps = deps
+        self.values = layout_values(layout)
+        self.bag_contents = bag_contents
+        self.random = random.Random(seed)
+        self.timings = []
+
+    def update_values(self, data):
+        for component, props in (data or {}).get("response", {}).items():
+            for prop, value in props.items():
+                self.values[f"{component}.{prop.split('@')[0]}"] = value
+
+    def poll(self, payload, data):
+        query = {"cacheKey": data["cacheKey"], "job": data["job"]}
+        deadline = time.perf_counter() + POLL_TIMEOUT
+
+        while time.perf_counter() < deadline:
+            time.sleep(POLL_INTERVAL)
+            status, data = self.client.request("POST", CALLBACK_PATH, payload, query)
+
+            if status != 200 or "response" in (data or {}):
+                return status, data
+
+        raise TimeoutError("Background callback did not finish in time.")
+
+    def call(self, step, changed, dep=None):
+
+        dep = dep or find_dependency(self.deps, STEP_OUTPUTS[step])
+        payload = dependency_payload(dep, self.values, changed)
+
+        started = time.perf_counter()
+        status, data = self.client.request("POST", CALLBACK_PATH, payload)
+
+        if status == 200 and dep.get("long") and "cacheKey" in (data or {}):
+            status, data = self.poll(payload, data)
+
+        elapsed = (time.perf_counter() - started) * 1000
+
+        self.timings.append({"step": step, "ms": elapsed, "ok": status in (200, 204)})
+        if status >= 400:
+            raise RuntimeError(f"{step} failed with HTTP {status}.")
+
+        self.update_values(data)
+
+        return data
+
+    def isin_count(self):
+        return len(self.values.get("sliders.children") or [])
+
+    def refresh_tables(self):
+        self.call("sliders", ["intermediate-recommended-bonds.data"])
+        self.call("bag_table", ["intermediate-formatted-bag.data"])
+        self.call("schedule_table", ["intermediate-payment-schedule.data"])
+
+    def run(self, slider_moves=5, search_text="UA4000"):
+
+        self.values["dummy-trigger.n_clicks"] = None
+        self.call("get_bag", ["dummy-trigger.n_clicks"])
+        self.refresh_tables()
+
+        self.values["upload-data.contents"] = self.bag_contents
+        self.values["upload-data.filename"] = os.path.basename(DEFAULT_BAG_PATH)
+        self.call(
+            "upload",
+            ["upload-data.contents"],
+            find_dependency(self.deps, background=True),
+        )
+        self.refresh_tables()
+
+        for _ in range(slider_moves):
+            self.values["isin_slider.value"] = [
+                (
+                    {"type": "isin_slider", "index": index},
+                    self.random.choice(range(0, 5000, 200)),
+                )
+                for index in range(self.isin_count())
+            ]
+            self.call("figure", ['{"index":0,"type":"isin_slider"}.value'])
+
+        for end in range(1, len(search_text) + 1):
+            self.values["search-input.value"] = search_text[:end]
+            self.call("search", ["search-input.value"])
+
+        self.values["btn_xlsx.n_clicks"] = 1
+        self.call("download", ["btn_xlsx.n_clicks"])
+
+        return self.timings
+
+
+def summarize_timings(timings, elapsed):
+
+    df = pd.DataFrame(timings)
+
+    summary = df.groupby("step", sort=False).agg(
+        calls=("ms", "size"),
+        errors=("ok", lambda ok: int((~ok).sum())),
+        mean_ms=("ms", "mean"),
+        p50_ms=("ms", lambda ms: np.percentile(ms, 50)),
+        p90_ms=("ms", lambda ms: np.percentile(ms, 90)),
+        p99_ms=("ms", lambda ms: np.percentile(ms, 99)),
+    )
+    summary["per_sec"] = summary["calls"] / elapsed
+
+    return summary
+
+
+def run_load_test(
+    sessions=10,
+    concurrency=None,
+    url=None,
+    pids=None,
+    bag_path=DEFAULT_BAG_PATH,
+    slider_moves=5,
+    seed=0,
+):
+
+    with open(bag_path, "rb") as bag_file:
+        bag_contents = (
+            "data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;"
+            "base64," + base64.b64encode(bag_file.read()).decode()
+        )
+
+    probe = CallbackClient(url)
+    _, deps = probe.request("GET", "/_dash-dependencies")
+    _, layout = probe.request("GET", "/_dash-layout")
+
+    pids = pids or ([os.getpid()] if url is None else [])
+
+    def run_session(number):
+        session = Session(
+            CallbackClient(url), deps, layout, bag_contents, seed + number
+        )
+        try:
+            session.run(slider_moves)
+        except Exception as error:
+            session.timings.append({"step": "session", "ms": 0.0, "ok": False})
+            print(f"Session {number} failed: {error}")
+
+        return session.timings
+
+    started = time.perf_counter()
+    with MemorySampler(pids) as memory:
+        with ThreadPoolExecutor(max_workers=concurrency or sessions) as executor:
+            results = list(executor.map(run_session, range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    timings = [timing for session_timings in results for timing in session_timings]
+
+    report = {
+        "sessions": sessions,
+        "elapsed_s": elapsed,
+        "calls": len(timings),
+        "calls_per_sec": len(timings) / elapsed,
+        "sessions_per_sec": sessions / elapsed,
+        "peak_rss_mb": dict(memory.peaks),
+    }
+
+    return report, summarize_timings(timings, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive concurrent sessions through the Dash callback chain."
+    )
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--slider-moves", type=int, default=5)
+    parser.add_argument("--url", help="Base URL of a running instance.")
+    parser.add_argument(
+        "--pid", type=int, action="append", help="Worker PID to sample memory of."
+    )
+    parser.add_argument("--bag", default=DEFAULT_BAG_PATH)
+    parser.add_argument("--record", help="Record upstream responses to a directory.")
+    parser.add_argument("--replay", help="Replay upstream responses from a directory.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.record:
+        index = record_upstream(args.record)
+        print(f"Recorded {len(index)} upstream responses to {args.record}")
+        return
+
+    def run():
+        return run_load_test(
+            sessions=args.sessions,
+            concurrency=args.concurrency,
+            url=args.url,
+            pids=args.pid,
+            bag_path=args.bag,
+            slider_moves=args.slider_moves,
+            seed=args.seed,
+        )
+
+    if args.replay and not args.url:
+        with replay_upstream(args.replay):
+            report, summary = run()
+    else:
+        report, summary = run()
+
+    print(
+        f"{report['sessions']} sessions, {report['calls']} calls in "
+        f"{report['elapsed_s']:.1f} s: {report['calls_per_sec']:.1f} calls/s, "
+        f"{report['sessions_per_sec']:.2f} sessions/s\n"
+    )
+    print(summary.round(1).to_string())
+
+    for pid, peak in report["peak_rss_mb"].items():
+        print(f"\nPeak RSS of worker {pid}: {peak:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
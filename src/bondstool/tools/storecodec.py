@@ -0,0 +1,79 @@
+import argparse
+import time
+
+import pandas as pd
+from bondstool.utils import read_json, to_store
+
+
+def best_time(func, repeat):
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+
+    return min(timings) * 1000, result
+
+
+def compare_store_codecs(frames: dict, repeat=5):
+
+    rows = []
+    for name, df in frames.items():
+        row = {"frame": name, "rows": len(df)}
+
+        for codec in ("json", "binary"):
+            encode_ms, payload = best_time(lambda: to_store(df, codec), repeat)
+            decode_ms, _ = best_time(lambda: read_json(payload), repeat)
+
+            row[f"{codec}_kb"] = len(payload) / 1024
+            row[f"{codec}_encode_ms"] = encode_ms
+            row[f"{codec}_decode_ms"] = decode_ms
+
+        row["size_ratio"] = row["json_kb"] / row["binary_kb"]
+        row["decode_speedup"] = row["json_decode_ms"] / row["binary_decode_ms"]
+        rows.append(row)
+
+    return pd.DataFrame(rows).set_index("frame")
+
+
+def store_frames():
+    from bondstool.data.bag import get_bag_views, merge_bonds_info, read_example_bag
+    from bondstool.data.universe import get_universe
+
+    universe = get_universe()
+
+    bag = merge_bonds_info(read_example_bag(), index=universe.payment_index)
+    views = get_bag_views(bag, None, universe.calendar)
+
+    return {
+        "raw_bonds": universe.raw_bonds,
+        "bonds": universe.bonds,
+        "trading_bonds": universe.trading_bonds,
+        "isin_df": universe.isin_df,
+        "bag": bag,
+        "schedule": views["schedule"],
+        "formatted": views["formatted"],
+        "monthly": views["monthly"].reset_index(),
+        "recommendations": views["recommendations"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare JSON and binary encodings of the Dash stores."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = compare_store_codecs(store_frames(), args.repeat)
+
+    print(report.round(2).to_string())
+    print(
+        f"\nTotal: {report['json_kb'].sum():.1f} KB JSON, "
+        f"{report['binary_kb'].sum():.1f} KB binary"
+    )
+
+
+if __name__ == "__main__":
+    main()
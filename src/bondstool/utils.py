@@ -1,13 +1,14 @@
-import base64
 import io
 import os
 from datetime import datetime
 from io import StringIO
 
 import pandas as pd
+from bondstool.codec import decode_frame, encode_frame, is_binary_store
+from bondstool.config import ASSETS_FOLDER, STORE_CODEC
 from dash import html
 
-IMAGE_PATH = "assets/logo.png"
+LOGO_FILE = "logo.png"
 
 JSON_STORE_KWARGS = {"date_format": "iso", "orient": "split"}
 
@@ -50,9 +51,13 @@ def truncate_past_dates(df: pd.DataFrame, date=None, date_col="pay_date"):
     return df.loc[df[date_col] >= date]
 
 
-def split_dataframe(df: pd.DataFrame, column="pay_date"):
+def split_dataframe(df: pd.DataFrame, column="pay_date", date=None):
 
     condition = pd.isna(df[column])
+
+    if date:
+        condition |= df[column] < pd.Timestamp(date)
+
     df_satisfying = df[condition]
     df_not_satisfying = df[~condition]
 
@@ -76,7 +81,7 @@ def get_style_by_condition(
     return style_conditional
 
 
-def get_xlsx(bag: pd.DataFrame, schedule: pd.DataFrame):
+def get_xlsx(bag: pd.DataFrame, schedule: pd.DataFrame, valuation=None):
 
     with io.BytesIO() as bytes_io:
 
@@ -84,6 +89,8 @@ def get_xlsx(bag: pd.DataFrame, schedule: pd.DataFrame):
 
             bag.to_excel(xslx_writer, sheet_name="Bag", index=False)
             schedule.to_excel(xslx_writer, sheet_name="Schedule", index=False)
+            if valuation is not None:
+                valuation.to_excel(xslx_writer, sheet_name="Valuation", index=False)
 
             for sheet in xslx_writer.sheets.values():
                 sheet.autofit()
@@ -93,25 +100,11 @@ def get_xlsx(bag: pd.DataFrame, schedule: pd.DataFrame):
         return bytes_io.getvalue()
 
 
-def encode_image(image_path):
-
-    if os.path.exists(image_path):
-
-        with open(image_path, "rb") as f:
-            image_base64 = base64.b64encode(f.read()).decode("utf-8")
-
-        return image_base64
-
-    return None
-
+def get_image_element(app, file_name):
 
-def get_image_element(image_path):
-
-    encoded_image = encode_image(image_path)
-
-    if encoded_image:
+    if os.path.exists(os.path.join(ASSETS_FOLDER, file_name)):
         return html.Img(
-            src="data:image/png;base64,{}".format(encoded_image),
+            src=app.get_asset_url(file_name),
             style={
                 "width": "auto",
                 "height": "80px",
@@ -124,12 +117,23 @@ def get_image_element(image_path):
         return None
 
 
+def to_store(df: pd.DataFrame, codec=None):
+
+    if (codec or STORE_CODEC) == "json":
+        return df.to_json(**JSON_STORE_KWARGS)
+
+    return encode_frame(df)
+
+
 def read_json(data, date_columns=None, index_col=None, orient="split"):
-    if isinstance(data, str):
-        data = StringIO(data)
+    if is_binary_store(data):
+        df = decode_frame(data)
+    else:
+        if isinstance(data, str):
+            data = StringIO(data)
 
-    convert_dates = True if date_columns is None else date_columns
-    df = pd.read_json(data, orient=orient, convert_dates=convert_dates)
+        convert_dates = True if date_columns is None else date_columns
+        df = pd.read_json(data, orient=orient, convert_dates=convert_dates)
 
     if index_col is not None:
         df.set_index(index_col, inplace=True)
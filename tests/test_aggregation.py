@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bondstool.analysis.aggregation import (
+    _ACCUMULATORS,
+    aggregate_contributions,
+    aggregate_payments,
+)
+from bondstool.analysis.utils import calc_potential_payments, payments_by_month
+
+
+def with_month_end(df: pd.DataFrame):
+    return df.assign(month_end=df["pay_date"] + pd.offsets.MonthEnd(0))
+
+
+@pytest.fixture
+def bag():
+    return with_month_end(
+        pd.DataFrame(
+            {
+                "ISIN": ["UA1", "UA1", "UA2", "UA2"],
+                "pay_date": pd.to_datetime(
+                    ["2024-02-10", "2024-08-10", "2024-03-31", "2024-06-01"]
+                ),
+                "total_pay_val": [800.0, 10800.0, 450.0, 10450.0],
+            }
+        )
+    )
+
+
+@pytest.fixture
+def trading_bonds():
+    return with_month_end(
+        pd.DataFrame(
+            {
+                "ISIN": ["UA3", "UA3", "UA4"],
+                "pay_date": pd.to_datetime(["2024-03-15", "2024-09-15", "2024-05-20"]),
+                "pay_val": [50.0, 1050.0, 1100.0],
+                "exchange_rate": [1.0, 1.0, 40.0],
+            }
+        )
+    )
+
+
+def test_bag_buckets_match_payments_by_month(bag, trading_bonds):
+
+    bag_payments, _ = aggregate_contributions(
+        bag, trading_bonds, [0, 0], ["UA3", "UA4"]
+    )
+    reference = payments_by_month(bag)["total_pay_val"]
+
+    totals = bag_payments["total_pay_val"]
+    np.testing.assert_allclose(
+        totals.reindex(reference.index).to_numpy(), reference.to_numpy()
+    )
+    assert totals.drop(reference.index).eq(0).all()
+
+
+def test_potential_payments_match_payment_matrix(bag, trading_bonds):
+
+    amounts, isins = [3, 2], ["UA3", "UA4"]
+
+    _, potential = aggregate_payments(bag, trading_bonds, amounts, isins)
+    reference = calc_potential_payments(
+        trading_bonds,
+        amounts,
+        payments_by_month(bag),
+        pd.DataFrame({"ISIN": isins}),
+    )["total_pay_val"]
+
+    totals = potential["total_pay_val"]
+    np.testing.assert_allclose(
+        totals.reindex(reference.index, fill_value=0).to_numpy(), reference.to_numpy()
+    )
+    assert totals.sum() == pytest.approx(reference.sum())
+
+
+def test_accumulators_are_reused_per_version(bag, trading_bonds):
+
+    _ACCUMULATORS.clear()
+
+    monthly, _ = aggregate_payments(
+        bag, trading_bonds, [1, 1], ["UA3", "UA4"], version="v1"
+    )
+    quarterly, _ = aggregate_payments(
+        bag, trading_bonds, [1, 1], ["UA3", "UA4"], freq="Q", version="v1"
+    )
+
+    assert _ACCUMULATORS.stats()["misses"] == 1
+    assert _ACCUMULATORS.stats()["hits"] == 1
+    assert quarterly["total_pay_val"].sum() == pytest.approx(
+        monthly["total_pay_val"].sum()
+    )
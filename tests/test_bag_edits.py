@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+from bondstool.data.bag import (
+    apply_position_edits,
+    get_bag_views,
+    merge_bonds_info,
+    update_bag_views,
+)
+
+DATE = "2024-05-01"
+
+
+@pytest.fixture
+def bonds():
+    bonds = pd.DataFrame(
+        {
+            "ISIN": ["UA1", "UA1", "UA2", "UA2", "UA2", "UA3"],
+            "pay_date": pd.to_datetime(
+                [
+                    "2024-07-01",
+                    "2025-01-01",
+                    "2024-03-01",
+                    "2024-09-01",
+                    "2025-03-01",
+                    "2024-04-15",
+                ]
+            ),
+            "pay_val": [80.0, 1080.0, 45.0, 45.0, 1045.0, 1100.0],
+            "type": ["ОВДП", "ОВДП", "ОВДП", "ОВДП", "ОВДП", "військові облігації"],
+            "currency": ["UAH", "UAH", "USD", "USD", "USD", "UAH"],
+            "exchange_rate": [1.0, 1.0, 40.0, 40.0, 40.0, 1.0],
+        }
+    )
+    return bonds.assign(month_end=bonds["pay_date"] + pd.offsets.MonthEnd(0))
+
+
+@pytest.fixture
+def bag(bonds):
+    positions = pd.DataFrame(
+        {
+            "ISIN": ["UA1", "UA2", "UA3"],
+            "quantity": [10, 5, 3],
+            "expenditure": [10100.0, 204000.0, 3050.0],
+            "tax": [0.18, 0.18, 0.0],
+        }
+    )
+    return merge_bonds_info(positions, bonds)
+
+
+@pytest.mark.parametrize(
+    "edits",
+    [
+        {"ISIN": ["UA1"], "quantity": [12], "expenditure": [12150.0], "tax": [0.18]},
+        {"ISIN": ["UA2"], "quantity": [5], "expenditure": [200000.0], "tax": [0.0]},
+        {
+            "ISIN": ["UA1", "UA3"],
+            "quantity": [0, 7],
+            "expenditure": [0.0, 7100.0],
+            "tax": [0.18, 0.0],
+        },
+    ],
+)
+def test_incremental_edits_match_full_recompute(bonds, bag, edits):
+
+    edits = pd.DataFrame(edits)
+    views = get_bag_views(bag, bonds, date=DATE)
+
+    updated, _ = update_bag_views(views, bag, edits, bonds, date=DATE)
+    reference = get_bag_views(apply_position_edits(bag, edits), bonds, date=DATE)
+
+    for view in ["formatted", "schedule", "monthly", "recommendations"]:
+        pd.testing.assert_frame_equal(
+            updated.get(view, views[view]), reference[view], check_dtype=False
+        )
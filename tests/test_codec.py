@@ -0,0 +1,119 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from bondstool.codec import decode_frame, encode_frame
+
+
+def round_trip(df):
+    return decode_frame(encode_frame(df))
+
+
+def test_typed_columns():
+
+    df = pd.DataFrame(
+        {
+            "quantity": np.array([1, 2, 3], dtype=np.int32),
+            "pay_val": [1.5, np.nan, 3.0],
+            "currency": pd.Categorical(["UAH", "USD", "UAH"]),
+            "pay_date": pd.to_datetime(["2024-01-31", None, "2024-03-31"]),
+            "saved_at": pd.to_datetime(["2024-01-01"] * 3).tz_localize("Europe/Kyiv"),
+            "ISIN": ["UA1", None, "UA3"],
+        },
+        index=pd.DatetimeIndex(["2024-01-31", "2024-02-29", "2024-03-31"]),
+    )
+    df.index.name = "month_end"
+    df.columns.name = "field"
+
+    pd.testing.assert_frame_equal(round_trip(df), df)
+
+
+def test_range_index():
+
+    df = pd.DataFrame({"value": [1.0, 2.0]}, index=pd.RangeIndex(2, 6, 2))
+
+    pd.testing.assert_frame_equal(round_trip(df), df)
+
+
+def test_numpy_scalars_in_object_column():
+
+    values = [np.int64(1), np.float32(2.5), np.bool_(True), "x", None]
+    df = pd.DataFrame({"mixed": pd.Series(values, dtype=object)})
+
+    decoded = round_trip(df)
+
+    pd.testing.assert_frame_equal(decoded, df)
+    assert [type(value) for value in decoded["mixed"]] == [
+        type(value) for value in values
+    ]
+
+
+def test_timestamps_in_object_columns():
+
+    df = pd.DataFrame(
+        {
+            "maturity": pd.Series(["Погашена", pd.Timestamp("2027-01-01")]),
+            "dates": pd.Series(
+                [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-06-30")], dtype=object
+            ),
+        }
+    )
+
+    decoded = round_trip(df)
+
+    pd.testing.assert_frame_equal(decoded, df)
+    assert decoded["maturity"][1] == pd.Timestamp("2027-01-01")
+
+
+def test_dates_stay_dates():
+
+    df = pd.DataFrame(
+        {"issue_date": [datetime.date(2024, 1, 1), datetime.date(2024, 2, 1)]}
+    )
+
+    decoded = round_trip(df)
+
+    pd.testing.assert_frame_equal(decoded, df)
+    assert type(decoded["issue_date"][0]) is datetime.date
+
+
+def test_multi_index():
+
+    index = pd.MultiIndex.from_tuples(
+        [("UA1", pd.Timestamp("2024-01-31")), ("UA2", pd.Timestamp("2024-02-29"))],
+        names=["ISIN", "month_end"],
+    )
+    columns = pd.MultiIndex.from_tuples(
+        [("pay", "UAH"), ("pay", "USD")], names=["value", "currency"]
+    )
+    df = pd.DataFrame([[1.0, 2.0], [3.0, 4.0]], index=index, columns=columns)
+
+    pd.testing.assert_frame_equal(round_trip(df), df)
+
+
+def test_timestamp_column_labels():
+
+    dates = pd.date_range("2024-01-31", periods=3, freq="ME", name="date")
+    df = pd.DataFrame(np.ones((2, 3)), index=pd.Index(["UA1", "UA2"]), columns=dates)
+    df.index.name = "ISIN"
+
+    pd.testing.assert_frame_equal(round_trip(df), df)
+
+
+def test_unsupported_values_are_rejected():
+
+    df = pd.DataFrame({"value": pd.Series([object()], dtype=object)})
+
+    with pytest.raises(TypeError):
+        encode_frame(df)
+
+
+def test_object_index_of_timestamps():
+
+    index = pd.Index(
+        [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-02")], dtype=object
+    )
+    df = pd.DataFrame({"value": [1, 2]}, index=index)
+
+    pd.testing.assert_frame_equal(round_trip(df), df)
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bondstool.data.compact import compact_bonds, compaction_ratio, join_bonds
+
+
+@pytest.fixture
+def bonds():
+    n_bonds, n_payments = 60, 10
+    isins = np.repeat([f"UA{i:010d}" for i in range(n_bonds)], n_payments)
+    pay_dates = pd.date_range("2024-01-15", periods=n_payments, freq="6MS")
+
+    return pd.DataFrame(
+        {
+            "ISIN": isins,
+            "nominal": 1000,
+            "type": np.repeat(
+                np.where(np.arange(n_bonds) % 3, "ОВДП", "військові облігації"),
+                n_payments,
+            ),
+            "currency": np.repeat(["UAH", "USD", "EUR"] * (n_bonds // 3), n_payments),
+            "issue_date": np.repeat(
+                [f"2023-01-{day % 28 + 1:02d}" for day in range(n_bonds)], n_payments
+            ),
+            "pay_date": np.tile(pay_dates, n_bonds),
+            "pay_val": np.tile(np.linspace(40.0, 1040.0, n_payments), n_bonds),
+            "exchange_rate": 1.0,
+        }
+    ).assign(month_end=lambda df: df["pay_date"] + pd.offsets.MonthEnd(0))
+
+
+def test_compaction_shrinks_the_bonds_frame(bonds):
+
+    attributes, payments = compact_bonds(bonds)
+
+    ratio = compaction_ratio(
+        {"bonds": bonds}, {"attributes": attributes, "payments": payments}
+    )
+
+    assert ratio > 3
+    assert attributes["type"].dtype == "category"
+    assert payments["ISIN"].dtype == "category"
+
+
+def test_compacted_bonds_join_back(bonds):
+
+    attributes, payments = compact_bonds(bonds)
+
+    joined = join_bonds(attributes, payments, columns=list(bonds.columns))
+
+    pd.testing.assert_frame_equal(joined.astype(bonds.dtypes.to_dict()), bonds)
@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from bondstool.data import consolidation
+from bondstool.data.bag import SUMS_ROW_LABEL, get_bag_views, live_bag
+from bondstool.data.calendar import build_payment_calendar
+from bondstool.data.consolidation import (
+    SAVED_VIEWS,
+    consolidate,
+    get_portfolio_views,
+)
+from bondstool.data.payment_index import build_payment_index
+from bondstool.data.portfolios import save_portfolio
+from bondstool.utils import to_store
+
+AS_OF = "2024-01-01"
+
+
+@pytest.fixture
+def universe():
+    bonds = pd.DataFrame(
+        {
+            "ISIN": ["UA1", "UA1", "UA2", "UA2", "UA2", "UA3"],
+            "pay_date": pd.to_datetime(
+                [
+                    "2024-07-01",
+                    "2025-01-01",
+                    "2024-04-01",
+                    "2024-10-01",
+                    "2025-04-01",
+                    "2024-10-15",
+                ]
+            ),
+            "pay_val": [80.0, 1080.0, 45.0, 45.0, 1045.0, 1100.0],
+            "type": ["ОВДП"] * 6,
+            "currency": ["UAH", "UAH", "USD", "USD", "USD", "UAH"],
+            "exchange_rate": [1.0, 1.0, 40.0, 40.0, 40.0, 1.0],
+        }
+    )
+    bonds["month_end"] = bonds["pay_date"] + pd.offsets.MonthEnd(0)
+
+    return SimpleNamespace(
+        version="v1",
+        as_of=AS_OF,
+        payment_index=build_payment_index(bonds),
+        calendar=build_payment_calendar(bonds, "v1"),
+    )
+
+
+def make_positions(isins, quantity=10):
+    return pd.DataFrame(
+        {
+            "ISIN": isins,
+            "quantity": [quantity] * len(isins),
+            "expenditure": [1000.0 * quantity] * len(isins),
+            "tax": [0.18] * len(isins),
+        }
+    )
+
+
+def save(name, positions, universe, path, version="v0", payloads=None):
+    bag = universe.payment_index.gather(positions)
+    bag["total_pay_val"] = bag["pay_val"] * bag["quantity"] * bag["exchange_rate"]
+    save_portfolio(name, bag, payloads or {}, version, path)
+
+
+def reference_views(positions, universe):
+    bag = live_bag(positions, universe)
+    return get_bag_views(bag, None, universe.calendar, universe.as_of)
+
+
+def test_dead_portfolios_are_skipped(universe, tmp_path):
+
+    path = str(tmp_path / "portfolios.db")
+    save("live", make_positions(["UA1", "UA2"]), universe, path)
+    save("dead", make_positions(["UA9"]), universe, path)
+
+    portfolios, dead = get_portfolio_views(["live", "dead"], universe, path)
+
+    assert dead == ["dead"]
+    assert [portfolio.name for portfolio in portfolios] == ["live"]
+
+    reference = reference_views(make_positions(["UA1", "UA2"]), universe)
+    pd.testing.assert_series_equal(
+        portfolios[0].monthly, reference["monthly"]["total_pay_val"]
+    )
+
+
+def test_consolidation_matches_combined_bag(universe, tmp_path):
+
+    path = str(tmp_path / "portfolios.db")
+    first = make_positions(["UA1", "UA2"])
+    second = make_positions(["UA3"], quantity=4)
+    save("first", first, universe, path)
+    save("second", second, universe, path)
+
+    portfolios, dead = get_portfolio_views(["first", "second"], universe, path)
+    consolidated = consolidate(portfolios)
+
+    reference = reference_views(pd.concat([first, second]), universe)
+    monthly = reference["monthly"]["total_pay_val"]
+
+    assert dead == []
+    np.testing.assert_allclose(
+        consolidated["monthly"][SUMS_ROW_LABEL].reindex(monthly.index, fill_value=0),
+        monthly,
+    )
+    assert consolidated["summary"].loc[SUMS_ROW_LABEL, "quantity"] == 24
+    assert len(consolidated["schedule"]) == len(reference["schedule"])
+
+
+def test_saved_views_are_reused(universe, tmp_path, monkeypatch):
+
+    path = str(tmp_path / "portfolios.db")
+    positions = make_positions(["UA1", "UA2"])
+    views = reference_views(positions, universe)
+    payloads = {
+        SAVED_VIEWS["formatted"]: to_store(views["formatted"]),
+        SAVED_VIEWS["schedule"]: to_store(views["schedule"]),
+        SAVED_VIEWS["monthly"]: to_store(views["monthly"].reset_index()),
+    }
+    save("saved", positions, universe, path, universe.version, payloads)
+
+    def recompute(*args):
+        raise AssertionError("saved views were recomputed")
+
+    monkeypatch.setattr(consolidation, "build_portfolio_views", recompute)
+
+    (portfolio,), dead = get_portfolio_views(["saved"], universe, path)
+
+    assert dead == []
+    np.testing.assert_allclose(
+        portfolio.monthly.to_numpy(), views["monthly"]["total_pay_val"].to_numpy()
+    )
+    assert portfolio.totals["quantity"] == 20
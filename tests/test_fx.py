@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from bondstool.analysis.fx import get_fx_bands
+
+
+def make_bag():
+    return pd.DataFrame(
+        {
+            "currency": ["USD", "USD", "UAH"],
+            "month_end": pd.to_datetime(["2024-07-31", "2024-12-31", "2024-07-31"]),
+            "pay_val": [10.0, 1010.0, 100.0],
+            "quantity": [10, 10, 1],
+            "exchange_rate": [41.0, 41.0, 1.0],
+        }
+    )
+
+
+def test_bands_use_snapshot_rates_and_date():
+
+    spot = pd.Series({"UAH": 1.0, "USD": 38.0})
+    bands = get_fx_bands(make_bag(), n_paths=2000, date="2024-06-15", spot=spot)
+
+    median = bands["p50"].to_numpy()
+    expected = np.array([100.0 + 100.0 * 38.0, 10100.0 * 38.0])
+
+    np.testing.assert_allclose(median, expected, rtol=0.05)
+    assert bands["p5"].iloc[0] > 0.9 * expected[0]
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+
+import pandas as pd
+import pytest
+from bondstool.memo import MemoCache, content_hash, result_size, versioned
+
+
+@versioned
+@dataclass
+class Versioned:
+    version: str
+    payload: list
+
+
+@dataclass
+class Unversioned:
+    version: str
+
+
+def test_versioned_values_are_hashed_by_version():
+
+    assert content_hash(Versioned("v1", [1])) == content_hash(Versioned("v1", [2]))
+    assert content_hash(Versioned("v1", [1])) != content_hash(Versioned("v2", [1]))
+
+
+def test_other_objects_with_a_version_are_not_hashable():
+
+    with pytest.raises(TypeError):
+        content_hash(Unversioned("v1"))
+
+
+def test_cache_is_bounded_by_bytes():
+
+    frame = pd.DataFrame({"value": range(1000)})
+    cache = MemoCache(maxsize=100, max_bytes=2.5 * result_size(frame))
+
+    for key in range(5):
+        cache.put(key, frame.copy())
+
+    assert cache.stats()["size"] == 2
+    assert cache.nbytes == 2 * result_size(frame)
+    assert cache.get(0) == (False, None)
+    assert cache.get(4)[0]
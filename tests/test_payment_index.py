@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+from bondstool.data.bag import merge_bonds_info
+from bondstool.data.payment_index import build_payment_index
+
+
+@pytest.fixture
+def bonds():
+    bonds = pd.DataFrame(
+        {
+            "ISIN": ["UA2", "UA1", "UA2", "UA1", "UA3"],
+            "pay_date": pd.to_datetime(
+                ["2024-04-01", "2024-07-01", "2024-10-01", "2025-01-01", "2024-05-15"]
+            ),
+            "pay_val": [45.0, 80.0, 1045.0, 1080.0, 1100.0],
+            "type": ["ОВДП", "ОВДП", "ОВДП", "ОВДП", "військові облігації"],
+            "currency": ["USD", "UAH", "USD", "UAH", "UAH"],
+            "exchange_rate": [40.0, 1.0, 40.0, 1.0, 1.0],
+            "nominal": [1000, 1000, 1000, 1000, 1000],
+        }
+    )
+    return bonds.assign(month_end=bonds["pay_date"] + pd.offsets.MonthEnd(0))
+
+
+@pytest.mark.parametrize(
+    "isins",
+    [
+        ["UA1", "UA2", "UA3"],
+        ["UA3", "UA1"],
+        ["UA1", "UA9", "UA2"],
+        ["UA9"],
+    ],
+)
+def test_gather_matches_merge(bonds, isins):
+
+    bag = pd.DataFrame(
+        {
+            "ISIN": isins,
+            "quantity": range(1, len(isins) + 1),
+            "expenditure": 1000.0,
+            "tax": 0.18,
+        }
+    )
+
+    gathered = merge_bonds_info(bag, index=build_payment_index(bonds))
+    merged = merge_bonds_info(bag, bonds)
+
+    pd.testing.assert_frame_equal(gathered, merged[gathered.columns])
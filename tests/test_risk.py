@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+from bondstool.analysis.risk import (
+    bag_cash_flows,
+    calc_risk_metrics,
+    universe_cash_flows,
+)
+
+DATE = pd.Timestamp("2024-01-01")
+
+
+@pytest.fixture
+def bonds():
+    return pd.DataFrame(
+        {
+            "ISIN": ["UA1", "UA1", "UA2", "UA2", "UA2"],
+            "pay_date": pd.to_datetime(
+                ["2024-07-01", "2025-01-01", "2024-04-01", "2024-10-01", "2025-04-01"]
+            ),
+            "pay_val": [80.0, 1080.0, 90.0, 90.0, 1090.0],
+            "exchange_rate": [1.0, 1.0, 40.0, 40.0, 40.0],
+            "auk_proc": [16.0, 16.0, 4.5, 4.5, 4.5],
+        }
+    )
+
+
+def test_partial_yield_override_keeps_other_bonds(bonds):
+
+    metrics, _ = calc_risk_metrics(bonds, date=DATE)
+    overridden, _ = calc_risk_metrics(bonds, date=DATE, yields={"UA1": 0.25})
+
+    pd.testing.assert_series_equal(overridden.loc["UA2"], metrics.loc["UA2"])
+    assert overridden.loc["UA1", "yield"] == pytest.approx(0.25)
+    assert overridden.loc["UA1", "pv"] < metrics.loc["UA1", "pv"]
+
+
+def test_yields_default_to_auction_rates(bonds):
+
+    metrics, _ = calc_risk_metrics(bonds, date=DATE)
+
+    assert metrics["yield"].to_dict() == pytest.approx({"UA1": 0.16, "UA2": 0.045})
+
+
+def test_universe_repricing_matches_a_bag_of_every_bond(bonds):
+
+    isins = pd.CategoricalDtype(["UA1", "UA2"])
+    attributes = (
+        bonds.drop_duplicates(subset="ISIN")[["ISIN", "auk_proc", "exchange_rate"]]
+        .astype({"ISIN": isins})
+        .reset_index(drop=True)
+    )
+    payments = bonds[["ISIN", "pay_date", "pay_val"]].astype({"ISIN": isins})
+    bag = bonds.drop(columns="auk_proc").assign(quantity=1)
+
+    universe_metrics, universe_repricing = calc_risk_metrics(
+        universe_cash_flows(attributes, payments), date=DATE
+    )
+    bag_metrics, bag_repricing = calc_risk_metrics(
+        bag_cash_flows(bag, attributes), date=DATE
+    )
+
+    pd.testing.assert_frame_equal(universe_metrics, bag_metrics)
+    pd.testing.assert_frame_equal(universe_repricing, bag_repricing)
+
+    auction_metrics, _ = calc_risk_metrics(
+        universe_cash_flows(attributes, payments, isins=["UA2"]), date=DATE
+    )
+    pd.testing.assert_frame_equal(auction_metrics, bag_metrics.loc[["UA2"]])
@@ -0,0 +1,114 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+from bondstool.analysis.scenarios import rank_allocations, sweep_allocations
+from bondstool.analysis.utils import payments_by_month
+
+STEPS = [0, 10, 20]
+
+
+def with_month_end(df: pd.DataFrame):
+    return df.assign(month_end=df["pay_date"] + pd.offsets.MonthEnd(0))
+
+
+@pytest.fixture
+def bag():
+    return with_month_end(
+        pd.DataFrame(
+            {
+                "ISIN": ["UA1", "UA1", "UA2"],
+                "pay_date": pd.to_datetime(["2024-02-10", "2024-08-10", "2024-05-01"]),
+                "total_pay_val": [800.0, 10800.0, 10450.0],
+            }
+        )
+    )
+
+
+@pytest.fixture
+def trading_bonds():
+    return with_month_end(
+        pd.DataFrame(
+            {
+                "ISIN": ["UA3", "UA3", "UA4", "UA5", "UA5"],
+                "pay_date": pd.to_datetime(
+                    [
+                        "2024-03-15",
+                        "2024-09-15",
+                        "2024-05-20",
+                        "2024-11-01",
+                        "2024-12-01",
+                    ]
+                ),
+                "pay_val": [50.0, 1050.0, 1100.0, 30.0, 1030.0],
+                "exchange_rate": [1.0, 1.0, 1.0, 40.0, 40.0],
+            }
+        )
+    )
+
+
+def reference_scenario(bag, trading_bonds, allocation):
+
+    purchases = trading_bonds.assign(
+        total_pay_val=lambda df: df["pay_val"]
+        * df["exchange_rate"]
+        * df["ISIN"].map(allocation).fillna(0)
+    )
+    monthly = payments_by_month(pd.concat([bag, purchases]))["total_pay_val"]
+
+    months = pd.period_range(monthly.index.min(), monthly.index.max(), freq="M")
+    monthly = monthly.reindex(
+        months.to_timestamp(how="end").normalize(), fill_value=0.0
+    )
+
+    return {
+        "mean": monthly.mean(),
+        "min": monthly.min(),
+        "min_month": monthly.idxmin(),
+        "variance": monthly.var(ddof=0),
+        "gap_count": int((monthly <= 0).sum()),
+    }
+
+
+def test_sweep_matches_per_allocation_loop(bag, trading_bonds):
+
+    isins = ["UA3", "UA4", "UA5"]
+
+    grid, cash_flows, summary = sweep_allocations(
+        trading_bonds, payments_by_month(bag), isins, STEPS, chunk_size=5
+    )
+
+    assert len(grid) == len(STEPS) ** len(isins)
+
+    for position, quantities in enumerate(itertools.product(STEPS, repeat=3)):
+        allocation = dict(zip(isins, quantities))
+        reference = reference_scenario(bag, trading_bonds, allocation)
+
+        assert grid.loc[position, isins].tolist() == list(quantities)
+        row = summary.loc[position]
+        for column in ["mean", "min", "variance"]:
+            np.testing.assert_allclose(row[column], reference[column])
+        assert row["min_month"] == reference["min_month"]
+        assert row["gap_count"] == reference["gap_count"]
+
+
+def test_ranking_matches_per_allocation_loop(bag, trading_bonds):
+
+    isins = ["UA3", "UA5"]
+
+    grid, _, summary = sweep_allocations(
+        trading_bonds, payments_by_month(bag), isins, STEPS
+    )
+    ranked = rank_allocations(grid, summary, sort_by="min", limit=4)
+
+    allocations = list(itertools.product(STEPS, repeat=len(isins)))
+    minimums = [
+        reference_scenario(bag, trading_bonds, dict(zip(isins, quantities)))["min"]
+        for quantities in allocations
+    ]
+    order = sorted(range(len(allocations)), key=lambda i: -minimums[i])[:4]
+
+    assert ranked[isins].to_records(index=False).tolist() == [
+        allocations[i] for i in order
+    ]
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bondstool.data.screener import build_screener_index, screen_bonds
+
+
+@pytest.fixture
+def attributes():
+    return pd.DataFrame(
+        {
+            "ISIN": ["UA1", "UA2", "UA3", "UA4", "UA5"],
+            "type": ["ОВДП", "ОВДП", "військові облігації", "ОВДП", "ОВДП"],
+            "currency": ["UAH", "USD", "UAH", "UAH", "EUR"],
+            "pay_period": [182.0, 182.0, np.nan, 91.0, 182.0],
+            "maturity_date": pd.to_datetime(
+                ["2025-01-01", "2026-06-01", "2024-12-01", "2027-03-01", "2025-09-01"]
+            ),
+            "nominal": [1000, 1000, 1000, 1000, 1000],
+            "auk_proc": [16.0, 4.5, 15.0, 16.5, 3.9],
+            "profitability": [16.5, 4.7, np.nan, 17.0, 4.7],
+        }
+    )
+
+
+@pytest.fixture
+def payments():
+    return pd.DataFrame(
+        {
+            "ISIN": ["UA1", "UA1", "UA2", "UA3", "UA4", "UA4", "UA4"],
+            "pay_date": pd.to_datetime(
+                [
+                    "2024-07-01",
+                    "2025-01-01",
+                    "2024-06-01",
+                    "2024-12-01",
+                    "2024-04-01",
+                    "2024-07-01",
+                    "2024-10-01",
+                ]
+            ),
+        }
+    )
+
+
+@pytest.fixture
+def index(attributes, payments):
+    return build_screener_index(attributes, payments, pd.DataFrame({"ISIN": ["UA2"]}))
+
+
+def reference_screen(summary, sort_by, descending, **filters):
+
+    mask = pd.Series(True, index=summary.index)
+
+    for column, values in filters.items():
+        mask &= summary[column].isin(values)
+
+    return (
+        summary[mask]
+        .sort_values(sort_by, ascending=not descending, kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+def test_missing_coupon_period_is_kept_as_na(index):
+
+    pay_periods = index.summary.set_index("ISIN")["pay_period"]
+
+    assert pay_periods.dtype == "Int64"
+    assert pd.isna(pay_periods["UA3"])
+    assert pay_periods["UA4"] == 91
+
+
+@pytest.mark.parametrize("sort_by", ["profitability", "auk_proc", "next_pay_date"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_screen_matches_pandas_filter_and_sort(index, sort_by, descending):
+
+    screened = screen_bonds(index, sort_by=sort_by, descending=descending, limit=None)
+    reference = reference_screen(index.summary, sort_by, descending)
+
+    pd.testing.assert_frame_equal(screened, reference)
+
+
+def test_pay_period_filter_skips_missing_periods(index):
+
+    screened = screen_bonds(index, pay_periods=[182], limit=None)
+    reference = reference_screen(index.summary, "profitability", True, pay_period=[182])
+
+    pd.testing.assert_frame_equal(screened, reference)
+    assert "UA3" not in set(screened["ISIN"])
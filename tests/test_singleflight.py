@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+from bondstool.data import singleflight
+from bondstool.data.singleflight import single_flight
+
+
+@pytest.fixture(autouse=True)
+def lock_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(singleflight, "SINGLE_FLIGHT_DIR", str(tmp_path))
+
+
+def run_concurrently(func, n_threads=8):
+
+    results, errors = [None] * n_threads, [None] * n_threads
+    barrier = threading.Barrier(n_threads)
+
+    def target(position):
+        barrier.wait()
+        try:
+            results[position] = func()
+        except Exception as error:
+            errors[position] = error
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results, errors
+
+
+def test_concurrent_calls_share_one_result():
+
+    calls = []
+
+    @single_flight
+    def download():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"rows": [1, 2, 3]}
+
+    results, errors = run_concurrently(download)
+
+    assert errors == [None] * len(results)
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_errors_reach_every_waiting_caller():
+    @single_flight
+    def download():
+        time.sleep(0.2)
+        raise ConnectionError("upstream is down")
+
+    _, errors = run_concurrently(download)
+
+    assert all(isinstance(error, ConnectionError) for error in errors)
+
+
+def test_finished_calls_are_not_cached():
+
+    calls = []
+
+    @single_flight
+    def download():
+        calls.append(1)
+        return len(calls)
+
+    assert download() == 1
+    assert download() == 2
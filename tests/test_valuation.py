@@ -0,0 +1,44 @@
+import pandas as pd
+from bondstool.analysis.valuation import value_bag
+
+START = pd.Timestamp("2024-01-01")
+
+
+def make_bag():
+    return pd.DataFrame(
+        {
+            "ISIN": ["UA1", "UA1", "UA2", "UA2"],
+            "pay_date": pd.to_datetime(
+                ["2024-07-01", "2025-01-01", "2024-04-01", "2024-10-01"]
+            ),
+            "pay_val": [80.0, 1080.0, 45.0, 1045.0],
+            "quantity": [10, 10, 5, 5],
+        }
+    )
+
+
+def make_attributes():
+    return pd.DataFrame(
+        {
+            "ISIN": ["UA1", "UA2"],
+            "nominal": [1000.0, 1000.0],
+            "pay_period": pd.to_timedelta([182, 182], unit="D"),
+            "issue_date": ["2023-01-01", "2023-04-01"],
+            "auk_proc": [16.0, 9.0],
+            "exchange_rate": [1.0, 40.0],
+        }
+    )
+
+
+def test_partial_yield_override_keeps_other_bonds():
+
+    bag, attributes = make_bag(), make_attributes()
+
+    valuation = value_bag(bag, attributes, START, freq="ME")
+    overridden = value_bag(bag, attributes, START, freq="ME", yields={"UA1": 0.25})
+
+    pd.testing.assert_series_equal(
+        overridden["dirty"].loc["UA2"], valuation["dirty"].loc["UA2"]
+    )
+    assert (overridden["dirty"].loc["UA1"] <= valuation["dirty"].loc["UA1"]).all()
+    assert overridden["dirty"].notna().all(axis=None)